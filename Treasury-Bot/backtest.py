@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# Offline backtest + parameter sweep for the band strategy.
+# Replays a SOL/GC + SOL/USDC price series through the same rules as treasury_bot
+# (decide → fit_size_to_impact → check_daily_governor → health_checks), vectorized
+# with NumPy across every parameter combination at each time step, and spreads the
+# grid over a process pool.
+#
+#   python backtest.py prices.csv --band-lower 0.12:0.16:5 --band-upper 0.18:0.24:7 \
+#       --cap-bps 50,100,200 --daily-max-bps 200,400 --pool-usd-depth 250000 --out sweep.csv
+#
+# prices.csv columns: ts (unix seconds), sol_per_gc, sol_usdc[, pool_gc, pool_usdc]
+# or a treasury_bot time-series store directory (SERIES_DIR), resampled with --step:
+#
+#   python backtest.py series/ --since 2026-09-01 --step 300 --pool-usd-depth 250000
+import os, csv, sys, json, time, argparse, itertools
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+
+import numpy as np
+
+from timeseries import SeriesStore, resample, parse_when
+
+PARAMS = ("band_lower", "band_upper", "cap_bps", "daily_max_bps", "max_spot_vs_twap_bps", "max_price_impact_bps")
+ENV_DEFAULTS = {
+    "band_lower":           os.getenv("BAND_USD_LOWER", "0.14"),
+    "band_upper":           os.getenv("BAND_USD_UPPER", "0.20"),
+    "cap_bps":              os.getenv("CAP_BPS", "100"),
+    "daily_max_bps":        os.getenv("DAILY_MAX_BPS", "400"),
+    "max_spot_vs_twap_bps": os.getenv("MAX_SPOT_VS_TWAP_BPS", "150"),
+    "max_price_impact_bps": os.getenv("MAX_PRICE_IMPACT_BPS", "200"),
+}
+
+@dataclass
+class SimConfig:
+    gc0: float = 1_000_000.0          # starting treasury GC
+    stable0: float = 100_000.0        # starting vault stables (USDC+USDT pooled)
+    gc_min: float = float(os.getenv("TREASURY_GC_MIN", "0"))
+    stable_min: float = float(os.getenv("VAULT_STABLE_MIN", "0"))
+    fee_rate: float = 0.0025
+    min_trade_fraction: float = float(os.getenv("MIN_TRADE_FRACTION", "0.1"))
+    twap_window_sec: float = float(os.getenv("TWAP_WINDOW_SEC", "1800"))
+    every: int = 1                    # decide every N rows (cycle cadence vs sample cadence)
+
+# ────────────────────────────────────────────────────────────────────────────
+# Series
+# ────────────────────────────────────────────────────────────────────────────
+def load_series(path: str, pool_usd_depth: float = 0.0) -> dict:
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    if not rows: raise SystemExit(f"empty series: {path}")
+    ts = np.array([float(r["ts"]) for r in rows])
+    spot = np.array([float(r["sol_per_gc"]) for r in rows])
+    su = np.array([float(r["sol_usdc"]) for r in rows])
+    order = np.argsort(ts, kind="stable")
+    ts, spot, su = ts[order], spot[order], su[order]
+    if "pool_gc" in rows[0] and "pool_usdc" in rows[0]:
+        pool_gc = np.array([float(r["pool_gc"]) for r in rows])[order]
+        pool_usd = np.array([float(r["pool_usdc"]) for r in rows])[order]
+        return {"ts": ts, "sol_per_gc": spot, "sol_usdc": su, "pool_gc": pool_gc, "pool_usd": pool_usd}
+    return _fixed_depth(ts, spot, su, pool_usd_depth)
+
+def _fixed_depth(ts, spot, su, pool_usd_depth: float) -> dict:
+    if pool_usd_depth <= 0: raise SystemExit("series has no pool_gc/pool_usdc columns: pass --pool-usd-depth")
+    pool_usd = np.full_like(spot, pool_usd_depth)
+    pool_gc = pool_usd / (spot * su)
+    return {"ts": ts, "sol_per_gc": spot, "sol_usdc": su, "pool_gc": pool_gc, "pool_usd": pool_usd}
+
+def load_store(root: str, pool_usd_depth: float, since=None, until=None, step: float = 60.0) -> dict:
+    """sol_per_gc / sol_usdc from a treasury_bot time-series store, as step-second closes on a shared grid."""
+    store = SeriesStore(root)
+    a, b = store.scan("sol_per_gc", since, until), store.scan("sol_usdc", since, until)
+    ta, va = resample(a["ts"], a["value"], step, "last", fill=True)
+    tb, vb = resample(b["ts"], b["value"], step, "last", fill=True)
+    ts, ia, ib = np.intersect1d(ta, tb, return_indices=True)
+    if not len(ts): raise SystemExit(f"no overlapping sol_per_gc / sol_usdc history in {root}")
+    return _fixed_depth(ts, va[ia], vb[ib], pool_usd_depth)
+
+def rolling_twap(ts: np.ndarray, px: np.ndarray, window: float) -> np.ndarray:
+    """Step-function time-weighted average over (ts - window, ts], same definition as PriceRing.twap."""
+    dt = np.diff(ts, append=ts[-1])
+    area = np.concatenate(([0.0], np.cumsum(px * dt)))     # area[k] = ∫ from ts[0] to ts[k]
+    start = np.searchsorted(ts, ts - window, side="left")
+    num = area[np.arange(len(ts))] - area[start]
+    den = ts - ts[start]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(den > 0, num / den, px)
+
+# ────────────────────────────────────────────────────────────────────────────
+# Vectorized simulation (one row per parameter combination)
+# ────────────────────────────────────────────────────────────────────────────
+def simulate(series: dict, grid: dict, cfg: SimConfig) -> dict:
+    spot, su, ts = series["sol_per_gc"], series["sol_usdc"], series["ts"]
+    pool_gc, pool_usd = series["pool_gc"], series["pool_usd"]
+    twap = rolling_twap(ts, spot, cfg.twap_window_sec)
+    day = (ts // 86_400).astype(np.int64)
+
+    lo_usd, hi_usd = grid["band_lower"], grid["band_upper"]
+    cap, dmax = grid["cap_bps"] / 1e4, grid["daily_max_bps"] / 1e4
+    max_dev, m = grid["max_spot_vs_twap_bps"], grid["max_price_impact_bps"] / 1e4
+    P = len(lo_usd)
+    f1 = 1.0 - cfg.fee_rate
+
+    gc = np.full(P, cfg.gc0); st = np.full(P, cfg.stable0)
+    base_gc, base_st = gc.copy(), st.copy()
+    sold, spent = np.zeros(P), np.zeros(P)
+    n_sell, n_buy, gov_hits, health_skips, shrunk = (np.zeros(P, dtype=np.int64) for _ in range(5))
+    vol_usd = np.zeros(P)
+    # impact limit for the half-vs-full metric on a CPMM pool: x ≤ m·R / (f1·(½ − m))
+    k_imp = np.where(m < 0.5, m / (f1 * np.maximum(0.5 - m, 1e-12)), np.inf)
+
+    cur_day = day[0]
+    for t in range(0, len(ts), max(1, cfg.every)):
+        if day[t] != cur_day:
+            cur_day = day[t]
+            base_gc[:] = gc; base_st[:] = st; sold[:] = 0; spent[:] = 0
+        px, s, rg, ru = spot[t], su[t], pool_gc[t], pool_usd[t]
+        sell = px > hi_usd / s
+        buy = px < lo_usd / s
+        if not (sell.any() or buy.any()):
+            continue
+
+        # decide(): per-check caps
+        want_gc = np.maximum(0.0, np.minimum(gc * cap, gc - cfg.gc_min))
+        want_st = np.maximum(0.0, np.minimum(st * cap, st - cfg.stable_min))
+        # fit_size_to_impact(): shrink unless below MIN_TRADE_FRACTION (then the impact check fails)
+        safe_gc, safe_st = np.minimum(want_gc, k_imp * rg), np.minimum(want_st, k_imp * ru)
+        fit_gc = safe_gc >= want_gc * cfg.min_trade_fraction
+        fit_st = safe_st >= want_st * cfg.min_trade_fraction
+        size_gc = np.where(fit_gc, safe_gc, want_gc)
+        size_st = np.where(fit_st, safe_st, want_st)
+        shrunk += (sell & fit_gc & (safe_gc < want_gc)) | (buy & fit_st & (safe_st < want_st))
+        # check_daily_governor()
+        gov_ok = np.where(sell, sold + size_gc <= base_gc * dmax, spent + size_st <= base_st * dmax)
+        # health_checks(): spot-vs-TWAP divergence, then impact
+        dev_ok = (abs(px - twap[t]) / twap[t] * 1e4 <= max_dev) if twap[t] > 0 else np.ones(P, dtype=bool)
+        health_ok = dev_ok & np.where(sell, fit_gc, fit_st)
+
+        act = (sell | buy) & gov_ok
+        gov_hits += (sell | buy) & ~gov_ok
+        health_skips += act & ~health_ok
+        do_sell = act & health_ok & sell & (size_gc > 0)
+        do_buy = act & health_ok & buy & (size_st > 0)
+
+        x_gc = np.where(do_sell, size_gc, 0.0)
+        out_usd = ru * x_gc * f1 / (rg + x_gc * f1)
+        y_st = np.where(do_buy, size_st, 0.0)
+        out_gc = rg * y_st * f1 / (ru + y_st * f1)
+        gc += out_gc - x_gc; st += out_usd - y_st
+        sold += x_gc; spent += y_st
+        n_sell += do_sell; n_buy += do_buy
+        vol_usd += out_usd + y_st
+
+    px_usd_T = spot[-1] * su[-1]
+    value = gc * px_usd_T + st
+    hold = cfg.gc0 * px_usd_T + cfg.stable0
+    return {
+        "final_gc": gc, "final_stable": st,
+        "value_usd": value, "pnl_vs_hold_usd": value - hold,
+        "pnl_usd": value - (cfg.gc0 * spot[0] * su[0] + cfg.stable0),
+        "inventory_drift_gc": gc / cfg.gc0 - 1.0,
+        "inventory_drift_stable": (st / cfg.stable0 - 1.0) if cfg.stable0 else np.zeros(P),
+        "trades_sell": n_sell, "trades_buy": n_buy, "volume_usd": vol_usd,
+        "governor_hits": gov_hits, "health_skips": health_skips, "impact_shrinks": shrunk,
+    }
+
+def _run_chunk(args):
+    series, grid, cfg = args
+    return simulate(series, grid, cfg)
+
+# ────────────────────────────────────────────────────────────────────────────
+# Grid + sweep
+# ────────────────────────────────────────────────────────────────────────────
+def parse_values(spec: str) -> list[float]:
+    """'a,b,c' or 'start:stop:num' (inclusive linspace)."""
+    if ":" in spec:
+        a, b, n = spec.split(":")
+        return list(np.linspace(float(a), float(b), int(n)))
+    return [float(x) for x in spec.split(",") if x.strip()]
+
+def build_grid(values: dict[str, list[float]]) -> dict:
+    combos = [c for c in itertools.product(*(values[k] for k in PARAMS))
+              if c[0] < c[1]]   # band_lower < band_upper
+    if not combos: raise SystemExit("empty grid (band_lower must be < band_upper)")
+    arr = np.array(combos, dtype=float)
+    return {k: arr[:, i] for i, k in enumerate(PARAMS)}
+
+def sweep(series: dict, grid: dict, cfg: SimConfig, workers: int = os.cpu_count() or 1) -> dict:
+    P = len(grid[PARAMS[0]])
+    n_chunks = max(1, min(P, workers * 4))
+    bounds = np.linspace(0, P, n_chunks + 1).astype(int)
+    chunks = [({k: v[a:b] for k, v in grid.items()}) for a, b in zip(bounds, bounds[1:]) if b > a]
+    if workers <= 1 or len(chunks) == 1:
+        parts = [simulate(series, c, cfg) for c in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            parts = list(ex.map(_run_chunk, [(series, c, cfg) for c in chunks]))
+    out = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+    return {**grid, **out}
+
+def write_results(res: dict, path: str, sort_key: str = "pnl_vs_hold_usd"):
+    order = np.argsort(-res[sort_key], kind="stable")
+    cols = list(res)
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f); w.writerow(cols)
+        for i in order:
+            w.writerow([res[c][i].item() for c in cols])
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Backtest / sweep the treasury band strategy")
+    ap.add_argument("series", help="CSV: ts,sol_per_gc,sol_usdc[,pool_gc,pool_usdc], or a time-series store directory")
+    for k in PARAMS:
+        ap.add_argument(f"--{k.replace('_', '-')}", default=ENV_DEFAULTS[k], help="a,b,c or start:stop:num")
+    ap.add_argument("--pool-usd-depth", type=float, default=0.0, help="USD per side of a CPMM pool when the series has no reserves")
+    ap.add_argument("--gc0", type=float, default=SimConfig.gc0)
+    ap.add_argument("--stable0", type=float, default=SimConfig.stable0)
+    ap.add_argument("--fee-rate", type=float, default=SimConfig.fee_rate)
+    ap.add_argument("--every", type=int, default=1, help="decide every N rows")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--out", default="sweep.csv")
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--since", help="store only: unix seconds or ISO date"); ap.add_argument("--until")
+    ap.add_argument("--step", type=float, default=60.0, help="store only: resample to this many seconds")
+    a = ap.parse_args(argv)
+
+    if os.path.isdir(a.series):
+        series = load_store(a.series, a.pool_usd_depth, parse_when(a.since), parse_when(a.until), a.step)
+    else:
+        series = load_series(a.series, a.pool_usd_depth)
+    grid = build_grid({k: parse_values(getattr(a, k)) for k in PARAMS})
+    cfg = SimConfig(gc0=a.gc0, stable0=a.stable0, fee_rate=a.fee_rate, every=a.every)
+    t0 = time.perf_counter()
+    res = sweep(series, grid, cfg, workers=a.workers)
+    dt = time.perf_counter() - t0
+    write_results(res, a.out)
+    order = np.argsort(-res["pnl_vs_hold_usd"], kind="stable")[:a.top]
+    print(json.dumps({"combos": len(res["pnl_vs_hold_usd"]), "steps": len(series["ts"]),
+                      "sec": round(dt, 3), "out": a.out, "config": asdict(cfg)}))
+    for i in order:
+        print(json.dumps({k: round(res[k][i].item(), 6) for k in (*PARAMS, "pnl_vs_hold_usd", "inventory_drift_gc",
+                                                                  "trades_sell", "trades_buy", "governor_hits")}))
+
+if __name__ == "__main__":
+    sys.exit(main())
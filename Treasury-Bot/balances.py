@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# Slot-consistent wallet balances in one RPC round trip.
+# Token accounts are discovered once (program-id filter), then every snapshot is a
+# single getMultipleAccounts over [owner, *token accounts]: one context slot, raw
+# base-unit amounts decoded straight from the SPL account layout, SOL included.
+import json, time, struct, logging, threading
+from dataclasses import dataclass, field
+from typing import Optional
+
+from solana.rpc.types import TokenAccountOpts
+from solders.pubkey import Pubkey
+
+LOG = logging.getLogger("treasury_bot")
+
+TOKEN_PROGRAM_ID      = Pubkey.from_string("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA")
+TOKEN_2022_PROGRAM_ID = Pubkey.from_string("TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb")
+ATA_PROGRAM_ID        = Pubkey.from_string("ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL")
+MAX_ACCOUNTS_PER_CALL = 100  # getMultipleAccounts limit
+
+def decode_token_account(data: bytes) -> tuple[str, str, int]:
+    """SPL token account: mint(32) | owner(32) | amount u64 LE | ... → (mint, owner, amount)."""
+    mint, owner = Pubkey(data[0:32]), Pubkey(data[32:64])
+    (amount,) = struct.unpack_from("<Q", data, 64)
+    return str(mint), str(owner), amount
+
+def ata_address(owner: Pubkey, mint: Pubkey, token_program: Pubkey = TOKEN_PROGRAM_ID) -> Pubkey:
+    return Pubkey.find_program_address([bytes(owner), bytes(token_program), bytes(mint)], ATA_PROGRAM_ID)[0]
+
+@dataclass
+class BalanceSnapshot:
+    slot: int
+    lamports: int
+    units: dict[str, int]              # label → summed raw token amount
+    fetched_at: float = field(default_factory=time.monotonic)
+
+class BalanceReader:
+    """Reads {label: mint} balances for one owner; caches the last snapshot for max_age_sec."""
+
+    def __init__(self, client, owner: Pubkey, mints: dict[str, str],
+                 max_age_sec: float = 2.0, rediscover_sec: float = 3600.0):
+        self.client = client
+        self.owner = owner
+        self.mints = dict(mints)
+        self.max_age_sec = max_age_sec
+        self.rediscover_sec = rediscover_sec
+        self._lock = threading.Lock()
+        self._accounts: list[Pubkey] = []     # token accounts to read (discovered + derived ATAs)
+        self._discovered_at: Optional[float] = None
+        self._last: Optional[BalanceSnapshot] = None
+
+    def _discover(self):
+        by_mint = {m: label for label, m in self.mints.items()}
+        accts = {ata_address(self.owner, Pubkey.from_string(m)) for m in self.mints.values()}
+        for program in (TOKEN_PROGRAM_ID, TOKEN_2022_PROGRAM_ID):
+            res = self.client.get_token_accounts_by_owner(self.owner, TokenAccountOpts(program_id=program))
+            for keyed in res.value or []:
+                mint, _, _ = decode_token_account(bytes(keyed.account.data))
+                if mint in by_mint:
+                    accts.add(keyed.pubkey)
+        self._accounts = sorted(accts, key=str)
+        self._discovered_at = time.monotonic()
+        LOG.debug(json.dumps({"dbg": "balance_accounts_discovered", "accounts": [str(a) for a in self._accounts]}))
+
+    def _read(self) -> tuple[BalanceSnapshot, bool]:
+        keys = [self.owner] + self._accounts
+        if len(keys) > MAX_ACCOUNTS_PER_CALL:
+            raise ValueError(f"too many token accounts for one getMultipleAccounts call: {len(keys)}")
+        res = self.client.get_multiple_accounts(keys)
+        owner_acc, token_accs = res.value[0], res.value[1:]
+        by_mint = {m: label for label, m in self.mints.items()}
+        units = {label: 0 for label in self.mints}
+        stale = False
+        for acc in token_accs:
+            if acc is None: continue  # derived ATA not created yet / account closed
+            mint, owner, amount = decode_token_account(bytes(acc.data))
+            if owner != str(self.owner) or mint not in by_mint:
+                stale = True; continue
+            units[by_mint[mint]] += amount
+        snap = BalanceSnapshot(slot=res.context.slot, lamports=(owner_acc.lamports if owner_acc else 0), units=units)
+        return snap, stale
+
+    def snapshot(self, max_age_sec: Optional[float] = None) -> BalanceSnapshot:
+        max_age = self.max_age_sec if max_age_sec is None else max_age_sec
+        with self._lock:
+            last = self._last
+            if last is not None and time.monotonic() - last.fetched_at <= max_age:
+                return last
+            if self._discovered_at is None or time.monotonic() - self._discovered_at > self.rediscover_sec:
+                self._discover()
+            snap, stale = self._read()
+            if stale:
+                self._discover(); snap, _ = self._read()
+            self._last = snap
+            return snap
+
+    def accounts(self) -> list[Pubkey]:
+        """Token accounts the snapshot reads (discovering them on first use)."""
+        with self._lock:
+            if self._discovered_at is None: self._discover()
+            return list(self._accounts)
+
+    def invalidate(self):
+        with self._lock:
+            self._last = None
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+# Local stand-ins for every endpoint treasury_bot talks to: Raydium trade API
+# (compute / transaction / fee / pools / token list), Solana JSON-RPC + websocket and Jito.
+# Each host is its own server so per-host connection pooling behaves as in prod;
+# every server counts calls and bytes per endpoint and can inject latency/failures.
+import json, time, random, base64, struct, hashlib, threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from websockets.sync.server import serve
+
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.message import MessageV0
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.transaction import VersionedTransaction
+
+TOKEN_PROGRAM = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+SOL_MINT = "So11111111111111111111111111111111111111112"
+
+@dataclass
+class Faults:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    fail_rate: float = 0.0        # fraction of requests answered with HTTP 503
+
+    def apply(self) -> bool:
+        d = self.latency_ms + (random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if d > 0: time.sleep(d / 1000)
+        return self.fail_rate > 0 and random.random() < self.fail_rate
+
+@dataclass
+class Stats:
+    calls: dict = field(default_factory=lambda: defaultdict(int))
+    errors: dict = field(default_factory=lambda: defaultdict(int))
+    bytes: dict = field(default_factory=lambda: defaultdict(int))
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def add(self, ep: str, nbytes: int, failed: bool):
+        with self.lock:
+            self.calls[ep] += 1; self.bytes[ep] += nbytes
+            if failed: self.errors[ep] += 1
+
+    def take(self) -> dict:
+        with self.lock:
+            out = {"calls": dict(self.calls), "errors": dict(self.errors), "bytes": dict(self.bytes)}
+            self.calls.clear(); self.errors.clear(); self.bytes.clear()
+        return out
+
+class FakeServer:
+    """One host. Subclasses implement route(method, path, query, body) -> (endpoint_name, status, payload)."""
+    name = "fake"
+
+    def __init__(self, faults: Faults = None):
+        self.faults = faults or Faults()
+        self.stats = Stats()
+        outer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            def _serve(self, method):
+                n = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(n) if n else b""
+                u = urlsplit(self.path)
+                ep, status, payload = outer.route(method, u.path, parse_qs(u.query), body)
+                failed = outer.faults.apply()
+                if failed: status, payload = 503, {"error": "injected failure"}
+                data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                outer.stats.add(ep, len(body) + len(data) + len(self.requestline), failed or status >= 400)
+            def do_GET(self): self._serve("GET")
+            def do_POST(self): self._serve("POST")
+            def log_message(self, *a): pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name=f"fake-{self.name}", daemon=True)
+
+    def start(self):
+        self._thread.start(); return self
+
+    def stop(self):
+        self.httpd.shutdown(); self.httpd.server_close()
+
+    def route(self, method, path, query, body):
+        return path, 404, {"error": "not found"}
+
+# ────────────────────────────────────────────────────────────────────────────
+# Market model shared by the fakes
+# ────────────────────────────────────────────────────────────────────────────
+class Market:
+    """Constant-product pools between SOL, GC, USDC, USDT with UI-unit reserves."""
+
+    def __init__(self, owner: Pubkey, gc_usd: float = 0.17, sol_usd: float = 150.0, depth_usd: float = 250_000.0,
+                 fee_rate: float = 0.0025, balances: dict = None):
+        self.owner = owner
+        self.mints = {"SOL": SOL_MINT, "GC": str(Pubkey.new_unique()), "USDC": str(Pubkey.new_unique()),
+                      "USDT": str(Pubkey.new_unique())}
+        self.decimals = {"SOL": 9, "GC": 6, "USDC": 6, "USDT": 6}
+        self.label = {m: k for k, m in self.mints.items()}
+        self.usd = {"SOL": sol_usd, "GC": gc_usd, "USDC": 1.0, "USDT": 1.0}
+        self.fee_rate = fee_rate
+        self.pools = {}
+        for a, b in (("SOL", "GC"), ("SOL", "USDC"), ("SOL", "USDT"), ("GC", "USDC"), ("GC", "USDT")):
+            self.pools[frozenset((a, b))] = {a: depth_usd / self.usd[a], b: depth_usd / self.usd[b],
+                                             "id": str(Pubkey.new_unique()), "a": a, "b": b,
+                                             "vault_a": str(Pubkey.new_unique()), "vault_b": str(Pubkey.new_unique())}
+        self.vaults = {p[f"vault_{s}"]: (p, p[s]) for p in self.pools.values() for s in "ab"}   # vault → (pool, label)
+        self.listeners = []       # fn(accounts changed) — the websocket fake subscribes here
+        self.balances = balances or {"SOL": 5.0, "GC": 1_000_000.0, "USDC": 50_000.0, "USDT": 50_000.0}
+        self.slot = 300_000_000
+        self.block_height = 280_000_000
+        self.lock = threading.Lock()
+
+    def out(self, a: str, b: str, amount_ui: float) -> float:
+        p = self.pools[frozenset((a, b))]
+        x = amount_ui * (1 - self.fee_rate)
+        return p[b] * x / (p[a] + x)
+
+    def swap(self, a: str, b: str, amount_ui: float) -> float:
+        """Someone else trades a → b: moves the pool (and price) and notifies account listeners."""
+        with self.lock:
+            p = self.pools[frozenset((a, b))]
+            out = self.out(a, b, amount_ui)
+            p[a] += amount_ui; p[b] -= out
+            self.slot += 1
+        for fn in list(self.listeners): fn([p["vault_a"], p["vault_b"]])
+        return out
+
+    def tick(self):
+        with self.lock:
+            self.slot += 1
+            if self.slot % 2 == 0: self.block_height += 1
+            return self.slot
+
+# ────────────────────────────────────────────────────────────────────────────
+# Raydium: transaction host + API v3 host (fee, pools, token list)
+# ────────────────────────────────────────────────────────────────────────────
+def dummy_tx_b64(payer: Pubkey) -> str:
+    msg = MessageV0.try_compile(payer, [], [], Hash.new_unique())
+    return base64.b64encode(bytes(VersionedTransaction.populate(msg, [Signature.default()]))).decode()
+
+class FakeRaydiumSwap(FakeServer):
+    name = "raydium-swap"
+
+    def __init__(self, market: Market, faults: Faults = None, txs_per_swap: int = 1):
+        super().__init__(faults)
+        self.m = market
+        self.txs_per_swap = txs_per_swap
+
+    def route(self, method, path, q, body):
+        m = self.m
+        if path == "/compute/swap-base-in":
+            a, b = m.label[q["inputMint"][0]], m.label[q["outputMint"][0]]
+            amt = int(q["amount"][0])
+            out_ui = m.out(a, b, amt / 10 ** m.decimals[a])
+            out = int(out_ui * 10 ** m.decimals[b])
+            slip = int(q.get("slippageBps", ["50"])[0])
+            return "compute/swap-base-in", 200, {"id": hashlib.md5(path.encode()).hexdigest(), "success": True, "version": "V1", "data": {
+                "swapType": "BaseIn", "inputMint": m.mints[a], "inputAmount": str(amt),
+                "outputMint": m.mints[b], "outputAmount": str(out),
+                "otherAmountThreshold": str(out * (10_000 - slip) // 10_000), "slippageBps": slip,
+                "priceImpactPct": 0.0, "referrerAmount": "0",
+                "routePlan": [{"poolId": m.pools[frozenset((a, b))]["id"], "inputMint": m.mints[a], "outputMint": m.mints[b],
+                               "feeMint": m.mints[a], "feeRate": int(m.fee_rate * 10_000), "feeAmount": "0", "remainingAccounts": []}],
+            }}
+        if path == "/transaction/swap-base-in" and method == "POST":
+            wallet = Pubkey.from_string(json.loads(body)["wallet"])
+            return "transaction/swap-base-in", 200, {"id": "tx", "success": True, "version": "V1",
+                                                     "data": [{"transaction": dummy_tx_b64(wallet)} for _ in range(self.txs_per_swap)]}
+        return super().route(method, path, q, body)
+
+class FakeRaydiumApi(FakeServer):
+    name = "raydium-api"
+
+    def __init__(self, market: Market, faults: Faults = None, token_list_size: int = 20_000):
+        super().__init__(faults)
+        self.m = market
+        filler = [{"symbol": f"T{i}", "name": f"Token {i}", "mint": str(Pubkey.new_unique()), "decimals": 6,
+                   "extensions": {}, "icon": f"https://example.invalid/{i}.png"} for i in range(token_list_size)]
+        ours = [{"symbol": k, "name": k, "mint": v, "decimals": market.decimals[k], "extensions": {}} for k, v in market.mints.items()]
+        self.token_list = json.dumps({"name": "Raydium Mainnet Token List", "official": ours + filler[: token_list_size // 2],
+                                      "unOfficial": filler[token_list_size // 2:]}).encode()
+
+    def route(self, method, path, q, body):
+        m = self.m
+        if path == "/tokens":
+            return "token-list", 200, self.token_list
+        if path == "/fee/prioritization":
+            return "fee/prioritization", 200, {"id": "fee", "success": True, "data": {"default": {"vh": 100_000, "h": 50_000, "m": 10_000}}}
+        if path == "/pools/info/mint":
+            a, b = m.label[q["mint1"][0]], m.label[q["mint2"][0]]
+            p = m.pools[frozenset((a, b))]
+            ka, kb = p["a"], p["b"]
+            row = {"type": "Standard", "id": p["id"], "feeRate": m.fee_rate, "tvl": 2 * p[ka] * m.usd[ka],
+                   "mintA": {"address": m.mints[ka], "decimals": m.decimals[ka]},
+                   "mintB": {"address": m.mints[kb], "decimals": m.decimals[kb]},
+                   "mintAmountA": p[ka], "mintAmountB": p[kb], "price": p[kb] / p[ka]}
+            return "pools/info/mint", 200, {"id": "pools", "success": True, "data": {"count": 1, "data": [row], "hasNextPage": False}}
+        if path == "/pools/key/ids":
+            by_id = {p["id"]: p for p in m.pools.values()}
+            rows = [({"id": i, "mintA": {"address": m.mints[by_id[i]["a"]]}, "mintB": {"address": m.mints[by_id[i]["b"]]},
+                      "vault": {"A": by_id[i]["vault_a"], "B": by_id[i]["vault_b"]}} if i in by_id else None)
+                    for i in q["ids"][0].split(",")]
+            return "pools/key/ids", 200, {"id": "keys", "success": True, "data": rows}
+        return super().route(method, path, q, body)
+
+# ────────────────────────────────────────────────────────────────────────────
+# Solana JSON-RPC
+# ────────────────────────────────────────────────────────────────────────────
+def _account(data: bytes, owner: str, lamports: int = 2_039_280) -> dict:
+    return {"data": [base64.b64encode(data).decode(), "base64"], "executable": False, "lamports": lamports,
+            "owner": owner, "rentEpoch": 18446744073709551615, "space": len(data)}
+
+class FakeRpc(FakeServer):
+    name = "rpc"
+
+    def __init__(self, market: Market, faults: Faults = None, confirm_after_polls: int = 1):
+        super().__init__(faults)
+        self.m = market
+        self.confirm_after_polls = confirm_after_polls
+        self.sent: dict[str, int] = {}                 # signature → polls seen
+        from balances import ata_address             # same derivation the bot uses
+        owner = market.owner
+        self.token_accounts = {str(ata_address(owner, Pubkey.from_string(market.mints[k]))): k for k in ("GC", "USDC", "USDT")}
+
+    def _token_data(self, label: str, owner: Pubkey = None, ui: float = None) -> bytes:
+        m = self.m
+        amt = int((m.balances[label] if ui is None else ui) * 10 ** m.decimals[label])
+        return (bytes(Pubkey.from_string(m.mints[label])) + bytes(owner or m.owner) + struct.pack("<Q", amt)
+                + bytes(4 + 32) + b"\x01" + bytes(4 + 8 + 8 + 4 + 32))
+
+    def _mint_data(self, label: str) -> bytes:
+        return bytes(4 + 32) + struct.pack("<Q", 10 ** 15) + bytes([self.m.decimals[label]]) + b"\x01" + bytes(4 + 32)
+
+    def _ctx(self, value):
+        return {"context": {"slot": self.m.tick(), "apiVersion": "1.18.0"}, "value": value}
+
+    def _lookup(self, key: str):
+        m = self.m
+        if key == str(m.owner):
+            return {"data": ["", "base64"], "executable": False, "lamports": int(m.balances["SOL"] * 1e9),
+                    "owner": "11111111111111111111111111111111", "rentEpoch": 18446744073709551615, "space": 0}
+        if key in self.token_accounts:
+            return _account(self._token_data(self.token_accounts[key]), TOKEN_PROGRAM)
+        if key in m.label:
+            return _account(self._mint_data(m.label[key]), TOKEN_PROGRAM, 1_461_600)
+        if key in m.vaults:
+            pool, label = m.vaults[key]
+            return _account(self._token_data(label, Pubkey.from_string(pool["id"]), pool[label]), TOKEN_PROGRAM)
+        return None
+
+    def call(self, method: str, params: list):
+        m = self.m
+        if method == "getMultipleAccounts":
+            return self._ctx([self._lookup(k) for k in params[0]])
+        if method == "getAccountInfo":
+            return self._ctx(self._lookup(params[0]))
+        if method == "getTokenAccountsByOwner":
+            flt = params[1]
+            if flt.get("programId", TOKEN_PROGRAM) != TOKEN_PROGRAM: return self._ctx([])
+            return self._ctx([{"pubkey": k, "account": _account(self._token_data(lbl), TOKEN_PROGRAM)}
+                              for k, lbl in self.token_accounts.items()])
+        if method == "getBalance":
+            return self._ctx(int(m.balances["SOL"] * 1e9))
+        if method == "getSlot":
+            return m.tick()
+        if method == "getBlockHeight":
+            return m.block_height
+        if method == "getLatestBlockhash":
+            return self._ctx({"blockhash": str(Hash.new_unique()), "lastValidBlockHeight": m.block_height + 150})
+        if method == "isBlockhashValid":
+            return self._ctx(True)
+        if method == "getRecentPrioritizationFees":
+            return [{"slot": m.slot - i, "prioritizationFee": (i * 977) % 60_000} for i in range(150)]
+        if method == "sendTransaction":
+            tx = VersionedTransaction.from_bytes(base64.b64decode(params[0]))
+            sig = str(tx.signatures[0])
+            self.sent.setdefault(sig, 0)
+            return sig
+        if method == "getSignatureStatuses":
+            out = []
+            for s in params[0]:
+                if s not in self.sent: out.append(None); continue
+                self.sent[s] += 1
+                done = self.sent[s] >= self.confirm_after_polls
+                out.append({"slot": m.slot, "confirmations": None if done else 0, "err": None, "status": {"Ok": None},
+                            "confirmationStatus": "confirmed" if done else "processed"})
+            return self._ctx(out)
+        raise KeyError(method)
+
+    def route(self, method, path, q, body):
+        req = json.loads(body or b"{}")
+        batch = isinstance(req, list)
+        out = []
+        for r in (req if batch else [req]):
+            try:
+                out.append({"jsonrpc": "2.0", "id": r.get("id"), "result": self.call(r["method"], r.get("params") or [])})
+            except KeyError as e:
+                out.append({"jsonrpc": "2.0", "id": r.get("id"), "error": {"code": -32601, "message": f"method not found: {e}"}})
+        name = "rpc:batch" if batch else f"rpc:{req.get('method')}"
+        return name, 200, (out if batch else out[0])
+
+class FakeWs:
+    """Solana pubsub stand-in: accountSubscribe, and accountNotification whenever the market moves."""
+    name = "ws"
+
+    def __init__(self, rpc: FakeRpc):
+        self.rpc = rpc
+        self.stats = Stats()
+        self._lock = threading.Lock()
+        self._subs: dict[str, list] = defaultdict(list)    # account → [(conn, sub_id)]
+        self._next = 1
+        self.server = serve(self._handler, "127.0.0.1", 0)
+        self.url = f"ws://127.0.0.1:{self.server.socket.getsockname()[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fake-ws", daemon=True)
+        rpc.m.listeners.append(self.notify)
+
+    def _handler(self, conn):
+        try:
+            for raw in conn:
+                req = json.loads(raw)
+                if req.get("method") != "accountSubscribe":
+                    conn.send(json.dumps({"jsonrpc": "2.0", "id": req.get("id"), "error": {"code": -32601, "message": "method not found"}}))
+                    continue
+                with self._lock:
+                    sid, self._next = self._next, self._next + 1
+                    self._subs[req["params"][0]].append((conn, sid))
+                conn.send(json.dumps({"jsonrpc": "2.0", "id": req.get("id"), "result": sid}))
+                self.stats.add("ws:accountSubscribe", len(raw), False)
+        finally:
+            with self._lock:
+                for k in self._subs: self._subs[k] = [(c, i) for c, i in self._subs[k] if c is not conn]
+
+    def notify(self, accounts: list[str]):
+        for acct in accounts:
+            value = self.rpc._lookup(acct)
+            with self._lock: targets = list(self._subs.get(acct, ()))
+            for conn, sid in targets:
+                msg = json.dumps({"jsonrpc": "2.0", "method": "accountNotification", "params": {
+                    "subscription": sid, "result": {"context": {"slot": self.rpc.m.slot}, "value": value}}})
+                try:
+                    conn.send(msg); self.stats.add("ws:accountNotification", len(msg), False)
+                except Exception:
+                    pass
+
+    def drop_all(self):
+        """Close every subscriber connection (reconnect / resync testing)."""
+        with self._lock: conns = {c for subs in self._subs.values() for c, _ in subs}
+        for c in conns: c.close()
+
+    def start(self):
+        self._thread.start(); return self
+
+    def stop(self):
+        self.server.shutdown()
+
+# ────────────────────────────────────────────────────────────────────────────
+# Jito block engine
+# ────────────────────────────────────────────────────────────────────────────
+class FakeJito(FakeServer):
+    name = "jito"
+
+    def __init__(self, rpc: FakeRpc, faults: Faults = None):
+        super().__init__(faults)
+        self.rpc = rpc
+
+    def route(self, method, path, q, body):
+        req = json.loads(body or b"{}")
+        meth = req.get("method")
+        if meth == "sendTransaction":
+            return f"jito:{meth}", 200, {"jsonrpc": "2.0", "id": req.get("id"), "result": self.rpc.call("sendTransaction", req["params"])}
+        if meth == "sendBundle":
+            txs = req["params"][0]
+            sigs = [self.rpc.call("sendTransaction", [t]) for t in txs]
+            return f"jito:{meth}", 200, {"jsonrpc": "2.0", "id": req.get("id"), "result": hashlib.sha256("".join(sigs).encode()).hexdigest()}
+        return super().route(method, path, q, body)
+
+# ────────────────────────────────────────────────────────────────────────────
+# Everything at once
+# ────────────────────────────────────────────────────────────────────────────
+class FakeCluster:
+    def __init__(self, owner: Keypair, faults: dict[str, Faults] = None, **market_kw):
+        faults = faults or {}
+        self.market = Market(owner.pubkey(), **market_kw)
+        self.swap = FakeRaydiumSwap(self.market, faults.get("raydium"))
+        self.api = FakeRaydiumApi(self.market, faults.get("raydium"))
+        self.rpc = FakeRpc(self.market, faults.get("rpc"))
+        self.jito = FakeJito(self.rpc, faults.get("jito"))
+        self.ws = FakeWs(self.rpc)
+        self.servers = [self.swap, self.api, self.rpc, self.jito, self.ws]
+
+    def start(self):
+        for s in self.servers: s.start()
+        return self
+
+    def stop(self):
+        for s in self.servers: s.stop()
+
+    def env(self, jito: bool = True) -> dict:
+        m = self.market
+        e = {
+            "RPC_URL": self.rpc.url, "WS_URL": self.ws.url, "RAY_SWAP_HOST": self.swap.url, "RAY_API_V3": self.api.url,
+            "RAY_TOKENS_V2": f"{self.api.url}/tokens",
+            "GC_MINT": m.mints["GC"], "USDC_MINT": m.mints["USDC"], "USDT_MINT": m.mints["USDT"], "SOL_MINT": m.mints["SOL"],
+        }
+        if jito: e["JITO_URL"] = self.jito.url
+        return e
+
+    def take_stats(self) -> dict:
+        return {s.name: s.stats.take() for s in self.servers}
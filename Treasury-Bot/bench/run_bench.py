@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# Offline benchmark for treasury_bot: starts the local fakes, imports the bot against
+# them and drives run_once through HOLD / SELL / BUY cycles. Reports p50/p99 cycle
+# latency, calls and bytes per endpoint per cycle, and saves a JSON result keyed by
+# commit so runs can be compared.
+#
+#   python bench/run_bench.py --cycles 30 --rpc-latency-ms 40 --ray-latency-ms 120
+#   python bench/run_bench.py --compare bench_results/a.json bench_results/b.json
+import os, sys, json, math, time, logging, argparse, tempfile, subprocess
+from dataclasses import replace
+from decimal import Decimal
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE)); sys.path.insert(0, HERE)
+
+from solders.keypair import Keypair
+from fakes import FakeCluster, Faults
+
+# USD bands around the fake GC price (0.17) that force each decision
+SCENARIOS = {"hold": ("0.10", "0.30"), "sell": ("0.05", "0.10"), "buy": ("0.30", "0.40")}
+
+def pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, max(0, math.ceil(p / 100 * len(xs)) - 1))] if xs else 0.0
+
+def git_rev() -> str:
+    try:
+        rev = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, text=True).strip()
+        dirty = subprocess.call(["git", "diff", "--quiet", "HEAD"], cwd=HERE) != 0
+        return rev + ("-dirty" if dirty else "")
+    except Exception:
+        return "unknown"
+
+def per_cycle(stats: list[dict]) -> dict:
+    """Average {host: {calls/errors/bytes: {endpoint: n}}} over cycles."""
+    out = {}
+    for s in stats:
+        for host, kinds in s.items():
+            for kind, eps in kinds.items():
+                for ep, n in eps.items():
+                    out.setdefault(kind, {}).setdefault(f"{host}/{ep}", 0)
+                    out[kind][f"{host}/{ep}"] += n / len(stats)
+    return {k: {ep: round(v, 2) for ep, v in sorted(d.items())} for k, d in out.items()}
+
+def reset_caches(tb):
+    # a production cycle runs hours after the previous one: nothing short-lived is still warm
+    tb.APP.quotes.clear()
+    for m in tb.APP.markets: m.balances.invalidate()
+    tb.APP.pools._cache.clear()
+
+def run(a) -> dict:
+    owner = Keypair()
+    faults = {
+        "raydium": Faults(a.ray_latency_ms, a.jitter_ms, a.fail_rate),
+        "rpc":     Faults(a.rpc_latency_ms, a.jitter_ms, a.fail_rate),
+        "jito":    Faults(a.jito_latency_ms, a.jitter_ms, a.fail_rate),
+    }
+    cluster = FakeCluster(owner, faults).start()
+    tmp = tempfile.mkdtemp(prefix="treasury-bench-")
+    os.environ.update(cluster.env(jito=not a.no_jito))
+    os.environ.update({
+        "WALLET_SECRET": str(owner), "METRICS_PORT": "0",
+        "TOKEN_META_PATH": os.path.join(tmp, "token_meta.json"), "STATE_DB": os.path.join(tmp, "state.sqlite"),
+        "TWAP_SNAPSHOT_DIR": os.path.join(tmp, "rings"), "SERIES_DIR": os.path.join(tmp, "series"),
+        "TWAP_SAMPLES": str(a.twap_samples), "TWAP_PAUSE_SEC": str(a.twap_pause_sec),
+        "DAILY_MAX_BPS": "10000", "RAY_RATE_PER_SEC": str(a.ray_rate),
+    })
+    os.environ.pop("TELEGRAM_BOT_TOKEN", None)
+
+    t0 = time.perf_counter()
+    import treasury_bot as tb
+    tb.setup_logging()
+    startup_ms = (time.perf_counter() - t0) * 1000
+    startup = per_cycle([cluster.take_stats()])
+    if not a.verbose:
+        logging.getLogger("treasury_bot").setLevel(logging.WARNING)
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    results = {}
+    for name in a.scenarios:
+        lo, hi = SCENARIOS[name]
+        m = tb.APP.markets[0]
+        m.p = replace(m.p, band_usd_lower=Decimal(lo), band_usd_upper=Decimal(hi))
+        lat, stats, statuses, failures = [], [], {}, 0
+        for _ in range(a.cycles):
+            if not a.warm: reset_caches(tb)
+            cluster.take_stats()
+            t = time.perf_counter()
+            try:
+                res = tb.run_once()
+                statuses[res.get("status")] = statuses.get(res.get("status"), 0) + 1
+            except Exception as e:
+                failures += 1
+                statuses[f"error:{type(e).__name__}"] = statuses.get(f"error:{type(e).__name__}", 0) + 1
+            lat.append((time.perf_counter() - t) * 1000)
+            stats.append(cluster.take_stats())
+        pc = per_cycle(stats)
+        results[name] = {
+            "cycles": a.cycles, "failures": failures, "statuses": statuses,
+            "p50_ms": round(pct(lat, 50), 2), "p99_ms": round(pct(lat, 99), 2),
+            "mean_ms": round(sum(lat) / len(lat), 2),
+            "calls_per_cycle": pc.get("calls", {}), "errors_per_cycle": pc.get("errors", {}),
+            "bytes_per_cycle": round(sum(pc.get("bytes", {}).values())),
+        }
+    cluster.stop()
+    return {
+        "rev": git_rev(), "at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {k: v for k, v in vars(a).items() if k not in ("compare", "out_dir")},
+        "startup": {"import_ms": round(startup_ms, 2), "calls": startup.get("calls", {}),
+                    "bytes": round(sum(startup.get("bytes", {}).values()))},
+        "scenarios": results,
+    }
+
+def compare(old_path: str, new_path: str):
+    old, new = (json.load(open(p)) for p in (old_path, new_path))
+    print(f"{old['rev']} → {new['rev']}")
+    print(f"  startup import_ms {old['startup']['import_ms']} → {new['startup']['import_ms']}")
+    for name in sorted(set(old["scenarios"]) | set(new["scenarios"])):
+        o, n = old["scenarios"].get(name), new["scenarios"].get(name)
+        if not (o and n): print(f"  {name}: only in {'new' if n else 'old'}"); continue
+        for k in ("p50_ms", "p99_ms", "bytes_per_cycle"):
+            d = n[k] - o[k]
+            print(f"  {name:5} {k:16} {o[k]:>12} → {n[k]:>12}  ({'+' if d >= 0 else ''}{round(d, 2)})")
+        oc, nc = sum(o["calls_per_cycle"].values()), sum(n["calls_per_cycle"].values())
+        print(f"  {name:5} {'calls_per_cycle':16} {round(oc, 2):>12} → {round(nc, 2):>12}")
+        for ep in sorted(set(o["calls_per_cycle"]) | set(n["calls_per_cycle"])):
+            a, b = o["calls_per_cycle"].get(ep, 0), n["calls_per_cycle"].get(ep, 0)
+            if a != b: print(f"        {ep:48} {a:>6} → {b:>6}")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark treasury_bot against local fakes")
+    ap.add_argument("--cycles", type=int, default=20)
+    ap.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    ap.add_argument("--ray-latency-ms", type=float, default=0.0)
+    ap.add_argument("--rpc-latency-ms", type=float, default=0.0)
+    ap.add_argument("--jito-latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--twap-samples", type=int, default=7)
+    ap.add_argument("--twap-pause-sec", type=float, default=0.0)
+    ap.add_argument("--ray-rate", type=float, default=0.0, help="Raydium rate limit (req/s); 0 = unthrottled")
+    ap.add_argument("--no-jito", action="store_true", help="submit via RPC instead of Jito")
+    ap.add_argument("--warm", action="store_true", help="keep short-lived caches warm between cycles")
+    ap.add_argument("--verbose", action="store_true", help="keep the bot's INFO logs")
+    ap.add_argument("--out-dir", default=os.path.join(os.path.dirname(HERE), "bench_results"))
+    ap.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    a = ap.parse_args(argv)
+    if a.compare:
+        return compare(*a.compare)
+
+    res = run(a)
+    os.makedirs(a.out_dir, exist_ok=True)
+    path = os.path.join(a.out_dir, f"{res['rev']}-{res['at'].replace(':', '')}.json")
+    with open(path, "w") as f:
+        json.dump(res, f, indent=2)
+    for name, r in res["scenarios"].items():
+        print(json.dumps({"scenario": name, "p50_ms": r["p50_ms"], "p99_ms": r["p99_ms"], "failures": r["failures"],
+                          "calls": round(sum(r["calls_per_cycle"].values()), 2), "bytes": r["bytes_per_cycle"]}))
+    print(json.dumps({"saved": path, "startup_import_ms": res["startup"]["import_ms"]}))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# Event-mode check against the local fakes (incl. the websocket stand-in): other traders
+# random-walk the GC/SOL pool, the bot's account stream reprices locally and the trigger
+# decides when run_once runs. Reports stream updates, cycles by trigger reason, and the
+# delay from the first out-of-band trade to the cycle that handled it.
+#
+#   python bench/run_events.py --trades 300 --trade-gap-ms 20 --debounce-sec 0.2
+import os, sys, json, time, random, logging, argparse, tempfile, threading
+from dataclasses import replace
+from decimal import Decimal
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE)); sys.path.insert(0, HERE)
+
+from solders.keypair import Keypair
+from fakes import FakeCluster
+from run_bench import pct
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Exercise treasury_bot event mode against local fakes")
+    ap.add_argument("--trades", type=int, default=300)
+    ap.add_argument("--trade-gap-ms", type=float, default=20)
+    ap.add_argument("--trade-usd", type=float, default=400, help="size of each outside trade")
+    ap.add_argument("--band", default="0.15,0.19", help="USD band around the fake 0.17 GC price")
+    ap.add_argument("--move-bps", type=float, default=50)
+    ap.add_argument("--debounce-sec", type=float, default=0.2)
+    ap.add_argument("--safety-sec", type=float, default=30)
+    ap.add_argument("--drop-every", type=int, default=0, help="drop websocket connections every N trades")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--verbose", action="store_true")
+    a = ap.parse_args(argv)
+    random.seed(a.seed)
+
+    owner = Keypair()
+    cluster = FakeCluster(owner).start()
+    tmp = tempfile.mkdtemp(prefix="treasury-events-")
+    os.environ.update(cluster.env())
+    os.environ.update({
+        "WALLET_SECRET": str(owner), "METRICS_PORT": "0", "STATE_DB": os.path.join(tmp, "state.sqlite"),
+        "TOKEN_META_PATH": os.path.join(tmp, "token_meta.json"), "TWAP_SNAPSHOT_DIR": os.path.join(tmp, "rings"),
+        "SERIES_DIR": os.path.join(tmp, "series"),
+        "TWAP_SAMPLES": "2", "TWAP_PAUSE_SEC": "0", "CONFIRM_POLL_SEC": "0.05", "DAILY_MAX_BPS": "10000",
+        "MAX_SPOT_VS_TWAP_BPS": "100000",
+        "EVENT_MOVE_BPS": str(a.move_bps), "EVENT_DEBOUNCE_SEC": str(a.debounce_sec), "SAFETY_POLL_SEC": str(a.safety_sec),
+    })
+    os.environ.pop("TELEGRAM_BOT_TOKEN", None)
+    import treasury_bot as tb
+    tb.setup_logging()
+    if not a.verbose:
+        logging.getLogger("treasury_bot").setLevel(logging.WARNING)
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+        logging.getLogger("websockets").setLevel(logging.WARNING)
+    lo, hi = (Decimal(x) for x in a.band.split(","))
+    tb.APP.markets[0].p = replace(tb.APP.markets[0].p, band_usd_lower=lo, band_usd_upper=hi)
+
+    m = cluster.market
+    def gc_usd():
+        p = m.pools[frozenset(("SOL", "GC"))]
+        return p["SOL"] / p["GC"] * m.usd["SOL"]
+
+    cycles, lock = [], threading.Lock()
+    breach = {"at": None}
+    real_run_once = tb.run_once
+    def run_once():
+        with lock:
+            cycles.append({"at": time.monotonic(), "breach_at": breach["at"], "px": gc_usd()})
+            breach["at"] = None
+        return real_run_once()
+    tb.run_once = run_once
+
+    stop = threading.Event()
+    t = threading.Thread(target=tb.serve, args=(stop, True), name="events", daemon=True)
+    t.start()
+    time.sleep(1.0)                # connect + initial resync
+    cluster.take_stats()
+    start_cycles = len(cycles)
+
+    for i in range(a.trades):
+        gc_units = a.trade_usd / gc_usd()
+        if random.random() < 0.55: m.swap("SOL", "GC", a.trade_usd / m.usd["SOL"])   # buy GC: price up
+        else:                      m.swap("GC", "SOL", gc_units)
+        px = gc_usd()
+        with lock:
+            if breach["at"] is None and not (float(lo) <= px <= float(hi)): breach["at"] = time.monotonic()
+        if a.drop_every and i and i % a.drop_every == 0: cluster.ws.drop_all()
+        time.sleep(a.trade_gap_ms / 1000)
+    time.sleep(a.debounce_sec * 3 + 1)
+    stop.set(); t.join(timeout=10)
+    stats = cluster.take_stats()
+    cluster.stop()
+
+    ran = cycles[start_cycles:]
+    delays = [(c["at"] - c["breach_at"]) * 1000 for c in ran if c["breach_at"]]
+    print(json.dumps({
+        "trades": a.trades, "final_gc_usd": round(gc_usd(), 5),
+        "ws_notifications": stats["ws"]["calls"].get("ws:accountNotification", 0),
+        "cycles": len(ran), "cycles_on_breach": len(delays),
+        "breach_to_cycle_ms": {"p50": round(pct(delays, 50), 1), "p99": round(pct(delays, 99), 1)},
+        "raydium_quotes": stats["raydium-swap"]["calls"].get("compute/swap-base-in", 0),
+    }))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# Event-driven triggering. Instead of polling run_once on a fixed interval:
+#  - AccountStream: Solana websocket accountSubscribe on a set of accounts (pool vaults /
+#    pool state, treasury token accounts), reconnecting with backoff and re-syncing on connect
+#  - PoolPrice: price of a pool recomputed locally from those account updates
+#  - Trigger: fires when price leaves the band or moves by N bps, debounced, with a periodic
+#    safety poll so a silent stream can never stall the bot
+import json, time, base64, random, logging, threading
+from typing import Callable, Optional
+
+from websockets.sync.client import connect
+
+from balances import decode_token_account
+from pool_math import PoolState, clmm_price
+
+LOG = logging.getLogger("treasury_bot")
+
+# ────────────────────────────────────────────────────────────────────────────
+# Websocket account stream
+# ────────────────────────────────────────────────────────────────────────────
+class AccountStream:
+    """accountSubscribe on every account; on_update(account, data, slot) runs on the stream thread."""
+
+    def __init__(self, ws_url: str, accounts: list[str], on_update: Callable[[str, bytes, int], None],
+                 on_connect: Callable[[], None] = lambda: None, commitment: str = "confirmed",
+                 backoff_max_sec: float = 30.0, ping_sec: float = 20.0):
+        self.ws_url = ws_url
+        self.accounts = list(accounts)
+        self.on_update = on_update
+        self.on_connect = on_connect
+        self.commitment = commitment
+        self.backoff_max_sec = backoff_max_sec
+        self.ping_sec = ping_sec
+        self.connected = threading.Event()
+        self._stop = threading.Event()
+        self._ws = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _session(self):
+        with connect(self.ws_url, open_timeout=10, ping_interval=self.ping_sec, max_size=2 ** 22) as ws:
+            self._ws = ws
+            for i, acct in enumerate(self.accounts):
+                ws.send(json.dumps({"jsonrpc": "2.0", "id": i, "method": "accountSubscribe",
+                                    "params": [acct, {"encoding": "base64", "commitment": self.commitment}]}))
+            subs: dict[int, str] = {}
+            while len(subs) < len(self.accounts):
+                msg = json.loads(ws.recv(timeout=10))
+                if "id" in msg:
+                    if "error" in msg: raise RuntimeError(f"accountSubscribe {self.accounts[msg['id']]}: {msg['error']}")
+                    subs[msg["result"]] = self.accounts[msg["id"]]
+            self.connected.set()
+            LOG.info(json.dumps({"info": "account_stream_connected", "accounts": len(subs)}))
+            self.on_connect()   # updates may have been missed while disconnected: re-sync from a snapshot
+            while not self._stop.is_set():
+                msg = json.loads(ws.recv())
+                if msg.get("method") != "accountNotification": continue
+                p = msg["params"]
+                acct = subs.get(p["subscription"])
+                val = p["result"]["value"]
+                if acct is None or val is None: continue
+                try:
+                    self.on_update(acct, base64.b64decode(val["data"][0]), p["result"]["context"]["slot"])
+                except Exception as e:
+                    LOG.warning(json.dumps({"warn": "account_update_failed", "account": acct, "error": str(e)}))
+
+    def _run(self):
+        attempt = 0
+        while not self._stop.is_set():
+            t0 = time.monotonic()
+            try:
+                self._session()
+            except Exception as e:
+                if self._stop.is_set(): break
+                LOG.warning(json.dumps({"warn": "account_stream_down", "error": str(e)[:300]}))
+            self.connected.clear(); self._ws = None
+            attempt = 0 if time.monotonic() - t0 > 60 else attempt + 1   # a long session resets the backoff
+            self._stop.wait(random.uniform(0, min(self.backoff_max_sec, 0.5 * 2 ** attempt)))
+
+    def start(self):
+        if self._thread and self._thread.is_alive(): return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="account-stream", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        ws = self._ws
+        if ws is not None:
+            try: ws.close()
+            except Exception: pass
+        if self._thread: self._thread.join(timeout=5)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+# ────────────────────────────────────────────────────────────────────────────
+# Local pool price from account data
+# ────────────────────────────────────────────────────────────────────────────
+class PoolPrice:
+    """Standard pools: vault balances → reserves → price. Concentrated: sqrt price from the pool account."""
+
+    def __init__(self, pool: PoolState, keys: dict):
+        self.pool = pool
+        if pool.kind == "Concentrated":
+            self.watch = {pool.id: "pool"}
+        else:
+            v = keys["vault"]
+            self.watch = {v["A"]: "a", v["B"]: "b"}
+        self.reserve_a = pool.reserve_a
+        self.reserve_b = pool.reserve_b
+        self.price_ba = pool.price or (pool.reserve_b / pool.reserve_a if pool.reserve_a else 0.0)
+        self.slot = 0
+
+    def apply(self, account: str, data: bytes, slot: int = 0) -> bool:
+        """Fold one account update in; True if the price changed."""
+        which = self.watch.get(account)
+        if which is None or slot < self.slot: return False
+        p = self.pool
+        if which == "pool":
+            price = clmm_price(data, p.dec_a, p.dec_b)
+        else:
+            _, _, amount = decode_token_account(data)
+            if which == "a": self.reserve_a = amount / 10 ** p.dec_a
+            else:            self.reserve_b = amount / 10 ** p.dec_b
+            price = self.reserve_b / self.reserve_a if self.reserve_a > 0 else 0.0
+        self.slot = max(self.slot, slot)
+        changed, self.price_ba = price != self.price_ba, price
+        return changed
+
+    def price_of(self, mint: str) -> float:
+        """Units of the other mint per one `mint`."""
+        if mint == self.pool.mint_a: return self.price_ba
+        return 1 / self.price_ba if self.price_ba else 0.0
+
+# ────────────────────────────────────────────────────────────────────────────
+# Trigger
+# ────────────────────────────────────────────────────────────────────────────
+class Trigger:
+    """update(price) from any thread; wait() blocks until a cycle should run and returns why.
+
+    Fires when price leaves [lower, upper] (entering a different outside zone) or moves
+    move_bps from the price at the last run. A trigger runs debounce_sec after the first
+    event (bursts collapse into one run) and never sooner than debounce_sec after the
+    previous run. With no events, a safety poll runs every safety_sec.
+    """
+
+    def __init__(self, band: Callable[[], tuple[float, float]], move_bps: float = 50,
+                 debounce_sec: float = 2.0, safety_sec: float = 900.0):
+        self.band = band
+        self.move_bps = move_bps
+        self.debounce_sec = debounce_sec
+        self.safety_sec = safety_sec
+        self._cv = threading.Condition()
+        self.price: Optional[float] = None
+        self._anchor: Optional[float] = None     # price at the last run
+        self._zone: Optional[str] = None
+        self._pending: Optional[str] = None
+        self._pending_at = 0.0
+        self._last_run = time.monotonic()
+        self.updates = 0
+
+    def _zone_of(self, price: float) -> str:
+        lo, hi = self.band()
+        return "below" if price < lo else "above" if price > hi else "inside"
+
+    def update(self, price: float):
+        if price <= 0: return
+        with self._cv:
+            self.price = price
+            self.updates += 1
+            zone = self._zone_of(price)
+            why = None
+            if zone != self._zone:
+                if zone != "inside": why = f"band_{zone}"
+                self._zone = zone
+            elif self._anchor and abs(price - self._anchor) / self._anchor * 10_000 >= self.move_bps:
+                why = "move"
+            if self._anchor is None: self._anchor = price
+            if why and not self._pending:
+                self._pending, self._pending_at = why, time.monotonic()
+                self._cv.notify_all()
+
+    def poke(self, why: str = "manual"):
+        with self._cv:
+            if not self._pending:
+                self._pending, self._pending_at = why, time.monotonic()
+            self._cv.notify_all()
+
+    def wait(self, stop: Optional[threading.Event] = None) -> Optional[str]:
+        with self._cv:
+            while not (stop and stop.is_set()):
+                now = time.monotonic()
+                if self._pending:
+                    fire_at = max(self._pending_at, self._last_run) + self.debounce_sec
+                    if now >= fire_at:
+                        why, self._pending = self._pending, None
+                        break
+                    self._cv.wait(fire_at - now)
+                else:
+                    if now >= self._last_run + self.safety_sec:
+                        why = "safety"
+                        break
+                    self._cv.wait(min(1.0, self._last_run + self.safety_sec - now))
+            else:
+                return None
+            self._last_run = time.monotonic()
+            self._anchor = self.price
+            return why
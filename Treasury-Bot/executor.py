@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# Pipelined transaction execution: every tx of a swap is signed up front, broadcast on all
+# configured channels at once (RPC + Jito), then tracked with one batched JSON-RPC round
+# trip per poll (getSignatureStatuses + isBlockhashValid). Unlanded txs are re-broadcast
+# until their blockhash expires, so "landed" is an observed fact rather than an assumption.
+# Multi-tx swaps go to Jito as a single bundle (atomic: all land or none do).
+import json, time, base64, logging, contextvars
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional
+
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.message import MessageV0
+from solders.pubkey import Pubkey
+from solders.system_program import TransferParams, transfer
+from solders.transaction import VersionedTransaction
+
+LOG = logging.getLogger("treasury_bot")
+
+LANDED = ("confirmed", "finalized")
+MAX_BUNDLE_TXS = 5          # Jito bundle limit (tip tx included)
+MAX_STATUS_SIGS = 256       # getSignatureStatuses limit
+
+class SubmitError(RuntimeError):
+    pass
+
+@dataclass
+class Submission:
+    txs: list                                   # signed VersionedTransactions, in swap order
+    wire: list[str]                             # base64 of the same txs (+ tip tx when bundled)
+    sigs: list[str]
+    blockhash: str
+    bundled: bool
+    accepted: set = field(default_factory=set)  # sigs at least one channel took
+    submitted_at: float = 0.0                   # time.monotonic()
+    broadcasts: int = 0
+
+@dataclass
+class ExecResult:
+    sigs: list[str]
+    status: str                                 # confirmed | partial | failed | expired | timeout
+    landed: list[str] = field(default_factory=list)
+    errors: dict = field(default_factory=dict)  # sig → on-chain err
+    slot: int = 0
+    submitted_at: float = 0.0
+    confirmed_at: Optional[float] = None
+    broadcasts: int = 0
+
+class TxExecutor:
+    def __init__(self, http, rpc_url: str, owner: Keypair, pool: ThreadPoolExecutor,
+                 jito_url: Optional[str] = None, jito_auth: Optional[str] = None,
+                 jito_tip_lamports: int = 0, jito_tip_account: Optional[str] = None,
+                 poll_sec: float = 0.4, rebroadcast_sec: float = 2.0, timeout_sec: float = 90.0):
+        self.http = http
+        self.rpc_url = rpc_url
+        self.owner = owner
+        self.pool = pool
+        self.jito_url = jito_url
+        self.jito_hdrs = {"Content-Type": "application/json", **({"x-jito-auth": jito_auth} if jito_auth else {})}
+        self.tip_lamports = jito_tip_lamports
+        self.tip_account = Pubkey.from_string(jito_tip_account) if jito_tip_account else None
+        self.poll_sec = poll_sec
+        self.rebroadcast_sec = rebroadcast_sec
+        self.timeout_sec = timeout_sec
+
+    # ── JSON-RPC ────────────────────────────────────────────────────────────
+    def _rpc_batch(self, calls: list[tuple[str, list]], endpoint: str) -> list[tuple[object, Optional[dict]]]:
+        """One HTTP round trip for several calls → [(result, error)] in call order."""
+        body = [{"jsonrpc": "2.0", "id": i, "method": m, "params": p} for i, (m, p) in enumerate(calls)]
+        r = self.http.post(self.rpc_url, json=(body if len(body) > 1 else body[0]), endpoint=endpoint)
+        r.raise_for_status()
+        j = r.json()
+        by_id = {x.get("id"): x for x in (j if isinstance(j, list) else [j])}
+        return [(by_id.get(i, {}).get("result"), by_id.get(i, {}).get("error")) for i in range(len(calls))]
+
+    def _jito(self, method: str, params: list):
+        path = "bundles" if method == "sendBundle" else "transactions"
+        r = self.http.post(f"{self.jito_url}/api/v1/{path}", headers=self.jito_hdrs, endpoint="jito_send",
+                           json={"jsonrpc": "2.0", "id": 1, "method": method, "params": params})
+        r.raise_for_status()
+        j = r.json()
+        if j.get("error"): raise SubmitError(f"jito {method}: {j['error']}")
+        return j.get("result")
+
+    # ── Build ───────────────────────────────────────────────────────────────
+    def _tip_tx(self, blockhash: Hash) -> VersionedTransaction:
+        ix = transfer(TransferParams(from_pubkey=self.owner.pubkey(), to_pubkey=self.tip_account, lamports=self.tip_lamports))
+        return VersionedTransaction(MessageV0.try_compile(self.owner.pubkey(), [ix], [], blockhash), [self.owner])
+
+    def prepare(self, signed: list[VersionedTransaction]) -> Submission:
+        if not signed: raise SubmitError("nothing to submit")
+        bh = signed[0].message.recent_blockhash
+        bundled = bool(self.jito_url) and len(signed) > 1
+        wire_txs = list(signed)
+        if bundled:
+            if len(signed) + bool(self.tip_account and self.tip_lamports) > MAX_BUNDLE_TXS:
+                raise SubmitError(f"swap needs {len(signed)} txs; bundle limit is {MAX_BUNDLE_TXS}")
+            if self.tip_account and self.tip_lamports:
+                wire_txs.append(self._tip_tx(bh))  # last, so the tip is only paid if the swap lands
+        return Submission(txs=signed, wire=[base64.b64encode(bytes(t)).decode() for t in wire_txs],
+                          sigs=[str(t.signatures[0]) for t in signed], blockhash=str(bh), bundled=bundled)
+
+    # ── Broadcast ───────────────────────────────────────────────────────────
+    def broadcast(self, sub: Submission, pending: Optional[set] = None):
+        """Send every pending tx on every channel concurrently; records which sigs were accepted."""
+        pending = set(sub.sigs) if pending is None else pending
+        first = sub.broadcasts == 0
+        jobs = []
+        if sub.bundled:
+            jobs.append(("jito_bundle", sub.sigs, lambda: self._jito("sendBundle", [sub.wire, {"encoding": "base64"}])))
+        else:
+            for sig, b64 in zip(sub.sigs, sub.wire):
+                if sig not in pending: continue
+                # preflight until some channel accepted the tx: a dependent tx sent ahead of its
+                # setup tx is rejected by simulation instead of landing as a failed (fee-paying) tx
+                skip = sig in sub.accepted
+                opts = {"encoding": "base64", "skipPreflight": skip, "maxRetries": 0, "preflightCommitment": "processed"}
+                jobs.append(("rpc", [sig], lambda b=b64, o=opts: self._rpc_send(b, o)))
+                if self.jito_url:
+                    jobs.append(("jito", [sig], lambda b=b64: self._jito("sendTransaction", [b, {"encoding": "base64"}])))
+        futs = [(ch, sigs, self.pool.submit(contextvars.copy_context().run, fn)) for ch, sigs, fn in jobs]
+        errors = []
+        for ch, sigs, f in futs:
+            try:
+                f.result()
+                sub.accepted.update(sigs)
+            except Exception as e:
+                errors.append(f"{ch}: {e}")
+                LOG.warning(json.dumps({"warn": "broadcast_failed", "channel": ch, "sigs": sigs, "error": str(e)[:300]}))
+        if first: sub.submitted_at = time.monotonic()
+        sub.broadcasts += 1
+        if first and not sub.accepted:
+            raise SubmitError("; ".join(errors) or "no channel accepted the transactions")
+
+    def _rpc_send(self, b64: str, opts: dict) -> str:
+        ((res, error),) = self._rpc_batch([("sendTransaction", [b64, opts])], endpoint="rpc_send")
+        if error: raise SubmitError(f"rpc sendTransaction: {error.get('message', error)}")
+        return res
+
+    # ── Confirm ─────────────────────────────────────────────────────────────
+    def poll(self, sigs: list[str], blockhash: str) -> tuple[list, bool]:
+        """Statuses for sigs (order kept) and whether the blockhash can still land txs, in one round trip."""
+        calls = [("getSignatureStatuses", [sigs[i:i + MAX_STATUS_SIGS]]) for i in range(0, len(sigs), MAX_STATUS_SIGS)]
+        calls.append(("isBlockhashValid", [blockhash, {"commitment": "processed"}]))
+        out = self._rpc_batch(calls, endpoint="rpc_status")
+        statuses = []
+        for res, error in out[:-1]:
+            if error: raise SubmitError(f"getSignatureStatuses: {error.get('message', error)}")
+            statuses.extend(res["value"])
+        valid, error = out[-1]
+        return statuses, (True if error else bool(valid["value"]))  # unknown → keep trying until timeout
+
+    def statuses(self, sigs: list[str]) -> list:
+        """Statuses for sigs (order kept), searching past the recent status cache: for txs sent by an earlier process."""
+        calls = [("getSignatureStatuses", [sigs[i:i + MAX_STATUS_SIGS], {"searchTransactionHistory": True}])
+                 for i in range(0, len(sigs), MAX_STATUS_SIGS)]
+        out = []
+        for res, error in self._rpc_batch(calls, endpoint="rpc_status"):
+            if error: raise SubmitError(f"getSignatureStatuses: {error.get('message', error)}")
+            out.extend(res["value"])
+        return out
+
+    def confirm(self, sub: Submission) -> ExecResult:
+        res = ExecResult(sigs=sub.sigs, status="timeout", submitted_at=sub.submitted_at)
+        pending = set(sub.sigs)
+        last_sent = time.monotonic()
+        expired = False
+        while pending:
+            time.sleep(self.poll_sec)
+            try:
+                statuses, valid = self.poll(sub.sigs, sub.blockhash)
+            except Exception as e:
+                LOG.warning(json.dumps({"warn": "status_poll_failed", "error": str(e)[:300]}))
+                statuses, valid = [None] * len(sub.sigs), True
+            for sig, st in zip(sub.sigs, statuses):
+                if sig not in pending or not st: continue
+                if st.get("err") is not None:
+                    res.errors[sig] = st["err"]; pending.discard(sig)
+                elif st.get("confirmationStatus") in LANDED:
+                    res.landed.append(sig); res.slot = max(res.slot, st.get("slot") or 0); pending.discard(sig)
+            if res.errors or not pending:
+                break
+            if expired:
+                break                       # one last status read after expiry has been taken
+            expired = not valid
+            now = time.monotonic()
+            if now - sub.submitted_at > self.timeout_sec:
+                break
+            if not expired and now - last_sent >= self.rebroadcast_sec:
+                self.broadcast(sub, pending); last_sent = now
+        if res.landed: res.confirmed_at = time.monotonic()
+        res.broadcasts = sub.broadcasts
+        if res.landed and len(res.landed) == len(sub.sigs): res.status = "confirmed"
+        elif res.landed: res.status = "partial"
+        elif res.errors: res.status = "failed"
+        elif expired: res.status = "expired"
+        return res
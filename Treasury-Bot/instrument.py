@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# Timing / tracing layer for treasury_bot.
+#  - stage():  decorator *and* context manager → stage_seconds{stage} histogram
+#  - http_observer(): plugs into HttpTransport → per host/endpoint latency, calls, errors, retries
+#  - InstrumentedClient: wraps solana Client so every RPC method is timed the same way
+#  - TRACE_ID: per-cycle id, stamped onto every JSON log line of the "treasury_bot" logger
+#    (MARKET_NAME likewise, when more than one market shares the process)
+import json, time, logging, contextvars, uuid
+from contextlib import ContextDecorator, contextmanager
+from urllib.parse import urlsplit
+
+from prometheus_client import Counter, Histogram
+
+TRACE_ID = contextvars.ContextVar("trace_id", default=None)
+MARKET_NAME = contextvars.ContextVar("market_name", default=None)
+
+_LAT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+H_STAGE      = Histogram("stage_seconds", "Wall time per bot stage", ["stage"], buckets=_LAT_BUCKETS)
+H_HTTP       = Histogram("outbound_request_seconds", "Outbound call latency per attempt", ["host", "endpoint"], buckets=_LAT_BUCKETS)
+C_CALLS      = Counter("outbound_calls", "Outbound call attempts", ["host", "endpoint"])
+C_ERRORS     = Counter("outbound_errors", "Failed outbound call attempts", ["host", "endpoint", "kind"])
+C_RETRIES    = Counter("outbound_retries", "Retried outbound calls", ["host", "endpoint"])
+H_THROTTLE   = Histogram("outbound_throttle_seconds", "Time spent waiting on a shared rate limit", ["host", "endpoint"],
+                         buckets=_LAT_BUCKETS)
+H_QUOTE_LAND = Histogram("quote_to_landing_seconds", "Quote fetched → tx submitted / confirmed", ["side", "phase"],
+                         buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120))
+
+@contextmanager
+def new_trace():
+    """A fresh trace id for the block; the previous one is restored on exit, so a reused pool
+    thread never stamps a finished cycle's id on its next job."""
+    t = uuid.uuid4().hex[:12]
+    tok = TRACE_ID.set(t)
+    try:
+        yield t
+    finally:
+        TRACE_ID.reset(tok)
+
+def _stamp(msg: str, key: str, value: str) -> str:
+    if f'"{key}"' in msg: return msg
+    return f'{msg[:-1]}, "{key}": {json.dumps(value)}}}' if msg != "{}" else json.dumps({key: value})
+
+class TraceFilter(logging.Filter):
+    """Adds "trace" (and "market") to JSON log payloads emitted while they are set."""
+    def filter(self, record):
+        t, m = TRACE_ID.get(), MARKET_NAME.get()
+        msg = record.msg
+        if (t or m) and isinstance(msg, str) and msg.startswith("{") and msg.endswith("}"):
+            if m: msg = _stamp(msg, "market", m)
+            if t: msg = _stamp(msg, "trace", t)
+            record.msg = msg
+        return True
+
+class stage(ContextDecorator):
+    """@stage("build") on a function, or `with stage("governor"):` around a block."""
+    def __init__(self, name: str):
+        self.name = name
+        self._h = H_STAGE.labels(name)
+        self._t0 = 0.0
+
+    def _recreate_cm(self):
+        return stage(self.name)   # fresh timer per decorated call (threads, recursion)
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._h.observe(time.perf_counter() - self._t0)
+        return False
+
+def http_observer(event: str, host: str, endpoint: str, seconds: float = 0.0, outcome: str = "ok"):
+    if event == "attempt":
+        C_CALLS.labels(host, endpoint).inc()
+        H_HTTP.labels(host, endpoint).observe(seconds)
+        if outcome != "ok": C_ERRORS.labels(host, endpoint, outcome).inc()
+    elif event == "retry":
+        C_RETRIES.labels(host, endpoint).inc()
+    elif event == "rejected":   # circuit open: no attempt made
+        C_ERRORS.labels(host, endpoint, outcome).inc()
+    elif event == "throttled":
+        H_THROTTLE.labels(host, endpoint).observe(seconds)
+
+class InstrumentedClient:
+    """Transparent proxy over solana.rpc.api.Client timing each public method as one RPC attempt."""
+
+    def __init__(self, inner, url: str):
+        self._inner = inner
+        self._host = urlsplit(url).netloc or url
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+        host = self._host
+        def call(*a, **kw):
+            t0 = time.perf_counter()
+            outcome = "ok"
+            try:
+                return attr(*a, **kw)
+            except Exception as e:
+                outcome = type(e).__name__
+                raise
+            finally:
+                http_observer("attempt", host, name, time.perf_counter() - t0, outcome)
+        return call
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# Multi-market configuration and scheduling.
+#  - Profile: one (mint, quote stables, wallet, band, governor) set; loaded from a JSON file
+#    (MARKETS_CONFIG) with every field not given there falling back to the env defaults
+#  - Scheduler: runs each market's cycle on its own cadence from one worker pool; a market
+#    never overlaps itself, and poke() makes one due now (event triggers)
+#
+#   {"markets": [
+#      {"name": "gc",  "gc_mint": "...", "wallet_env": "WALLET_SECRET_GC"},
+#      {"name": "gc2", "gc_mint": "...", "wallet_env": "WALLET_SECRET_GC2", "band_usd_lower": "0.9",
+#       "band_usd_upper": "1.1", "check_interval_sec": 600, "preferred_stable": "USDT"}]}
+import os, json, time, heapq, logging, threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from decimal import Decimal
+from typing import Callable, Optional
+
+LOG = logging.getLogger("treasury_bot")
+
+# ────────────────────────────────────────────────────────────────────────────
+# Profiles
+# ────────────────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class Profile:
+    name: str
+    gc_mint: str
+    usdc_mint: str
+    usdt_mint: str
+    wallet_env: str                   # env var holding this market's wallet secret (never the secret itself)
+    band_usd_lower: Decimal
+    band_usd_upper: Decimal
+    cap_bps: int
+    daily_max_bps: int
+    treasury_gc_min: Decimal
+    vault_stable_min: Decimal
+    preferred_stable: str
+    check_interval_sec: float
+    slippage_bps: int
+    max_price_impact_bps: int
+    max_spot_vs_twap_bps: int
+    state_db: str
+    snapshot_dir: str
+    series_dir: str                   # time-series store (timeseries.SeriesStore) root
+
+_TYPES = {f.name: f.type for f in fields(Profile)}
+_CAST = {Decimal: lambda v: Decimal(str(v)), int: int, float: float, str: str}
+
+def _profile(raw: dict) -> Profile:
+    unknown = set(raw) - set(_TYPES)
+    if unknown: raise ValueError(f"market {raw.get('name')!r}: unknown keys {sorted(unknown)}")
+    kw = {k: _CAST[_TYPES[k]](v) for k, v in raw.items() if v is not None}
+    kw["preferred_stable"] = kw["preferred_stable"].upper()
+    if kw["band_usd_lower"] >= kw["band_usd_upper"]:
+        raise ValueError(f"market {kw['name']!r}: band_usd_lower must be below band_usd_upper")
+    return Profile(**kw)
+
+def _per_market_path(path: str, name: str) -> str:
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{name}{ext}"
+
+def load_profiles(path: Optional[str], defaults: dict) -> list[Profile]:
+    """[Profile] from the JSON config at path (or just the env defaults when path is unset).
+
+    With more than one market, state_db / snapshot_dir / series_dir not set explicitly get a per-market
+    name so governors and price rings are never shared; a single market keeps the defaults.
+    """
+    if not path:
+        return [_profile(dict(defaults))]
+    with open(path) as f:
+        cfg = json.load(f)
+    entries = cfg["markets"] if isinstance(cfg, dict) else cfg
+    if not entries: raise ValueError(f"{path}: no markets configured")
+    multi = len(entries) > 1
+    out = []
+    for e in entries:
+        if "name" not in e: raise ValueError(f"{path}: every market needs a name")
+        d = dict(defaults)
+        if multi:
+            d["state_db"] = _per_market_path(defaults["state_db"], e["name"])
+            d["snapshot_dir"] = os.path.join(defaults["snapshot_dir"], e["name"])
+            d["series_dir"] = os.path.join(defaults["series_dir"], e["name"])
+        out.append(_profile({**d, **e}))
+    for attr in ("name", "state_db", "snapshot_dir", "series_dir"):
+        seen = [getattr(p, attr) for p in out]
+        dup = {x for x in seen if seen.count(x) > 1}
+        if dup: raise ValueError(f"{path}: duplicate {attr} {sorted(dup)}")
+    return out
+
+# ────────────────────────────────────────────────────────────────────────────
+# Scheduler
+# ────────────────────────────────────────────────────────────────────────────
+@dataclass
+class _Job:
+    name: str
+    fn: Callable[[str], None]         # fn(reason); reason ∈ schedule | <poke reason>
+    interval_sec: float
+    next_at: float
+    why: str = "schedule"
+    running: bool = False
+    poked: Optional[str] = None       # poke that arrived while running: run again right after
+
+class Scheduler:
+    """Per-job cadence (next run = last start + interval) over a shared pool of `workers` threads."""
+
+    def __init__(self, workers: int):
+        self._cv = threading.Condition()
+        self._jobs: dict[str, _Job] = {}
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="market")
+
+    def add(self, name: str, fn: Callable[[str], None], interval_sec: float, first_in: float = 0.0):
+        with self._cv:
+            self._jobs[name] = _Job(name, fn, interval_sec, time.monotonic() + first_in)
+            self._cv.notify_all()
+
+    def poke(self, name: str, why: str = "poke"):
+        with self._cv:
+            j = self._jobs[name]
+            if j.running:
+                j.poked = j.poked or why
+            else:
+                j.next_at, j.why = time.monotonic(), why
+            self._cv.notify_all()
+
+    def _done(self, j: _Job, started: float):
+        with self._cv:
+            j.running = False
+            if j.poked:
+                j.next_at, j.why, j.poked = time.monotonic(), j.poked, None
+            else:
+                j.next_at, j.why = max(time.monotonic(), started + j.interval_sec), "schedule"
+            self._cv.notify_all()
+
+    def _call(self, j: _Job, why: str, started: float):
+        try:
+            j.fn(why)
+        except Exception as e:   # fn is expected to handle its own errors; never let one kill the job
+            LOG.error(json.dumps({"err": "scheduled_job_failed", "market": j.name, "error": str(e)}))
+        finally:
+            self._done(j, started)
+
+    def run(self, stop: threading.Event):
+        """Dispatch until stop is set, then wait for running jobs to finish."""
+        try:
+            while not stop.is_set():
+                with self._cv:
+                    now = time.monotonic()
+                    idle = [(j.next_at, j.name) for j in self._jobs.values() if not j.running]
+                    due = [self._jobs[n] for at, n in idle if at <= now]
+                    for j in due:
+                        j.running = True
+                        self._pool.submit(self._call, j, j.why, now)
+                    if not due:
+                        nxt = heapq.nsmallest(1, idle)
+                        self._cv.wait(min(1.0, nxt[0][0] - now) if nxt else 1.0)
+        finally:
+            stop.set()   # also tells running jobs (e.g. a parent order between children) to wind down
+            self._pool.shutdown(wait=True)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# Background notifications (Telegram). notify() only appends to a bounded in-memory queue;
+# one worker thread sends. Messages arriving within batch_sec of each other go out as one
+# digest, sends are paced and back off on rate limits (HTTP 429 retry_after) and errors, and
+# when the queue is full the oldest messages are dropped and summarized in the next digest.
+# stop() flushes what is queued, bounded by a timeout.
+import json, time, logging, threading
+from collections import deque
+from typing import Callable, Optional
+
+LOG = logging.getLogger("treasury_bot")
+
+class RateLimited(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"rate limited, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class Notifier:
+    """notify(text) never blocks on the network. send(text) raises RateLimited or any error on failure."""
+
+    def __init__(self, send: Callable[[str], None], max_queue: int = 100, batch_sec: float = 2.0,
+                 min_interval_sec: float = 1.0, max_chars: int = 4000, max_retries: int = 3,
+                 backoff_max_sec: float = 30.0, on_event: Callable[[str], None] = lambda kind: None):
+        self.send = send
+        self.max_queue = max(1, max_queue)
+        self.batch_sec = batch_sec
+        self.min_interval_sec = min_interval_sec  # Telegram allows about one message per second per chat
+        self.max_chars = max_chars                # Telegram rejects texts over 4096 chars
+        self.max_retries = max_retries
+        self.backoff_max_sec = backoff_max_sec
+        self.on_event = on_event                  # queued | sent | dropped | rate_limited | retry | failed
+        self._cv = threading.Condition()
+        self._q: deque[tuple[float, str]] = deque()
+        self._dropped = 0
+        self._stopping = False
+        self._abort = threading.Event()           # flush deadline passed: give up on whatever is left
+        self._last_send = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    def notify(self, text: str) -> bool:
+        """Queue text; False if it pushed an older message out (the digest says how many)."""
+        with self._cv:
+            full = len(self._q) >= self.max_queue
+            if full:
+                self._q.popleft(); self._dropped += 1
+                self.on_event("dropped")
+            self._q.append((time.monotonic(), text))
+            self.on_event("queued")
+            self._cv.notify_all()
+            return not full
+
+    def _take(self) -> tuple[str, int]:
+        """Oldest messages that fit in one Telegram text, joined; (digest, count). Caller holds _cv."""
+        parts, size, n = [], 0, 0
+        if self._dropped:
+            parts.append(f"… {self._dropped} older notification(s) dropped"); size = len(parts[0])
+            self._dropped = 0
+        while self._q:
+            text = self._q[0][1]
+            if len(text) > self.max_chars: text = text[:self.max_chars - 1] + "…"
+            if n and size + 2 + len(text) > self.max_chars: break
+            self._q.popleft(); parts.append(text); size += 2 + len(text); n += 1
+        return "\n\n".join(parts), n
+
+    def _wait(self, sec: float) -> bool:
+        """Sleep sec; True if the flush deadline passed meanwhile."""
+        return self._abort.wait(sec) if sec > 0 else self._abort.is_set()
+
+    def _deliver(self, text: str, n: int):
+        attempt = 0
+        while True:
+            if self._wait(self._last_send + self.min_interval_sec - time.monotonic()): break
+            try:
+                self.send(text)
+                self._last_send = time.monotonic()
+                for _ in range(n): self.on_event("sent")
+                return
+            except RateLimited as e:
+                self._last_send = time.monotonic()
+                self.on_event("rate_limited")
+                LOG.warning(json.dumps({"warn": "notify_rate_limited", "retry_after": e.retry_after, "queued": len(self._q)}))
+                if self._wait(e.retry_after): break   # Telegram says when; not counted against max_retries
+            except Exception as e:
+                self._last_send = time.monotonic()
+                if attempt >= self.max_retries:
+                    LOG.warning(json.dumps({"warn": "notify_failed", "messages": n, "error": str(e)[:300]}))
+                    break
+                self.on_event("retry")
+                if self._wait(min(self.backoff_max_sec, 2 ** attempt)): break
+                attempt += 1
+        for _ in range(n): self.on_event("failed")
+
+    def _run(self):
+        while True:
+            with self._cv:
+                while not self._q and not self._dropped and not self._stopping:
+                    self._cv.wait()
+                if not self._q and not self._dropped:
+                    return   # stopping and drained
+                # digest window: collect what arrives within batch_sec of the oldest queued message
+                while not self._stopping and len(self._q) < self.max_queue:
+                    left = (self._q[0][0] if self._q else time.monotonic()) + self.batch_sec - time.monotonic()
+                    if left <= 0: break
+                    self._cv.wait(left)
+                text, n = self._take()
+            self._deliver(text, n)
+
+    def start(self):
+        if self._thread and self._thread.is_alive(): return
+        with self._cv:
+            self._stopping = False
+        self._abort.clear()
+        self._thread = threading.Thread(target=self._run, name="notifier", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Send what is queued (no digest wait), giving up after timeout."""
+        with self._cv:
+            self._stopping = True
+            self._cv.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                self._abort.set(); self._thread.join(1.0)
+        left = len(self._q)
+        if left: LOG.warning(json.dumps({"warn": "notify_unsent_at_shutdown", "messages": left}))
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# Local Raydium pool model: fetch reserves / liquidity once from the API v3 pools
+# endpoints, then price any size locally (constant product for Standard/CPMM pools,
+# tick-range walk for Concentrated pools) and solve for the largest size under an
+# impact limit — instead of paying two live quotes per check.
+import json, math, time, struct, logging, threading
+from dataclasses import dataclass, field
+
+LOG = logging.getLogger("treasury_bot")
+
+class PoolModelUnavailable(RuntimeError):
+    pass
+
+@dataclass
+class PoolState:
+    id: str
+    kind: str                       # "Standard" | "Concentrated"
+    mint_a: str
+    mint_b: str
+    dec_a: int
+    dec_b: int
+    fee_rate: float                 # e.g. 0.0025
+    reserve_a: float = 0.0          # UI units (Standard)
+    reserve_b: float = 0.0
+    price: float = 0.0              # B per A, UI units
+    ticks: list = field(default_factory=list)   # Concentrated: [(lower_price_ui, liquidity)] sorted by price
+    fetched_at: float = field(default_factory=time.monotonic)
+
+# ────────────────────────────────────────────────────────────────────────────
+# Swap math (UI units in, UI units out, fee taken on input)
+# ────────────────────────────────────────────────────────────────────────────
+def cpmm_out(p: PoolState, a_to_b: bool, amount_in: float) -> float:
+    rin, rout = (p.reserve_a, p.reserve_b) if a_to_b else (p.reserve_b, p.reserve_a)
+    if rin <= 0 or rout <= 0: return 0.0
+    x = amount_in * (1 - p.fee_rate)
+    return rout * x / (rin + x)
+
+def clmm_out(p: PoolState, a_to_b: bool, amount_in: float) -> float:
+    """Walk the liquidity ranges from the current price. Works in raw units where sqrtP² = B_raw/A_raw.
+    0 when the ranges run out before amount_in is filled (the pool can't take the trade)."""
+    if not p.ticks or p.price <= 0: return 0.0
+    scale = 10 ** (p.dec_b - p.dec_a)
+    sp = math.sqrt(p.price * scale)
+    bounds = [(math.sqrt(px * scale), float(liq)) for px, liq in p.ticks]
+    remaining = amount_in * (1 - p.fee_rate) * (10 ** (p.dec_a if a_to_b else p.dec_b))
+    out = 0.0
+    if sp < bounds[0][0]:   # below every range: nothing to sell into; buying, price jumps to the first range
+        if a_to_b: return 0.0
+        sp = bounds[0][0]
+    # index of the range containing the current price
+    i = max(k for k, (s, _) in enumerate(bounds) if s <= sp)
+    while remaining > 0 and 0 <= i < len(bounds):
+        lo, liq = bounds[i]
+        hi = bounds[i + 1][0] if i + 1 < len(bounds) else float("inf")
+        if liq <= 0:
+            i += -1 if a_to_b else 1
+            sp = lo if a_to_b else hi
+            if math.isinf(sp): break
+            continue
+        if a_to_b:   # x in, price falls toward lo
+            max_in = liq * (1 / lo - 1 / sp) if lo > 0 else float("inf")
+            if remaining < max_in:
+                sp_new = 1 / (1 / sp + remaining / liq)
+                out += liq * (sp - sp_new); remaining = 0
+            else:
+                out += liq * (sp - lo); remaining -= max_in; sp = lo; i -= 1
+        else:        # y in, price rises toward hi
+            max_in = liq * (hi - sp)
+            if remaining < max_in:
+                sp_new = sp + remaining / liq
+                out += liq * (1 / sp - 1 / sp_new); remaining = 0
+            else:
+                out += liq * (1 / sp - 1 / hi); remaining -= max_in; sp = hi; i += 1
+    if remaining > 0: return 0.0
+    return out / (10 ** (p.dec_b if a_to_b else p.dec_a))
+
+def pool_out(p: PoolState, input_mint: str, amount_in: float) -> float:
+    a_to_b = input_mint == p.mint_a
+    return clmm_out(p, a_to_b, amount_in) if p.kind == "Concentrated" else cpmm_out(p, a_to_b, amount_in)
+
+def impact_bps(p: PoolState, input_mint: str, amount_in: float) -> int:
+    # Same definition as est_price_impact_bps: per-unit out at full size vs half size
+    if amount_in <= 0: return 0
+    half = max(amount_in / 2, 1e-6)
+    o1, o2 = pool_out(p, input_mint, half), pool_out(p, input_mint, amount_in)
+    if o1 <= 0 or o2 <= 0: return 100_000
+    return int(max(0.0, (1 - (o2 / amount_in) / (o1 / half)) * 10_000))
+
+def max_size_under_impact(p: PoolState, input_mint: str, upper: float, max_bps: int, iters: int = 40) -> float:
+    """Largest size in [0, upper] with impact_bps <= max_bps (impact is monotone in size)."""
+    if impact_bps(p, input_mint, upper) <= max_bps: return upper
+    lo, hi = 0.0, upper
+    for _ in range(iters):
+        mid = (lo + hi) / 2
+        if impact_bps(p, input_mint, mid) <= max_bps: lo = mid
+        else: hi = mid
+    return lo
+
+# Raydium CLMM PoolState: disc 8 | bump 1 | 7×Pubkey | dec0 u8 | dec1 u8 | tick_spacing u16 | liquidity u128 | sqrt_price_x64 u128
+CLMM_SQRT_PRICE_OFFSET = 253
+
+def clmm_price(data: bytes, dec_a: int, dec_b: int) -> float:
+    """B per A (UI units) from a Concentrated pool account's sqrt_price_x64."""
+    lo, hi = struct.unpack_from("<QQ", data, CLMM_SQRT_PRICE_OFFSET)
+    sp = ((hi << 64) | lo) / 2 ** 64
+    return sp * sp * 10 ** (dec_a - dec_b)
+
+# ────────────────────────────────────────────────────────────────────────────
+# Pool book: fetch + short cache
+# ────────────────────────────────────────────────────────────────────────────
+class PoolBook:
+    """Deepest Raydium pool per mint pair, cached for ttl_sec (a handful of slots)."""
+
+    def __init__(self, http, api_v3: str, ttl_sec: float = 2.0):
+        self.http = http
+        self.api_v3 = api_v3
+        self.ttl_sec = ttl_sec
+        self._lock = threading.Lock()
+        self._cache: dict[frozenset, PoolState] = {}
+        self._keys: dict[str, dict] = {}       # pool id → API v3 key row (vaults etc.); static
+
+    def _fetch(self, mint1: str, mint2: str) -> PoolState:
+        r = self.http.get(f"{self.api_v3}/pools/info/mint", endpoint="ray_pools", params={
+            "mint1": mint1, "mint2": mint2, "poolType": "all",
+            "poolSortField": "liquidity", "sortType": "desc", "pageSize": "1", "page": "1",
+        })
+        r.raise_for_status()
+        rows = ((r.json().get("data") or {}).get("data") or [])
+        if not rows: raise PoolModelUnavailable(f"no pool for {mint1}/{mint2}")
+        j = rows[0]
+        p = PoolState(
+            id=j["id"], kind=j.get("type", "Standard"),
+            mint_a=j["mintA"]["address"], mint_b=j["mintB"]["address"],
+            dec_a=int(j["mintA"]["decimals"]), dec_b=int(j["mintB"]["decimals"]),
+            fee_rate=float(j.get("feeRate") or 0), price=float(j.get("price") or 0),
+            reserve_a=float(j.get("mintAmountA") or 0), reserve_b=float(j.get("mintAmountB") or 0),
+        )
+        if p.kind == "Concentrated":
+            r = self.http.get(f"{self.api_v3}/pools/line/liquidity", endpoint="ray_pools", params={"id": p.id})
+            r.raise_for_status()
+            line = ((r.json().get("data") or {}).get("line") or [])
+            p.ticks = sorted((float(x["price"]), float(x["liquidity"])) for x in line)
+            if not p.ticks: raise PoolModelUnavailable(f"no liquidity line for CLMM pool {p.id}")
+        return p
+
+    def pool(self, mint1: str, mint2: str) -> PoolState:
+        key = frozenset((mint1, mint2))
+        p = self._cache.get(key)
+        if p is not None and time.monotonic() - p.fetched_at <= self.ttl_sec:
+            return p
+        with self._lock:
+            p = self._cache.get(key)
+            if p is None or time.monotonic() - p.fetched_at > self.ttl_sec:
+                p = self._cache[key] = self._fetch(mint1, mint2)
+                LOG.debug(json.dumps({"dbg": "pool_fetched", "id": p.id, "kind": p.kind, "fee": p.fee_rate}))
+        return p
+
+    def keys(self, pool_id: str) -> dict:
+        k = self._keys.get(pool_id)
+        if k is None:
+            r = self.http.get(f"{self.api_v3}/pools/key/ids", endpoint="ray_pools", params={"ids": pool_id})
+            r.raise_for_status()
+            rows = [x for x in (r.json().get("data") or []) if x]
+            if not rows: raise PoolModelUnavailable(f"no keys for pool {pool_id}")
+            k = self._keys[pool_id] = rows[0]
+        return k
+
+    def impact_bps(self, input_mint: str, output_mint: str, amount_in: float) -> int:
+        return impact_bps(self.pool(input_mint, output_mint), input_mint, amount_in)
+
+    def max_size(self, input_mint: str, output_mint: str, upper: float, max_bps: int) -> float:
+        return max_size_under_impact(self.pool(input_mint, output_mint), input_mint, upper, max_bps)
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# Fixed-size (timestamp, price) ring buffer with incrementally maintained window
+# statistics, plus a background sampler that feeds it on a schedule and snapshots
+# it to disk so the TWAP window survives restarts.
+import os, json, math, time, bisect, struct, logging, threading
+from array import array
+from typing import Callable, Iterable, Optional
+
+LOG = logging.getLogger("treasury_bot")
+
+# ────────────────────────────────────────────────────────────────────────────
+# Ring buffer
+# ────────────────────────────────────────────────────────────────────────────
+class _Window:
+    """Running state for the tail of the ring that lies within `span` seconds of the newest sample.
+
+    Prices are a step function: sample i holds from t_i until t_{i+1}.
+    area/dur give the time-weighted average, r_sum/r_sq the log-return moments,
+    `sorted` the window prices for the median.
+    """
+    __slots__ = ("span", "start", "area", "dur", "r_n", "r_sum", "r_sq", "sorted")
+
+    def __init__(self, span: float):
+        self.span = span
+        self.start = 0            # sequence number of the oldest sample in the window
+        self.area = self.dur = 0.0
+        self.r_n = 0
+        self.r_sum = self.r_sq = 0.0
+        self.sorted: list[float] = []
+
+class PriceRing:
+    def __init__(self, capacity: int, windows: Iterable[float] = ()):
+        # a window's time weights and returns span consecutive samples, so both must fit in the ring
+        if capacity < 2: raise ValueError(f"PriceRing capacity must be at least 2, got {capacity}")
+        self.capacity = capacity
+        self.ts = array("d", bytes(8 * capacity))
+        self.px = array("d", bytes(8 * capacity))
+        self.total = 0            # samples ever pushed; seq n lives at index n % capacity
+        self._lock = threading.Lock()
+        self._windows = {float(w): _Window(float(w)) for w in windows}
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def _t(self, seq): return self.ts[seq % self.capacity]
+    def _p(self, seq): return self.px[seq % self.capacity]
+
+    def _evict(self, w: _Window):
+        s = w.start
+        t0, p0, t1, p1 = self._t(s), self._p(s), self._t(s + 1), self._p(s + 1)
+        w.area -= p0 * (t1 - t0); w.dur -= (t1 - t0)
+        if p0 > 0 and p1 > 0:
+            r = math.log(p1 / p0)
+            w.r_n -= 1; w.r_sum -= r; w.r_sq -= r * r
+        del w.sorted[bisect.bisect_left(w.sorted, p0)]
+        w.start += 1
+
+    def push(self, ts: float, price: float):
+        with self._lock:
+            if self.total and ts <= self._t(self.total - 1):
+                return  # out-of-order / duplicate timestamp
+            oldest = self.total - self.capacity + 1   # seq that survives this write
+            prev = self.total - 1
+            i = self.total % self.capacity
+            # evict what's about to be overwritten before the slot changes
+            for w in self._windows.values():
+                while w.start < oldest and w.start < prev:
+                    self._evict(w)
+            self.ts[i], self.px[i] = ts, price
+            self.total += 1
+            for w in self._windows.values():
+                if prev >= 0 and w.start <= prev:
+                    tp, pp = self._t(prev), self._p(prev)
+                    w.area += pp * (ts - tp); w.dur += (ts - tp)
+                    if pp > 0 and price > 0:
+                        r = math.log(price / pp)
+                        w.r_n += 1; w.r_sum += r; w.r_sq += r * r
+                else:
+                    w.start = self.total - 1
+                bisect.insort(w.sorted, price)
+                while w.start < self.total - 1 and self._t(w.start) < ts - w.span:
+                    self._evict(w)
+                if w.start == self.total - 1 and w.dur:   # only the new sample left
+                    w.area = w.dur = 0.0; w.r_n = 0; w.r_sum = w.r_sq = 0.0
+
+    # ── queries ────────────────────────────────────────────────────────────
+    def last(self) -> Optional[tuple[float, float]]:
+        if not self.total: return None
+        return self._t(self.total - 1), self._p(self.total - 1)
+
+    def samples(self, span: Optional[float] = None) -> list[tuple[float, float]]:
+        with self._lock:
+            lo = max(0, self.total - self.capacity)
+            out = [(self._t(s), self._p(s)) for s in range(lo, self.total)]
+        if span is not None and out:
+            cut = out[-1][0] - span
+            out = [x for x in out if x[0] >= cut]
+        return out
+
+    def count(self, span: float) -> int:
+        w = self._windows.get(float(span))
+        if w is not None: return len(w.sorted)
+        return len(self.samples(span))
+
+    def twap(self, span: float) -> Optional[float]:
+        w = self._windows.get(float(span))
+        if w is not None:
+            with self._lock:
+                if not w.sorted: return None
+                return (w.area / w.dur) if w.dur > 0 else self._p(self.total - 1)
+        xs = self.samples(span)
+        if not xs: return None
+        area = sum(p * (xs[k + 1][0] - t) for k, (t, p) in enumerate(xs[:-1]))
+        dur = xs[-1][0] - xs[0][0]
+        return area / dur if dur > 0 else xs[-1][1]
+
+    def median(self, span: float) -> Optional[float]:
+        w = self._windows.get(float(span))
+        vals = list(w.sorted) if w is not None else sorted(p for _, p in self.samples(span))
+        if not vals: return None
+        n = len(vals)
+        return vals[n // 2] if n % 2 else (vals[n // 2 - 1] + vals[n // 2]) / 2
+
+    def volatility(self, span: float) -> Optional[float]:
+        """Stdev of log returns between consecutive samples in the window."""
+        w = self._windows.get(float(span))
+        if w is not None:
+            n, s, sq = w.r_n, w.r_sum, w.r_sq
+        else:
+            xs = self.samples(span)
+            rs = [math.log(b[1] / a[1]) for a, b in zip(xs, xs[1:]) if a[1] > 0 and b[1] > 0]
+            n, s, sq = len(rs), sum(rs), sum(r * r for r in rs)
+        if n < 2: return None
+        return math.sqrt(max(0.0, (sq - s * s / n) / (n - 1)))
+
+    # ── persistence ────────────────────────────────────────────────────────
+    _HDR = struct.Struct("<4sII")  # magic, version, n
+
+    def save(self, path: str):
+        xs = self.samples()
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(self._HDR.pack(b"PRNG", 1, len(xs)))
+            array("d", [t for t, _ in xs]).tofile(f)
+            array("d", [p for _, p in xs]).tofile(f)
+        os.replace(tmp, path)
+
+    def load(self, path: str, max_age_sec: Optional[float] = None) -> int:
+        with open(path, "rb") as f:
+            magic, ver, n = self._HDR.unpack(f.read(self._HDR.size))
+            if magic != b"PRNG" or ver != 1:
+                raise ValueError(f"not a price ring snapshot: {path}")
+            ts, px = array("d"), array("d")
+            ts.fromfile(f, n); px.fromfile(f, n)
+        cut = (time.time() - max_age_sec) if max_age_sec else float("-inf")
+        loaded = 0
+        for t, p in zip(ts, px):
+            if t >= cut:
+                self.push(t, p); loaded += 1
+        return loaded
+
+# ────────────────────────────────────────────────────────────────────────────
+# Background sampler
+# ────────────────────────────────────────────────────────────────────────────
+class PriceSampler:
+    """Polls {series: fn() -> price} every interval_sec into one PriceRing per series."""
+
+    def __init__(self, sources: dict[str, Callable[[], float]], interval_sec: float, capacity: int,
+                 windows: Iterable[float] = (), snapshot_dir: Optional[str] = None, snapshot_every: int = 30,
+                 on_sample: Callable[[str, float, float], None] = lambda series, ts, price: None):
+        self.sources = sources
+        self.on_sample = on_sample      # every sample pushed, e.g. into the long-term history
+        self.interval_sec = interval_sec
+        self.rings = {k: PriceRing(capacity, windows) for k in sources}
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_every = snapshot_every
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._ticks = 0
+
+    def _path(self, series): return os.path.join(self.snapshot_dir, f"{series}.ring")
+
+    def restore(self):
+        if not self.snapshot_dir: return
+        max_age = self.interval_sec * max(r.capacity for r in self.rings.values())
+        for k, ring in self.rings.items():
+            try:
+                n = ring.load(self._path(k), max_age_sec=max_age)
+                LOG.info(json.dumps({"info": "price_ring_restored", "series": k, "samples": n}))
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                LOG.warning(json.dumps({"warn": "price_ring_restore_failed", "series": k, "error": str(e)}))
+
+    def snapshot(self):
+        if not self.snapshot_dir: return
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        for k, ring in self.rings.items():
+            try: ring.save(self._path(k))
+            except Exception as e:
+                LOG.warning(json.dumps({"warn": "price_ring_snapshot_failed", "series": k, "error": str(e)}))
+
+    def tick(self):
+        for k, fn in self.sources.items():
+            try:
+                p = float(fn())
+                if p > 0:
+                    t = time.time()
+                    self.rings[k].push(t, p)
+                    self.on_sample(k, t, p)
+            except Exception as e:
+                LOG.warning(json.dumps({"warn": "price_sample_failed", "series": k, "error": str(e)}))
+        self._ticks += 1
+        if self._ticks % self.snapshot_every == 0:
+            self.snapshot()
+
+    def _run(self):
+        while not self._stop.is_set():
+            t0 = time.monotonic()
+            self.tick()
+            self._stop.wait(max(0.0, self.interval_sec - (time.monotonic() - t0)))
+
+    def start(self):
+        if self._thread and self._thread.is_alive(): return
+        self.restore()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="price-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread: self._thread.join(timeout=self.interval_sec + 5)
+        self.snapshot()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def twap(self, series: str, span: float, min_samples: int = 1) -> Optional[float]:
+        ring = self.rings[series]
+        last = ring.last()
+        # stale if we stopped sampling (e.g. Raydium down): let the caller fall back
+        if last is None or time.time() - last[0] > 3 * self.interval_sec: return None
+        if ring.count(span) < min_samples: return None
+        return ring.twap(span)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# Short-TTL LRU cache with request coalescing (single-flight) for Raydium quotes.
+# Identical concurrent lookups share one in-flight fetch; repeated lookups inside
+# the TTL never leave the process.
+import time, threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Hashable, Optional
+
+class QuoteCache:
+    def __init__(self, ttl_sec: float, maxsize: int = 256, on_event: Optional[Callable[[str], None]] = None):
+        self.ttl_sec = ttl_sec
+        self.maxsize = maxsize
+        self.on_event = on_event or (lambda kind: None)   # "hit" | "miss" | "coalesced"
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple[float, object]]" = OrderedDict()
+        self._inflight: dict[Hashable, Future] = {}
+
+    def get_or_fetch(self, key: Hashable, fetch: Callable[[], object], fresh: bool = False):
+        # fresh: never answer from the cache (a fetch already in flight is still joined); the result is cached as usual
+        with self._lock:
+            e = None if fresh else self._entries.get(key)
+            if e is not None and e[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.on_event("hit")
+                return e[1]
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._inflight[key] = Future()
+        if not leader:
+            self.on_event("coalesced")
+            return fut.result()
+        self.on_event("miss")
+        try:
+            val = fetch()
+        except BaseException as ex:
+            with self._lock:
+                self._inflight.pop(key, None)
+            fut.set_exception(ex)
+            raise
+        with self._lock:
+            if self.ttl_sec > 0:
+                self._entries[key] = (time.monotonic() + self.ttl_sec, val)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            self._inflight.pop(key, None)
+        fut.set_result(val)
+        return val
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
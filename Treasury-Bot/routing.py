@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# Route selection: the same trade priced over every candidate path at the intended size
+# (direct pools and two-hop via SOL), compared on quoted output net of per-transaction fees.
+# The best route wins, unless splitting the size between it and the runner-up that spends the
+# same input mint nets more (the extra swap's fees included). Quotes include pool impact, so
+# a thin pool loses on its own numbers.
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Callable, Optional
+
+@dataclass(frozen=True)
+class Route:
+    name: str                             # e.g. GC>SOL>USDT
+    legs: tuple[tuple[str, str], ...]     # (input_mint, output_mint) per swap, in order
+
+    @property
+    def input(self) -> str:
+        return self.legs[0][0]
+
+    @property
+    def output(self) -> str:
+        return self.legs[-1][1]
+
+def routes(src: str, dsts: list[str], via: str, labels: dict) -> list[Route]:
+    """src → dst directly and src → via → dst, for every dst."""
+    out = []
+    for d in dsts:
+        out.append(Route(f"{labels[src]}>{labels[d]}", ((src, d),)))
+        if via not in (src, d):
+            out.append(Route(f"{labels[src]}>{labels[via]}>{labels[d]}", ((src, via), (via, d))))
+    return out
+
+@dataclass(frozen=True)
+class Fill:
+    """One route priced at one size. Amounts in UI units; cost in units of the route's output."""
+    route: Route
+    amount: Decimal                       # into the first leg
+    out: Decimal                          # out of the last leg, as quoted
+    cost: Decimal                         # priority / base / tip fees of every leg
+    leg_in: tuple[Decimal, ...] = ()      # input of each leg (leg n+1 spends what leg n is quoted to return)
+    quotes: tuple = ()
+
+    @property
+    def net(self) -> Decimal:
+        return self.out - self.cost
+
+@dataclass(frozen=True)
+class Plan:
+    fills: tuple[Fill, ...]               # one route, or a split over two
+    alternative: Optional[Decimal] = None # net of the best plan not taken (None: nothing to compare)
+    candidates: dict = field(default_factory=dict)   # route name → net at the full size
+
+    @property
+    def net(self) -> Decimal:
+        return sum((f.net for f in self.fills), Decimal(0))
+
+    @property
+    def input(self) -> str:
+        return self.fills[0].route.input
+
+    @property
+    def name(self) -> str:
+        if len(self.fills) == 1: return self.fills[0].route.name
+        total = sum(f.amount for f in self.fills)
+        return "+".join(f"{f.route.name}:{int(round(f.amount / total * 100))}%" for f in self.fills)
+
+    @property
+    def advantage(self) -> Decimal:
+        return self.net - self.alternative if self.alternative is not None else Decimal(0)
+
+    @property
+    def advantage_bps(self) -> int:
+        if not self.alternative or self.alternative <= 0: return 0
+        return int(self.advantage / self.alternative * 10_000)
+
+def choose(price: Callable[[Route, Decimal], Optional[Fill]], candidates: list[Route], amount: Decimal,
+           run_all: Callable[[dict], dict], splits: tuple = (), min_split_gain_bps: float = 0.0) -> Optional[Plan]:
+    """Best Plan for `amount`, or None when no route could be priced.
+
+    price(route, amount) → Fill, or None if the route can't be quoted. run_all({key: fn}) runs
+    the functions concurrently and returns {key: result} for those that finished in time.
+    """
+    full = run_all({r.name: (lambda r=r: price(r, amount)) for r in candidates})
+    singles = sorted((f for f in full.values() if f is not None), key=lambda f: f.net, reverse=True)
+    if not singles: return None
+    nets = {f.route.name: f.net for f in singles}
+    best = singles[0]
+    chosen: tuple[Fill, ...] = (best,)
+    alternative = singles[1].net if len(singles) > 1 else None
+    partner = next((f.route for f in singles[1:] if f.route.input == best.route.input), None)
+    if partner is not None and splits:
+        parts = run_all({(r.name, x): (lambda r=r, x=x: price(r, amount * Decimal(str(x))))
+                         for s in splits for r, x in ((best.route, s), (partner, 1 - s))})
+        bar = best.net * (1 + Decimal(str(min_split_gain_bps)) / 10_000)
+        for x in splits:
+            a, b = parts.get((best.route.name, x)), parts.get((partner.name, 1 - x))
+            if a is not None and b is not None and a.net + b.net > bar:
+                chosen, bar = (a, b), a.net + b.net
+        if len(chosen) > 1: alternative = best.net
+    return Plan(chosen, alternative, nets)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# Child-order execution: a parent order (the full cap-sized trade) is worked down as a series
+# of child swaps over time instead of one swap that either moves the pool too far or gets
+# skipped. Each child is re-planned right before it is sent (fresh price, band, governor room,
+# impact-safe size); parent and child state live in the StateStore, so a parent interrupted by
+# a restart picks up where it left off on the next cycle. A child is written down (with its
+# signatures) before it is broadcast; one still pending on resume is looked up on chain before
+# anything else is sent, so a restart never re-sends what already landed.
+#
+#   impact: children as large as the pool model allows under the impact limit, spaced out so
+#           arbitrage can restore the pool between fills
+#   twap:   the remainder split evenly over the planned number of children
+import json, time, logging, threading
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Callable, Optional, Union
+
+LOG = logging.getLogger("treasury_bot")
+
+MODES = ("impact", "twap")
+
+@dataclass
+class ParentOrder:
+    id: int
+    side: str                 # SELL | BUY
+    input_mint: str
+    output_mint: str
+    total: int                # base units of input_mint
+    mode: str                 # impact | twap
+    slices: int               # planned children (twap) / upper bound (impact)
+    created_at: float         # time.time()
+    filled: int = 0           # base units of input_mint spent by landed children
+    received: int = 0         # base units of output_mint quoted for landed children
+    children: int = 0         # children sent, landed or not
+    failures: int = 0
+    status: str = "active"    # active | done | stopped | expired | failed
+    reason: Optional[str] = None
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.total - self.filled)
+
+@dataclass(frozen=True)
+class ChildPlan:
+    amount: int               # base units of input_mint
+    ref_price: Decimal        # SOL per GC the child was sized against
+
+@dataclass(frozen=True)
+class ChildFill:
+    landed: bool
+    in_amount: int            # base units actually sent (a pre-built order may be slightly smaller)
+    out_amount: int           # quoted base units of output_mint
+    sigs: list = field(default_factory=list)
+    status: str = "confirmed"
+    book: tuple = ()          # (gc, usdc, usdt) UI amounts for the daily governor, booked with the child
+
+class Slicer:
+    """open() / active() / run() over parents kept in `store`.
+
+    next_child(parent) → ChildPlan, or a reason string to stop the parent (back inside the
+    band, governor exhausted, ...). fill(parent, plan, sent) → ChildFill after sending the child;
+    it calls sent(in_amount, out_amount, sigs) once the child is signed, before broadcasting.
+    resolve(parent, child) → ChildFill for a child left pending by an earlier process, or None
+    while it may still land (asked again every resolve_poll_sec until it answers).
+    """
+
+    def __init__(self, store, next_child: Callable[[ParentOrder], Union[ChildPlan, str]],
+                 fill: Callable[[ParentOrder, ChildPlan, Callable], ChildFill],
+                 resolve: Callable[[ParentOrder, dict], Optional[ChildFill]], interval_sec: float = 60.0,
+                 max_failures: int = 3, max_age_sec: float = 6 * 3600, dust_bps: int = 10,
+                 resolve_poll_sec: float = 2.0, on_event: Callable[[str], None] = lambda kind: None):
+        self.store = store
+        self.next_child = next_child
+        self.fill = fill
+        self.resolve = resolve
+        self.interval_sec = interval_sec
+        self.max_failures = max_failures
+        self.max_age_sec = max_age_sec
+        self.dust_bps = dust_bps            # a remainder this small (of total) completes the parent
+        self.resolve_poll_sec = resolve_poll_sec
+        self.on_event = on_event            # "opened" | "child" | "child_failed" | <final status>
+        self._lock = threading.Lock()       # one parent worked at a time
+
+    def open(self, side: str, input_mint: str, output_mint: str, total: int, mode: str, slices: int,
+             cycle: Optional[str] = None) -> ParentOrder:
+        p = ParentOrder(0, side, input_mint, output_mint, total, mode, slices, time.time())
+        p.id = self.store.open_parent(side, input_mint, output_mint, total, mode, slices, cycle=cycle)
+        self.on_event("opened")
+        LOG.info(json.dumps({"info": "parent_opened", "parent": p.id, "side": side, "total": total, "mode": mode, "slices": slices}))
+        return p
+
+    def active(self) -> Optional[ParentOrder]:
+        row = self.store.active_parent()
+        return ParentOrder(**row) if row else None
+
+    def _close(self, p: ParentOrder, status: str, reason: Optional[str] = None):
+        p.status, p.reason = status, reason
+        self.store.close_parent(p.id, status, reason)
+        self.on_event(status)
+        LOG.info(json.dumps({"info": "parent_closed", "parent": p.id, "status": status, "reason": reason,
+                             "filled": p.filled, "total": p.total, "received": p.received, "children": p.children}))
+
+    @staticmethod
+    def _sleep(stop: Optional[threading.Event], sec: float) -> bool:
+        """Wait sec; True if stop was set meanwhile."""
+        if stop is not None: return stop.wait(sec)
+        time.sleep(sec)
+        return False
+
+    def run(self, p: ParentOrder, stop: Optional[threading.Event] = None) -> ParentOrder:
+        """Send children until the parent finishes or stop is set (the parent then stays active)."""
+        with self._lock:
+            unresolved = None
+            while p.status == "active":
+                pending = self.store.pending_children(p.id)
+                if pending:
+                    # sent by a process that stopped before settling it: the chain says what happened
+                    child, ids = pending[0], [pending[0]["id"]]
+                    f = self.resolve(p, child)
+                    if f is None:   # still in flight: wait it out here rather than leave the parent for a cycle
+                        if unresolved != child["id"]:
+                            LOG.info(json.dumps({"info": "child_unresolved", "parent": p.id, "seq": child["seq"]}))
+                            unresolved = child["id"]
+                        if self._sleep(stop, self.resolve_poll_sec): break
+                        continue
+                    LOG.info(json.dumps({"info": "child_resolved", "parent": p.id, "seq": child["seq"], "status": f.status}))
+                else:
+                    if time.time() - p.created_at > self.max_age_sec:
+                        self._close(p, "expired"); break
+                    plan = self.next_child(p)
+                    if isinstance(plan, str):
+                        self._close(p, "stopped", plan); break
+                    ids = []
+                    f = self.fill(p, plan, lambda i, o, sigs: ids.append(self.store.child_pending(p.id, p.children + 1, i, o, sigs)))
+                p.children += 1
+                if f.landed:
+                    p.filled += f.in_amount; p.received += f.out_amount
+                else:
+                    p.failures += 1
+                self.store.child_filled(p.id, p.children, f.in_amount, f.out_amount, f.sigs, f.status, f.landed,
+                                        child_id=ids[-1] if ids else None, book=f.book if f.landed else None)
+                self.on_event("child" if f.landed else "child_failed")
+                if p.remaining * 10_000 <= p.total * self.dust_bps:
+                    self._close(p, "done"); break
+                if p.failures >= self.max_failures:
+                    self._close(p, "failed", f"{p.failures} children did not land"); break
+                if pending: continue
+                if self._sleep(stop, self.interval_sec): break
+        return p
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# Hot standby for the execution path.
+#  - FeeOracle: priority fee from recent per-slot fee percentiles, cached with a TTL so
+#    building a swap never waits on a fee lookup.
+#  - Standby: while price sits near a band edge, a background worker keeps one order for
+#    the likely next trade quoted, built and signed, rebuilding it as the blockhash ages or
+#    the price moves. When the cycle decides to trade and the order still matches, execution
+#    is a single broadcast.
+import json, math, time, logging, threading
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Callable, Optional
+
+LOG = logging.getLogger("treasury_bot")
+
+# ────────────────────────────────────────────────────────────────────────────
+# Priority fees
+# ────────────────────────────────────────────────────────────────────────────
+def percentile(values: list[int], pct: float) -> int:
+    xs = sorted(values)
+    return xs[min(len(xs) - 1, max(0, math.ceil(pct / 100 * len(xs)) - 1))]
+
+class FeeOracle:
+    """Micro-lamports per CU: `pct` percentile of recent non-zero slot fees, clamped, cached for ttl_sec."""
+
+    def __init__(self, recent: Callable[[], list[int]], fallback: Callable[[], int], pct: float = 75,
+                 ttl_sec: float = 10.0, floor: int = 0, ceiling: Optional[int] = None):
+        self.recent = recent
+        self.fallback = fallback
+        self.pct = pct
+        self.ttl_sec = ttl_sec
+        self.floor = floor
+        self.ceiling = ceiling
+        self._lock = threading.Lock()     # single flight: one fetch refreshes for every waiter
+        self._value: Optional[int] = None
+        self._at = 0.0
+
+    def _fetch(self) -> int:
+        try:
+            fees = [f for f in self.recent() if f > 0]   # zero-fee slots say nothing about competition
+            fee = percentile(fees, self.pct) if fees else self.floor
+        except Exception as e:
+            LOG.warning(json.dumps({"warn": "recent_fees_failed", "error": str(e)}))
+            fee = self.fallback()
+        fee = max(self.floor, fee)
+        return min(self.ceiling, fee) if self.ceiling else fee
+
+    def get(self) -> int:
+        if self._value is not None and time.monotonic() - self._at < self.ttl_sec:
+            return self._value
+        with self._lock:
+            if self._value is None or time.monotonic() - self._at >= self.ttl_sec:
+                self._value, self._at = self._fetch(), time.monotonic()
+            return self._value
+
+# ────────────────────────────────────────────────────────────────────────────
+# Pre-built orders
+# ────────────────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class OrderSpec:
+    side: str                 # SELL | BUY
+    input_mint: str
+    output_mint: str
+    amount: Decimal           # UI units of input_mint
+    ref_price: Decimal        # SOL per GC the order was sized/quoted against
+
+@dataclass(frozen=True)
+class Prepared:
+    spec: OrderSpec
+    order: object             # whatever build() returned (quote + signed submission)
+    built_at: float           # time.monotonic()
+
+class Standby:
+    """Keeps at most one Prepared order matching plan(); take() hands it out once."""
+
+    def __init__(self, plan: Callable[[], Optional[OrderSpec]], build: Callable[[OrderSpec], object],
+                 interval_sec: float = 3.0, max_age_sec: float = 30.0, reprice_bps: int = 30,
+                 size_tol_bps: int = 100, on_event: Callable[[str], None] = lambda kind: None):
+        self.plan = plan
+        self.build = build
+        self.interval_sec = interval_sec
+        self.max_age_sec = max_age_sec      # well inside blockhash validity (~60-90s)
+        self.reprice_bps = reprice_bps
+        self.size_tol_bps = size_tol_bps
+        self.on_event = on_event
+        self._lock = threading.Lock()
+        self._slot: Optional[Prepared] = None
+        self._gen = 0                       # bumped by take(): a build started before it is discarded
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _usable(self, p: Prepared, spec: OrderSpec) -> bool:
+        s = p.spec
+        if (s.side, s.input_mint, s.output_mint) != (spec.side, spec.input_mint, spec.output_mint): return False
+        if time.monotonic() - p.built_at > self.max_age_sec: return False
+        # never larger than what the cycle sized (caps / governor), at most size_tol_bps smaller
+        if not (spec.amount * (1 - Decimal(self.size_tol_bps) / 10_000) <= s.amount <= spec.amount): return False
+        if spec.ref_price > 0 and s.ref_price > 0:
+            if abs(spec.ref_price - s.ref_price) / s.ref_price * 10_000 > self.reprice_bps: return False
+        return True
+
+    def refresh(self):
+        try:
+            spec = self.plan()
+        except Exception as e:
+            LOG.warning(json.dumps({"warn": "standby_plan_failed", "error": str(e)})); return
+        with self._lock:
+            if spec is None:
+                self._slot = None; return
+            if self._slot and self._usable(self._slot, spec): return
+            gen = self._gen
+        try:
+            order = self.build(spec)
+        except Exception as e:
+            LOG.warning(json.dumps({"warn": "standby_build_failed", "side": spec.side, "error": str(e)})); return
+        with self._lock:
+            if gen != self._gen: return
+            self._slot = Prepared(spec, order, time.monotonic())
+        self.on_event("built")
+        LOG.debug(json.dumps({"dbg": "standby_built", "side": spec.side, "amount": str(spec.amount), "ref_price": str(spec.ref_price)}))
+
+    def take(self, spec: OrderSpec) -> Optional[Prepared]:
+        with self._lock:
+            p, self._slot = self._slot, None
+            self._gen += 1
+        if p and self._usable(p, spec):
+            self.on_event("hit"); return p
+        self.on_event("miss" if p else "empty")
+        return None
+
+    def _run(self):
+        while not self._stop.is_set():
+            t0 = time.monotonic()
+            self.refresh()
+            self._stop.wait(max(0.0, self.interval_sec - (time.monotonic() - t0)))
+
+    def start(self):
+        if self._thread and self._thread.is_alive(): return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="standby", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread: self._thread.join(timeout=self.interval_sec + 30)
+        with self._lock: self._slot = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
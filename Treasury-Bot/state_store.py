@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# Long-lived SQLite state store (WAL): daily governor totals kept incrementally,
+# an indexed, append-only ledger of every quote, decision and fill, and the
+# parent / child orders of sliced executions (so a parent survives a restart).
+# Amounts are integers in base units; Decimal UI amounts only cross the API boundary.
+import json, time, sqlite3, threading
+from decimal import Decimal
+from typing import Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS governor_day (
+    day              TEXT PRIMARY KEY,
+    base_treasury_gc INTEGER NOT NULL,
+    base_vault_usdc  INTEGER NOT NULL,
+    base_vault_usdt  INTEGER NOT NULL,
+    sold_gc          INTEGER NOT NULL DEFAULT 0,
+    spent_usdc       INTEGER NOT NULL DEFAULT 0,
+    spent_usdt       INTEGER NOT NULL DEFAULT 0,
+    updated_at       REAL
+);
+CREATE TABLE IF NOT EXISTS ledger (
+    id          INTEGER PRIMARY KEY,
+    ts          REAL    NOT NULL,
+    day         TEXT    NOT NULL,
+    cycle       TEXT,
+    kind        TEXT    NOT NULL,          -- quote | decision | fill
+    side        TEXT,                      -- BUY | SELL | HOLD
+    input_mint  TEXT,
+    output_mint TEXT,
+    in_amount   INTEGER,                   -- base units
+    out_amount  INTEGER,                   -- base units (quoted / expected for fills)
+    signature   TEXT,
+    slot        INTEGER,
+    latency_ms  INTEGER,
+    status      TEXT,
+    detail      TEXT                       -- JSON
+);
+CREATE INDEX IF NOT EXISTS ledger_ts       ON ledger(ts);
+CREATE INDEX IF NOT EXISTS ledger_day_kind ON ledger(day, kind);
+CREATE INDEX IF NOT EXISTS ledger_cycle    ON ledger(cycle);
+CREATE INDEX IF NOT EXISTS ledger_sig      ON ledger(signature) WHERE signature IS NOT NULL;
+CREATE TRIGGER IF NOT EXISTS ledger_no_update BEFORE UPDATE ON ledger
+    BEGIN SELECT RAISE(ABORT, 'ledger is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS ledger_no_delete BEFORE DELETE ON ledger
+    BEGIN SELECT RAISE(ABORT, 'ledger is append-only'); END;
+CREATE TABLE IF NOT EXISTS parent_order (
+    id          INTEGER PRIMARY KEY,
+    created_at  REAL    NOT NULL,
+    updated_at  REAL,
+    cycle       TEXT,
+    side        TEXT    NOT NULL,
+    input_mint  TEXT    NOT NULL,
+    output_mint TEXT    NOT NULL,
+    total       INTEGER NOT NULL,              -- base units of input_mint
+    mode        TEXT    NOT NULL,              -- impact | twap
+    slices      INTEGER NOT NULL,
+    filled      INTEGER NOT NULL DEFAULT 0,    -- base units of input_mint, landed children only
+    received    INTEGER NOT NULL DEFAULT 0,    -- base units of output_mint (quoted)
+    children    INTEGER NOT NULL DEFAULT 0,
+    failures    INTEGER NOT NULL DEFAULT 0,
+    status      TEXT    NOT NULL,              -- active | done | stopped | expired | failed
+    reason      TEXT
+);
+CREATE INDEX IF NOT EXISTS parent_status ON parent_order(status);
+CREATE TABLE IF NOT EXISTS child_order (
+    id          INTEGER PRIMARY KEY,
+    parent_id   INTEGER NOT NULL REFERENCES parent_order(id),
+    seq         INTEGER NOT NULL,
+    ts          REAL    NOT NULL,
+    in_amount   INTEGER,
+    out_amount  INTEGER,
+    signatures  TEXT,                          -- JSON list
+    status      TEXT                           -- pending (sent, not settled) | confirmed | partial | failed | ...
+);
+CREATE INDEX IF NOT EXISTS child_parent ON child_order(parent_id);
+"""
+
+# Constant SQL strings → compiled once and reused from sqlite3's statement cache
+_SQL_DAY_GET   = "SELECT day, base_treasury_gc, base_vault_usdc, base_vault_usdt, sold_gc, spent_usdc, spent_usdt FROM governor_day WHERE day=?"
+_SQL_DAY_NEW   = "INSERT OR IGNORE INTO governor_day(day, base_treasury_gc, base_vault_usdc, base_vault_usdt, sold_gc, spent_usdc, spent_usdt, updated_at) VALUES (?,?,?,?,?,?,?,?)"
+_SQL_DAY_BUMP  = "UPDATE governor_day SET sold_gc=sold_gc+?, spent_usdc=spent_usdc+?, spent_usdt=spent_usdt+?, updated_at=? WHERE day=?"
+_SQL_LEDGER    = ("INSERT INTO ledger(ts, day, cycle, kind, side, input_mint, output_mint, in_amount, out_amount,"
+                  " signature, slot, latency_ms, status, detail) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)")
+_SQL_PARENT_NEW  = ("INSERT INTO parent_order(created_at, updated_at, cycle, side, input_mint, output_mint, total, mode, slices, status)"
+                    " VALUES (?,?,?,?,?,?,?,?,?,'active')")
+_SQL_PARENT_GET  = ("SELECT id, side, input_mint, output_mint, total, mode, slices, created_at, filled, received, children, failures,"
+                    " status, reason FROM parent_order WHERE status='active' ORDER BY id LIMIT 1")
+_SQL_PARENT_FILL = ("UPDATE parent_order SET filled=filled+?, received=received+?, children=children+1, failures=failures+?,"
+                    " updated_at=? WHERE id=?")
+_SQL_PARENT_END  = "UPDATE parent_order SET status=?, reason=?, updated_at=? WHERE id=?"
+_SQL_CHILD       = "INSERT INTO child_order(parent_id, seq, ts, in_amount, out_amount, signatures, status) VALUES (?,?,?,?,?,?,?)"
+_SQL_CHILD_SET   = "UPDATE child_order SET ts=?, in_amount=?, out_amount=?, signatures=?, status=? WHERE id=?"
+_SQL_CHILD_OPEN  = ("SELECT id, seq, ts, in_amount, out_amount, signatures FROM child_order"
+                    " WHERE parent_id=? AND status='pending' ORDER BY seq")
+_SQL_LEGACY    = "SELECT base_treasury_gc, base_vault_usdc, base_vault_usdt, sold_gc, spent_usdc, spent_usdt FROM daily WHERE day=?"
+
+def today():
+    return time.strftime("%Y-%m-%d", time.gmtime())
+
+def _units(x: Decimal, decimals: int) -> int:
+    return int((Decimal(x) * (10 ** decimals)).quantize(Decimal(1)))
+
+def _ui(u: int, decimals: int) -> Decimal:
+    return Decimal(u) / Decimal(10 ** decimals)
+
+class StateStore:
+    """One connection for the process lifetime; callers from any thread serialize on a lock."""
+
+    def __init__(self, path: str, decimals: dict[str, int]):
+        self.path = path
+        self.dec = decimals   # {"GC": .., "USDC": .., "USDT": ..}
+        self._lock = threading.Lock()
+        self.con = sqlite3.connect(path, check_same_thread=False, isolation_level=None, cached_statements=64)
+        self.con.execute("PRAGMA journal_mode=WAL")
+        self.con.execute("PRAGMA synchronous=NORMAL")   # durable at checkpoint; a crash loses at most the last txn
+        self.con.execute("PRAGMA busy_timeout=5000")    # Grafana / ad-hoc readers share the file
+        self.con.executescript(SCHEMA)
+        self._day: Optional[list] = None                # cached governor_day row for today
+
+    def close(self):
+        with self._lock:
+            self.con.close()
+
+    # ── governor ───────────────────────────────────────────────────────────
+    def _legacy_row(self, day: str):
+        # one-time carry-over from the pre-WAL REAL-valued `daily` table
+        try:
+            r = self.con.execute(_SQL_LEGACY, (day,)).fetchone()
+        except sqlite3.OperationalError:
+            return None
+        if r is None: return None
+        d = self.dec
+        return [_units(Decimal(str(r[0])), d["GC"]), _units(Decimal(str(r[1])), d["USDC"]), _units(Decimal(str(r[2])), d["USDT"]),
+                _units(Decimal(str(r[3])), d["GC"]), _units(Decimal(str(r[4])), d["USDC"]), _units(Decimal(str(r[5])), d["USDT"])]
+
+    def load_day(self, base_gc: Decimal, base_usdc: Decimal, base_usdt: Decimal) -> dict:
+        d = today()
+        with self._lock:
+            if self._day is None or self._day[0] != d:
+                row = self.con.execute(_SQL_DAY_GET, (d,)).fetchone()
+                if row is None:
+                    vals = self._legacy_row(d) or [_units(base_gc, self.dec["GC"]), _units(base_usdc, self.dec["USDC"]),
+                                                   _units(base_usdt, self.dec["USDT"]), 0, 0, 0]
+                    self.con.execute(_SQL_DAY_NEW, (d, *vals, time.time()))
+                    row = self.con.execute(_SQL_DAY_GET, (d,)).fetchone()
+                self._day = list(row)
+            row = self._day
+        g, c, t = self.dec["GC"], self.dec["USDC"], self.dec["USDT"]
+        return {
+            "day": row[0],
+            "base_treasury_gc": _ui(row[1], g),
+            "base_vault_usdc":  _ui(row[2], c),
+            "base_vault_usdt":  _ui(row[3], t),
+            "sold_gc":          _ui(row[4], g),
+            "spent_usdc":       _ui(row[5], c),
+            "spent_usdt":       _ui(row[6], t),
+        }
+
+    def bump_day(self, gc_in: Decimal, usdc_in: Decimal, usdt_in: Decimal):
+        with self._lock:
+            self._bump_day(gc_in, usdc_in, usdt_in)
+
+    def _bump_day(self, gc_in: Decimal, usdc_in: Decimal, usdt_in: Decimal):
+        # caller holds _lock
+        d = today()
+        du = (_units(gc_in, self.dec["GC"]), _units(usdc_in, self.dec["USDC"]), _units(usdt_in, self.dec["USDT"]))
+        self.con.execute(_SQL_DAY_BUMP, (*du, time.time(), d))
+        if self._day is not None and self._day[0] == d:
+            self._day[4] += du[0]; self._day[5] += du[1]; self._day[6] += du[2]
+
+    # ── parent / child orders ──────────────────────────────────────────────
+    def open_parent(self, side: str, input_mint: str, output_mint: str, total: int, mode: str, slices: int,
+                    cycle: Optional[str] = None) -> int:
+        now = time.time()
+        with self._lock:
+            return self.con.execute(_SQL_PARENT_NEW, (now, now, cycle, side, input_mint, output_mint, total, mode, slices)).lastrowid
+
+    def active_parent(self) -> Optional[dict]:
+        with self._lock:
+            cur = self.con.execute(_SQL_PARENT_GET)
+            row = cur.fetchone()
+        return dict(zip([c[0] for c in cur.description], row)) if row else None
+
+    def child_pending(self, parent_id: int, seq: int, in_amount: int, out_amount: int, sigs: list[str]) -> int:
+        # written before the child is broadcast, so a restart can ask the chain what became of it
+        with self._lock:
+            return self.con.execute(_SQL_CHILD, (parent_id, seq, time.time(), in_amount, out_amount,
+                                                 json.dumps(sigs), "pending")).lastrowid
+
+    def pending_children(self, parent_id: int) -> list[dict]:
+        with self._lock:
+            cur = self.con.execute(_SQL_CHILD_OPEN, (parent_id,))
+            rows = cur.fetchall()
+        cols = [c[0] for c in cur.description]
+        return [dict(zip(cols, r), signatures=json.loads(r[5] or "[]")) for r in rows]
+
+    def child_filled(self, parent_id: int, seq: int, in_amount: int, out_amount: int, sigs: list[str],
+                     status: str, landed: bool, child_id: Optional[int] = None,
+                     book: Optional[tuple[Decimal, Decimal, Decimal]] = None):
+        # child row, parent totals and the governor (book: gc, usdc, usdt spent) move together:
+        # a crash never leaves them disagreeing. child_id settles the row child_pending wrote.
+        now = time.time()
+        with self._lock:
+            self.con.execute("BEGIN IMMEDIATE")
+            try:
+                if child_id is None:
+                    self.con.execute(_SQL_CHILD, (parent_id, seq, now, in_amount, out_amount, json.dumps(sigs), status))
+                else:
+                    self.con.execute(_SQL_CHILD_SET, (now, in_amount, out_amount, json.dumps(sigs), status, child_id))
+                self.con.execute(_SQL_PARENT_FILL, ((in_amount, out_amount, 0) if landed else (0, 0, 1)) + (now, parent_id))
+                if book: self._bump_day(*book)
+                self.con.execute("COMMIT")
+            except BaseException:
+                self.con.execute("ROLLBACK")
+                self._day = None   # the cached row may hold the rolled-back bump; reread it
+                raise
+
+    def close_parent(self, parent_id: int, status: str, reason: Optional[str] = None):
+        with self._lock:
+            self.con.execute(_SQL_PARENT_END, (status, reason, time.time(), parent_id))
+
+    # ── ledger ─────────────────────────────────────────────────────────────
+    def record(self, kind: str, *, cycle: Optional[str] = None, side: Optional[str] = None,
+               input_mint: Optional[str] = None, output_mint: Optional[str] = None,
+               in_amount: Optional[int] = None, out_amount: Optional[int] = None,
+               signature: Optional[str] = None, slot: Optional[int] = None,
+               latency_ms: Optional[int] = None, status: Optional[str] = None, detail: Optional[dict] = None):
+        ts = time.time()
+        with self._lock:
+            self.con.execute(_SQL_LEDGER, (
+                ts, time.strftime("%Y-%m-%d", time.gmtime(ts)), cycle, kind, side, input_mint, output_mint,
+                in_amount, out_amount, signature, slot, latency_ms, status,
+                json.dumps(detail, default=str) if detail is not None else None,
+            ))
+
+    def fills(self, day: Optional[str] = None) -> list[tuple]:
+        with self._lock:
+            return self.con.execute(
+                "SELECT ts, side, input_mint, output_mint, in_amount, out_amount, signature, slot, status "
+                "FROM ledger WHERE kind='fill' AND day=? ORDER BY id", (day or today(),)).fetchall()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# Append-only columnar history of what the bot observes (prices, quotes, impact estimates,
+# balances, fills). One directory per series, one file per UTC day, fixed-width NumPy
+# records appended to the end; readers memory-map the partitions a time range touches and
+# binary-search the ts column, so a scan never parses anything and never touches SQLite
+# or the network. Query helpers (resample, rolling stats, TWAP, realized volatility)
+# work on the returned arrays.
+#
+#   python timeseries.py export series/ sol_per_gc --since 2026-10-01 --step 300 > sol_per_gc.csv
+#   python timeseries.py info series/
+import os, sys, json, time, logging, argparse, threading
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+
+LOG = logging.getLogger("treasury_bot")
+
+# Record layouts (packed, little-endian). ts is unix seconds and always the first field.
+KINDS = {
+    "price":   [("ts", "<f8"), ("value", "<f8")],
+    "quote":   [("ts", "<f8"), ("input", "S4"), ("output", "S4"), ("in_amount", "<i8"), ("out_amount", "<i8"),
+                ("latency_ms", "<i4")],
+    "impact":  [("ts", "<f8"), ("input", "S4"), ("output", "S4"), ("amount", "<f8"), ("impact_bps", "<i4")],
+    "balance": [("ts", "<f8"), ("slot", "<i8"), ("gc", "<f8"), ("usdc", "<f8"), ("usdt", "<f8"), ("sol", "<f8")],
+    "fill":    [("ts", "<f8"), ("side", "S4"), ("input", "S4"), ("output", "S4"), ("in_amount", "<i8"),
+                ("out_amount", "<i8"), ("status", "S10"), ("latency_ms", "<i4")],
+}
+
+# What treasury_bot records, series name → kind
+SERIES = {
+    "sol_per_gc": "price", "twap_sol_per_gc": "price", "sol_usdc": "price",
+    "quote": "quote", "impact": "impact", "balance": "balance", "fill": "fill",
+}
+
+def _day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
+
+# ────────────────────────────────────────────────────────────────────────────
+# Store
+# ────────────────────────────────────────────────────────────────────────────
+class _Appender:
+    """Current day's partition of one series, opened for append."""
+
+    def __init__(self, path: str, dtype: np.dtype):
+        self.path = path
+        self.dtype = dtype
+        self.day: Optional[str] = None
+        self.f = None
+        self.last_ts = float("-inf")
+
+    def _open(self, day: str):
+        if self.f: self.f.close()
+        fn = os.path.join(self.path, f"{day}.bin")
+        size = os.path.getsize(fn) if os.path.exists(fn) else 0
+        if size % self.dtype.itemsize:   # torn tail from a crash mid-write: drop the partial record
+            os.truncate(fn, size - size % self.dtype.itemsize)
+            size -= size % self.dtype.itemsize
+        if size:
+            tail = np.memmap(fn, self.dtype, mode="r", offset=size - self.dtype.itemsize, shape=(1,))
+            self.last_ts = max(self.last_ts, float(tail["ts"][0]))
+            del tail
+        self.f = open(fn, "ab")
+        self.day = day
+
+    def append(self, rec: tuple):
+        ts = max(float(rec[0]), self.last_ts)   # keep ts sorted within the series (scans binary-search it)
+        day = _day(ts)
+        if day != self.day: self._open(day)
+        self.f.write(np.array([(ts, *rec[1:])], dtype=self.dtype).tobytes())
+        self.f.flush()                          # visible to readers (exporters, backtests) right away
+        self.last_ts = ts
+
+    def close(self):
+        if self.f: self.f.close(); self.f = None; self.day = None
+
+class SeriesStore:
+    """append(name, ts, *fields) / scan(name, since, until) over `root`/<name>/<YYYY-MM-DD>.bin.
+
+    Opening a series whose files were written with a different layout fails instead of misreading them.
+    """
+
+    def __init__(self, root: str, series: Optional[dict] = None, retention_days: int = 0):
+        self.root = root
+        self.retention_days = retention_days   # 0 keeps everything
+        self._lock = threading.Lock()
+        self._dtypes: dict[str, np.dtype] = {}
+        self._appenders: dict[str, _Appender] = {}
+        for name, kind in (series or {}).items():
+            self.register(name, kind)
+        for name in self._on_disk():
+            if name not in self._dtypes: self._open_schema(name)
+
+    def _on_disk(self) -> list[str]:
+        if not os.path.isdir(self.root): return []
+        return sorted(d for d in os.listdir(self.root) if os.path.exists(os.path.join(self.root, d, "schema.json")))
+
+    def _open_schema(self, name: str):
+        with open(os.path.join(self.root, name, "schema.json")) as f:
+            meta = json.load(f)
+        self._dtypes[name] = np.dtype([tuple(x) for x in meta["fields"]])
+
+    def register(self, name: str, kind: str):
+        fields = KINDS[kind]
+        d = os.path.join(self.root, name)
+        meta_path = os.path.join(d, "schema.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                on_disk = [tuple(x) for x in json.load(f)["fields"]]
+            if on_disk != [tuple(x) for x in fields]:
+                raise ValueError(f"series {name!r} at {d} has layout {on_disk}, expected {kind}")
+        else:
+            os.makedirs(d, exist_ok=True)
+            with open(meta_path + ".tmp", "w") as f:
+                json.dump({"kind": kind, "fields": fields}, f)
+            os.replace(meta_path + ".tmp", meta_path)
+        self._dtypes[name] = np.dtype(fields)
+
+    @property
+    def names(self) -> list[str]:
+        return sorted(self._dtypes)
+
+    def dtype(self, name: str) -> np.dtype:
+        return self._dtypes[name]
+
+    def append(self, name: str, ts: float, *fields):
+        with self._lock:
+            a = self._appenders.get(name)
+            if a is None:
+                a = self._appenders[name] = _Appender(os.path.join(self.root, name), self._dtypes[name])
+            rolled = a.day is not None and a.day != _day(max(ts, a.last_ts))
+            a.append((ts, *fields))
+        if rolled and self.retention_days: self.prune()
+
+    def partitions(self, name: str) -> list[tuple[str, str]]:
+        """[(day, path)] in day order."""
+        d = os.path.join(self.root, name)
+        if not os.path.isdir(d): return []
+        return [(fn[:-4], os.path.join(d, fn)) for fn in sorted(os.listdir(d)) if fn.endswith(".bin")]
+
+    def scan(self, name: str, since: Optional[float] = None, until: Optional[float] = None) -> np.ndarray:
+        """Records with since <= ts < until, as one structured array (a copy: safe after the files change)."""
+        dt = self._dtypes[name]
+        lo_day = _day(since) if since is not None else None
+        hi_day = _day(until) if until is not None else None
+        parts = []
+        for day, path in self.partitions(name):
+            if (lo_day and day < lo_day) or (hi_day and day > hi_day): continue
+            n = os.path.getsize(path) // dt.itemsize
+            if not n: continue
+            mm = np.memmap(path, dt, mode="r", shape=(n,))
+            ts = mm["ts"]
+            i = int(np.searchsorted(ts, since, "left")) if since is not None else 0
+            j = int(np.searchsorted(ts, until, "left")) if until is not None else n
+            if j > i: parts.append(np.array(mm[i:j]))
+            del mm
+        return np.concatenate(parts) if parts else np.empty(0, dt)
+
+    def last(self, name: str, span: float, now: Optional[float] = None) -> np.ndarray:
+        now = time.time() if now is None else now
+        return self.scan(name, now - span, None)
+
+    def prune(self):
+        """Delete day partitions older than retention_days."""
+        if not self.retention_days: return
+        cut = _day(time.time() - self.retention_days * 86_400)
+        for name in self.names:
+            for day, path in self.partitions(name):
+                if day < cut:
+                    try: os.remove(path)
+                    except OSError as e: LOG.warning(json.dumps({"warn": "series_prune_failed", "path": path, "error": str(e)}))
+
+    def close(self):
+        with self._lock:
+            for a in self._appenders.values(): a.close()
+            self._appenders.clear()
+
+    # ── price queries ──────────────────────────────────────────────────────
+    def twap(self, name: str, span: float, min_samples: int = 1, now: Optional[float] = None) -> Optional[float]:
+        r = self.last(name, span, now)
+        if len(r) < min_samples: return None
+        return twap(r["ts"], r["value"])
+
+    def volatility(self, name: str, span: float, step: float, now: Optional[float] = None) -> Optional[float]:
+        r = self.last(name, span, now)
+        return realized_vol(r["ts"], r["value"], step)
+
+# ────────────────────────────────────────────────────────────────────────────
+# Query helpers (NumPy arrays in, NumPy arrays out)
+# ────────────────────────────────────────────────────────────────────────────
+def resample(ts: np.ndarray, x: np.ndarray, step: float, how: str = "last", fill: bool = False) -> tuple[np.ndarray, np.ndarray]:
+    """Bucket into step-second bins (bin start, value); how ∈ last | first | mean | min | max | sum | count.
+    Empty bins are omitted, or carried forward from the previous bin with fill."""
+    if not len(ts): return np.empty(0), np.empty(0)
+    b = np.floor(ts / step).astype(np.int64)
+    keys, idx = np.unique(b, return_index=True)   # ts is sorted, so each bin is one contiguous run
+    x = np.asarray(x, dtype=np.float64)
+    if how == "last":    v = x[np.r_[idx[1:] - 1, len(x) - 1]]
+    elif how == "first": v = x[idx]
+    elif how == "count": v = np.diff(np.r_[idx, len(x)]).astype(np.float64)
+    elif how == "sum":   v = np.add.reduceat(x, idx)
+    elif how == "mean":  v = np.add.reduceat(x, idx) / np.diff(np.r_[idx, len(x)])
+    elif how == "min":   v = np.minimum.reduceat(x, idx)
+    elif how == "max":   v = np.maximum.reduceat(x, idx)
+    else: raise ValueError(f"unknown aggregation {how!r}")
+    if fill and len(keys) > 1:
+        full = np.arange(keys[0], keys[-1] + 1)
+        pos = np.searchsorted(keys, full, "right") - 1
+        keys, v = full, v[pos]
+    return keys * step, v
+
+def rolling_mean(x: np.ndarray, n: int) -> np.ndarray:
+    """Mean of each n-sample window ending at i (NaN for the first n-1)."""
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(len(x), np.nan)
+    if n < 1 or len(x) < n: return out
+    c = np.cumsum(np.r_[0.0, x])
+    out[n - 1:] = (c[n:] - c[:-n]) / n
+    return out
+
+def rolling_std(x: np.ndarray, n: int) -> np.ndarray:
+    """Sample stdev of each n-sample window ending at i (NaN for the first n-1)."""
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(len(x), np.nan)
+    if n < 2 or len(x) < n: return out
+    x0 = x - x[0]   # shift for numerical stability of the running sums
+    c, c2 = np.cumsum(np.r_[0.0, x0]), np.cumsum(np.r_[0.0, x0 * x0])
+    s, s2 = c[n:] - c[:-n], c2[n:] - c2[:-n]
+    out[n - 1:] = np.sqrt(np.maximum(0.0, (s2 - s * s / n) / (n - 1)))
+    return out
+
+def twap(ts: np.ndarray, px: np.ndarray, until: Optional[float] = None) -> Optional[float]:
+    """Time-weighted average of a step function (sample i holds until sample i+1, the last until `until`)."""
+    if not len(ts): return None
+    end = ts[-1] if until is None else max(until, ts[-1])
+    dur = end - ts[0]
+    if dur <= 0: return float(px[-1])
+    w = np.diff(np.r_[ts, end])
+    return float(np.dot(w, px) / dur)
+
+def realized_vol(ts: np.ndarray, px: np.ndarray, step: float, min_points: int = 3) -> Optional[float]:
+    """Stdev of log returns between step-second closes; None with fewer than min_points closes."""
+    _, closes = resample(ts, px, step, "last")
+    closes = closes[closes > 0]
+    if len(closes) < max(3, min_points): return None
+    return float(np.std(np.diff(np.log(closes)), ddof=1))
+
+# ────────────────────────────────────────────────────────────────────────────
+# CLI: exports for Grafana (CSV / JSON datasource) and quick inspection
+# ────────────────────────────────────────────────────────────────────────────
+def parse_when(s: Optional[str]) -> Optional[float]:
+    """unix seconds or an ISO date / datetime (UTC)."""
+    if s is None: return None
+    try: return float(s)
+    except ValueError: return datetime.fromisoformat(s).replace(tzinfo=timezone.utc).timestamp()
+
+def _cell(v):
+    if isinstance(v, bytes): return v.decode().rstrip("\x00")
+    if isinstance(v, np.generic): return v.item()
+    return v
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Inspect / export the treasury_bot time-series store")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    i = sub.add_parser("info", help="series, partitions and record counts")
+    i.add_argument("root")
+    e = sub.add_parser("export", help="records (or a resampled field) as CSV or JSON")
+    e.add_argument("root"); e.add_argument("series")
+    e.add_argument("--since", help="unix seconds or YYYY-MM-DD[THH:MM]"); e.add_argument("--until")
+    e.add_argument("--step", type=float, default=0, help="resample to this many seconds (price series: value)")
+    e.add_argument("--field", default="value"); e.add_argument("--how", default="last")
+    e.add_argument("--format", choices=("csv", "json"), default="csv")
+    a = ap.parse_args(argv)
+    store = SeriesStore(a.root)
+    if a.cmd == "info":
+        for name in store.names:
+            parts = store.partitions(name)
+            n = sum(os.path.getsize(p) // store.dtype(name).itemsize for _, p in parts)
+            print(json.dumps({"series": name, "records": n, "days": len(parts), "record_bytes": store.dtype(name).itemsize,
+                              "first_day": parts[0][0] if parts else None, "last_day": parts[-1][0] if parts else None}))
+        return 0
+    r = store.scan(a.series, parse_when(a.since), parse_when(a.until))
+    if a.step:
+        t, v = resample(r["ts"], r[a.field], a.step, a.how)
+        cols, rows = ["ts", a.field], zip(t.tolist(), v.tolist())
+    else:
+        cols, rows = list(r.dtype.names), ([_cell(x) for x in rec] for rec in r)
+    if a.format == "json":
+        json.dump([dict(zip(cols, row)) for row in rows], sys.stdout)
+        print()
+    else:
+        print(",".join(cols))
+        for row in rows: print(",".join(str(x) for x in row))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# Token metadata cache: mint → decimals.
+# The Raydium token list is many MB; we stream-parse it once, keep only the
+# mint→decimals index, and persist that index to disk so restarts and every
+# quote afterwards are an in-memory dict lookup.
+import os, re, json, time, codecs, logging, threading
+from typing import Callable, Iterable, Optional
+
+import requests
+
+LOG = logging.getLogger("treasury_bot")
+
+# ────────────────────────────────────────────────────────────────────────────
+# Streaming parse of the token list
+# ────────────────────────────────────────────────────────────────────────────
+_JSON_STRUCT = re.compile(r'[{}"\\]')
+
+def iter_token_objects(chunks: Iterable) -> Iterable[dict]:
+    """Yield every depth-2 JSON object ({...} inside the top-level lists) from a chunked stream."""
+    dec = codecs.getincrementaldecoder("utf-8")()
+    depth, in_str, skip = 0, False, 0
+    parts, start = [], None
+    for raw in chunks:
+        text = dec.decode(raw) if isinstance(raw, (bytes, bytearray)) else raw
+        if not text:
+            continue
+        for m in _JSON_STRUCT.finditer(text, min(skip, len(text))):
+            c, i = m.group(), m.start()
+            if i < skip:
+                continue  # escaped char
+            if in_str:
+                if c == "\\": skip = i + 2
+                elif c == '"': in_str = False
+                continue
+            if c == '"':
+                in_str = True
+            elif c == "{":
+                depth += 1
+                if depth == 2: start = i
+            elif c == "}":
+                if depth == 2 and start is not None:
+                    parts.append(text[start:i + 1])
+                    try:
+                        yield json.loads("".join(parts))
+                    except ValueError:
+                        pass
+                    parts, start = [], None
+                depth -= 1
+        if start is not None:
+            parts.append(text[start:]); start = 0
+        skip = max(0, skip - len(text))
+
+def build_decimals_index(chunks: Iterable) -> dict[str, int]:
+    idx = {}
+    for t in iter_token_objects(chunks):
+        mint, decimals = t.get("mint"), t.get("decimals")
+        if isinstance(mint, str) and decimals is not None:
+            try:
+                idx[mint] = int(decimals)
+            except (TypeError, ValueError):
+                pass
+    return idx
+
+# ────────────────────────────────────────────────────────────────────────────
+# Cache
+# ────────────────────────────────────────────────────────────────────────────
+class TokenMetaCache:
+    """mint → decimals with an on-disk snapshot.
+
+    Decimals are immutable, so a known mint is always answered from memory.
+    The TTL only decides when a *miss* may trigger a fresh token-list download;
+    mints missing from the list fall back to reading the mint account over RPC.
+    """
+
+    MISS_RETRY_SEC = 60
+
+    def __init__(self, tokens_url: str, path: str, ttl_sec: int,
+                 rpc_decimals: Optional[Callable[[str], int]] = None, http=requests):
+        self.tokens_url = tokens_url
+        self.path = path
+        self.ttl_sec = ttl_sec
+        self.rpc_decimals = rpc_decimals
+        self.http = http
+        self._lock = threading.Lock()
+        self._map: dict[str, int] = {}
+        self._fetched_at = 0.0
+        self._misses: dict[str, float] = {}
+        self._load_disk()
+
+    # ── persistence ────────────────────────────────────────────────────────
+    def _load_disk(self):
+        try:
+            with open(self.path) as f:
+                j = json.load(f)
+            self._map = {k: int(v) for k, v in j.get("decimals", {}).items()}
+            self._fetched_at = float(j.get("fetched_at", 0))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            LOG.warning(json.dumps({"warn": "token_meta_load_failed", "path": self.path, "error": str(e)}))
+
+    def _save_disk(self):
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump({"fetched_at": self._fetched_at, "source": self.tokens_url, "decimals": self._map}, f)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            LOG.warning(json.dumps({"warn": "token_meta_save_failed", "path": self.path, "error": str(e)}))
+
+    # ── refresh ────────────────────────────────────────────────────────────
+    def expired(self) -> bool:
+        return time.time() - self._fetched_at > self.ttl_sec
+
+    def refresh(self) -> int:
+        """Stream the token list and replace the index. Returns number of mints indexed."""
+        t0 = time.monotonic()
+        with self.http.get(self.tokens_url, stream=True, timeout=30) as r:
+            r.raise_for_status()
+            idx = build_decimals_index(r.iter_content(chunk_size=1 << 16))
+        if not idx:
+            raise ValueError("token list parsed to an empty index")
+        with self._lock:
+            self._map.update(idx)
+            self._fetched_at = time.time()
+            self._misses.clear()
+            self._save_disk()
+        LOG.info(json.dumps({"info": "token_meta_refreshed", "mints": len(idx),
+                             "ms": int((time.monotonic() - t0) * 1000)}))
+        return len(idx)
+
+    # ── lookup ─────────────────────────────────────────────────────────────
+    def decimals(self, mint: str) -> Optional[int]:
+        d = self._map.get(mint)
+        if d is not None:
+            return d
+        with self._lock:
+            d = self._map.get(mint)
+            if d is not None:
+                return d
+            if time.time() - self._misses.get(mint, 0) < self.MISS_RETRY_SEC:
+                return None
+            self._misses[mint] = time.time()
+        if self.expired():
+            try:
+                self.refresh()
+            except Exception as e:
+                LOG.warning(json.dumps({"warn": "token_meta_refresh_failed", "error": str(e)}))
+                # don't retry the download on every miss while the endpoint is down
+                self._fetched_at = time.time() - self.ttl_sec + self.MISS_RETRY_SEC
+            d = self._map.get(mint)
+            if d is not None:
+                return d
+        if self.rpc_decimals:
+            try:
+                d = int(self.rpc_decimals(mint))
+            except Exception as e:
+                LOG.warning(json.dumps({"warn": "token_meta_rpc_failed", "mint": mint, "error": str(e)}))
+                return None
+            with self._lock:
+                self._map[mint] = d
+                self._misses.pop(mint, None)
+                self._save_disk()
+            return d
+        return None
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# Shared HTTP transport: one keep-alive session per host, per-endpoint timeouts,
+# bounded jittered retries for idempotent calls, a per-host circuit breaker
+# so a degraded Raydium/Jito fails the cycle fast instead of stalling it, and
+# token-bucket rate limits shared by groups of endpoints (e.g. all of Raydium).
+import json, time, random, logging, threading
+from dataclasses import dataclass
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+LOG = logging.getLogger("treasury_bot")
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+# ────────────────────────────────────────────────────────────────────────────
+# Circuit breaker
+# ────────────────────────────────────────────────────────────────────────────
+class CircuitBreaker:
+    """closed → (N consecutive failures) → open → (reset_after_sec) → half-open probe → closed/open."""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_after_sec: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_after_sec = reset_after_sec
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None: return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_after_sec: return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            st = self.state
+            if st == "closed": return True
+            if st == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures, self._opened_at, self._probing = 0, None, False
+
+    def release(self):
+        """Give back a half-open probe that ended without a verdict on the host."""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or (self._opened_at is None and self._failures >= self.failure_threshold):
+                LOG.warning(json.dumps({"warn": "circuit_open", "host": self.name, "failures": self._failures}))
+                self._opened_at, self._probing = time.monotonic(), False
+
+# ────────────────────────────────────────────────────────────────────────────
+# Rate limiter
+# ────────────────────────────────────────────────────────────────────────────
+class RateLimiter:
+    """Token bucket: `rate_per_sec` sustained, `burst` at once. acquire() reserves a token and
+    sleeps until it is due, so concurrent callers queue up in arrival order."""
+
+    def __init__(self, rate_per_sec: float, burst: int = 1):
+        self.rate = rate_per_sec
+        self.burst = max(1, burst)
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._at = time.monotonic()
+
+    def acquire(self) -> float:
+        """Take one token; returns the seconds spent waiting for it."""
+        if self.rate <= 0: return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._at) * self.rate)
+            self._at = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait: time.sleep(wait)
+        return wait
+
+# ────────────────────────────────────────────────────────────────────────────
+# Transport
+# ────────────────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class Endpoint:
+    name: str
+    timeout: float = 10.0
+    retries: int = 0          # extra attempts; only set >0 for idempotent calls
+    limiter: Optional[RateLimiter] = None   # shared by every endpoint of one upstream API
+
+class HttpTransport:
+    def __init__(self, pool_maxsize: int = 16, backoff_base_sec: float = 0.2, backoff_max_sec: float = 2.0,
+                 breaker_failures: int = 5, breaker_reset_sec: float = 30.0, observer: Optional[Callable] = None):
+        # observer(event, host, endpoint, seconds=0.0, outcome="ok"); event ∈ attempt | retry | rejected | throttled
+        self.observer = observer or (lambda *a, **kw: None)
+        self.pool_maxsize = pool_maxsize
+        self.backoff_base_sec = backoff_base_sec
+        self.backoff_max_sec = backoff_max_sec
+        self.breaker_failures = breaker_failures
+        self.breaker_reset_sec = breaker_reset_sec
+        self._lock = threading.Lock()
+        self._sessions: dict[str, requests.Session] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._endpoints: dict[str, Endpoint] = {"default": Endpoint("default", timeout=10.0, retries=1)}
+
+    def register(self, name: str, timeout: float, retries: int = 0, limiter: Optional[RateLimiter] = None) -> Endpoint:
+        ep = self._endpoints[name] = Endpoint(name, timeout, retries, limiter)
+        return ep
+
+    def session(self, host: str) -> requests.Session:
+        s = self._sessions.get(host)
+        if s is None:
+            with self._lock:
+                s = self._sessions.get(host)
+                if s is None:
+                    s = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, max_retries=0)
+                    s.mount("https://", adapter); s.mount("http://", adapter)
+                    self._sessions[host] = s
+        return s
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        b = self._breakers.get(host)
+        if b is None:
+            with self._lock:
+                b = self._breakers.setdefault(host, CircuitBreaker(host, self.breaker_failures, self.breaker_reset_sec))
+        return b
+
+    def _backoff(self, attempt: int) -> float:
+        # "full jitter": uniform in [0, min(max, base·2^attempt)]
+        return random.uniform(0, min(self.backoff_max_sec, self.backoff_base_sec * (2 ** attempt)))
+
+    def request(self, method: str, url: str, endpoint: str = "default", **kw) -> requests.Response:
+        ep = self._endpoints.get(endpoint) or self._endpoints["default"]
+        host = urlsplit(url).netloc
+        br = self.breaker(host)
+        kw.setdefault("timeout", ep.timeout)
+        attempt = 0
+        while True:
+            if not br.allow():
+                self.observer("rejected", host, ep.name, outcome="circuit_open")
+                raise CircuitOpenError(f"circuit open for {host} ({ep.name})")
+            if ep.limiter:   # every attempt (retries included) spends a token
+                waited = ep.limiter.acquire()
+                if waited: self.observer("throttled", host, ep.name, waited)
+            t0 = time.perf_counter()
+            try:
+                r = self.session(host).request(method, url, **kw)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.observer("attempt", host, ep.name, time.perf_counter() - t0, type(e).__name__)
+                br.record_failure()
+                if attempt >= ep.retries: raise
+                why = type(e).__name__
+            except requests.RequestException as e:
+                self.observer("attempt", host, ep.name, time.perf_counter() - t0, type(e).__name__)
+                br.record_failure()   # not retried, but still settles a half-open probe
+                raise
+            except BaseException:
+                br.release()          # not the host's doing (bad arguments, interrupt): the next call may probe
+                raise
+            else:
+                ok = r.status_code < 400
+                self.observer("attempt", host, ep.name, time.perf_counter() - t0, "ok" if ok else f"http_{r.status_code}")
+                if r.status_code not in RETRYABLE_STATUS:
+                    br.record_success()
+                    return r
+                br.record_failure()
+                if attempt >= ep.retries: return r  # caller's raise_for_status surfaces it
+                why = f"http_{r.status_code}"
+                r.close()
+            delay = self._backoff(attempt)
+            self.observer("retry", host, ep.name)
+            LOG.warning(json.dumps({"warn": "http_retry", "endpoint": ep.name, "host": host,
+                                    "attempt": attempt + 1, "reason": why, "sleep_ms": int(delay * 1000)}))
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, url: str, endpoint: str = "default", **kw) -> requests.Response:
+        return self.request("GET", url, endpoint=endpoint, **kw)
+
+    def post(self, url: str, endpoint: str = "default", **kw) -> requests.Response:
+        return self.request("POST", url, endpoint=endpoint, **kw)
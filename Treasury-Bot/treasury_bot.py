@@ -1,10 +1,12 @@
 #!/usr/bin/env python3
-import os, time, json, math, base64, logging, requests, ast, sqlite3, statistics
-from dataclasses import dataclass
-from decimal import Decimal
+import os, sys, time, json, math, base64, signal, logging, ast, statistics, threading, contextvars
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from decimal import Decimal, ROUND_DOWN
 from base58 import b58decode
 from dotenv import load_dotenv
-from typing import Optional
+from typing import Optional, Union
 
 from prometheus_client import start_http_server, Gauge, Counter
 
@@ -13,15 +15,36 @@ from solders.keypair import Keypair
 from solders.pubkey import Pubkey
 from solders.transaction import VersionedTransaction
 
+from token_meta import TokenMetaCache
+from transport import HttpTransport, RateLimiter
+from balances import BalanceReader
+from price_ring import PriceSampler
+from timeseries import SeriesStore, SERIES, realized_vol, resample, twap as time_weighted
+from pool_math import PoolBook
+from quote_cache import QuoteCache
+from state_store import StateStore
+from executor import TxExecutor, ExecResult, Submission, LANDED
+from standby import FeeOracle, Standby, OrderSpec
+from notifier import Notifier, RateLimited
+from routing import Route, Fill, Plan, routes, choose as choose_route
+from slicer import Slicer, ParentOrder, ChildPlan, ChildFill, MODES as SLICE_MODES
+from events import AccountStream, PoolPrice, Trigger
+from markets import Profile, Scheduler, load_profiles
+from instrument import TRACE_ID, MARKET_NAME, TraceFilter, new_trace, stage, http_observer, InstrumentedClient, H_QUOTE_LAND
+
 # ────────────────────────────────────────────────────────────────────────────
 # Env & Logging
 # ────────────────────────────────────────────────────────────────────────────
-load_dotenv()
+load_dotenv()   # local file only; everything that touches the network is built lazily (see AppContext)
 LOG = logging.getLogger("treasury_bot")
-logging.basicConfig(
-    level=(logging.DEBUG if os.getenv("DEBUG") else logging.INFO),
-    format="%(asctime)s %(levelname)s %(message)s"
-)
+
+def setup_logging():
+    logging.basicConfig(
+        level=(logging.DEBUG if os.getenv("DEBUG") else logging.INFO),
+        format="%(asctime)s %(levelname)s %(message)s"
+    )
+
+LOG.addFilter(TraceFilter())   # every JSON line logged during a cycle carries its trace id (also the ledger `cycle`) and market
 
 def dbg(msg, **kw): LOG.debug(json.dumps({"dbg": msg, **kw}))
 def info(msg, **kw): LOG.info(json.dumps({"info": msg, **kw}))
@@ -29,7 +52,8 @@ def warn(msg, **kw): LOG.warning(json.dumps({"warn": msg, **kw}))
 def err(msg, **kw): LOG.error(json.dumps({"err": msg, **kw}))
 
 # ────────────────────────────────────────────────────────────────────────────
-# Config (env-driven)
+# Config (env-driven). Per-market settings below are the defaults for every
+# profile in MARKETS_CONFIG; without it they describe the one market.
 # ────────────────────────────────────────────────────────────────────────────
 RPC_URL            = os.getenv("RPC_URL")
 SWAP_HOST          = os.getenv("RAY_SWAP_HOST", "https://transaction-v1.raydium.io")
@@ -50,80 +74,340 @@ DAILY_MAX_BPS      = int(os.getenv("DAILY_MAX_BPS", "400"))
 TREASURY_GC_MIN    = Decimal(os.getenv("TREASURY_GC_MIN", "0"))
 VAULT_STABLE_MIN   = Decimal(os.getenv("VAULT_STABLE_MIN", "0"))
 PREFERRED_STABLE   = os.getenv("PREFERRED_STABLE", "USDC").upper()
+MARKET_NAME_DEFAULT = os.getenv("MARKET_NAME", "default")
+MARKETS_CONFIG     = os.getenv("MARKETS_CONFIG")            # JSON list of market profiles (see markets.py)
+MARKET_WORKERS     = int(os.getenv("MARKET_WORKERS", "0"))  # concurrent market cycles; 0 → one per market
+RAY_RATE_PER_SEC   = float(os.getenv("RAY_RATE_PER_SEC", "10"))  # whole process, all markets; 0 disables
+RAY_BURST          = int(os.getenv("RAY_BURST", "20"))
 
 MAX_PRICE_IMPACT_BPS = int(os.getenv("MAX_PRICE_IMPACT_BPS", "200"))
 MAX_SPOT_VS_TWAP_BPS = int(os.getenv("MAX_SPOT_VS_TWAP_BPS", "150"))
+IMPACT_MODEL         = os.getenv("IMPACT_MODEL", "local").lower()   # local (pool reserves) | quotes (paired live quotes)
+POOL_CACHE_SEC       = float(os.getenv("POOL_CACHE_SEC", "2"))      # ~5 slots
+MIN_TRADE_FRACTION   = Decimal(os.getenv("MIN_TRADE_FRACTION", "0.1"))  # don't shrink below this share of the intended size
 TWAP_SAMPLES          = int(os.getenv("TWAP_SAMPLES", "7"))
 TWAP_PAUSE_SEC        = float(os.getenv("TWAP_PAUSE_SEC", "1"))
+TWAP_SAMPLER          = os.getenv("TWAP_SAMPLER", "1") == "1"        # background sampler; burst TWAP is the fallback
+TWAP_WINDOW_SEC       = float(os.getenv("TWAP_WINDOW_SEC", "1800"))
+TWAP_SAMPLE_SEC       = float(os.getenv("TWAP_SAMPLE_SEC", "30"))
+TWAP_MIN_SAMPLES      = int(os.getenv("TWAP_MIN_SAMPLES", "10"))
+TWAP_RING_CAPACITY    = int(os.getenv("TWAP_RING_CAPACITY", "2880"))  # 24h @ 30s
+TWAP_SNAPSHOT_DIR     = os.getenv("TWAP_SNAPSHOT_DIR", "twap_rings")
+SERIES_STORE          = os.getenv("SERIES_STORE", "1") == "1"       # keep prices / quotes / impact / balances / fills on disk
+SERIES_DIR            = os.getenv("SERIES_DIR", "series")
+SERIES_RETENTION_DAYS = int(os.getenv("SERIES_RETENTION_DAYS", "365"))  # 0 keeps every day partition
+BAND_VOL_K            = float(os.getenv("BAND_VOL_K", "0"))           # >0: widen the band by K·σ of GC/USD (0 = fixed band)
+BAND_VOL_WINDOW_SEC   = float(os.getenv("BAND_VOL_WINDOW_SEC", str(24*60*60)))
+BAND_VOL_STEP_SEC     = float(os.getenv("BAND_VOL_STEP_SEC", "900"))  # σ of log returns between closes this far apart
+BAND_VOL_MIN_POINTS   = int(os.getenv("BAND_VOL_MIN_POINTS", "24"))   # closes needed before the band moves at all
+BAND_VOL_MAX_BPS      = int(os.getenv("BAND_VOL_MAX_BPS", "2000"))    # widen each edge by at most this
+BAND_VOL_CACHE_SEC    = float(os.getenv("BAND_VOL_CACHE_SEC", "60"))
+
+DISCOVERY_WORKERS     = int(os.getenv("DISCOVERY_WORKERS", "8"))       # per market
+BALANCES_DEADLINE_SEC = float(os.getenv("BALANCES_DEADLINE_SEC", "10"))
+QUOTE_DEADLINE_SEC    = float(os.getenv("QUOTE_DEADLINE_SEC", "15"))
+QUOTE_CACHE_MS        = int(os.getenv("QUOTE_CACHE_MS", "1500"))     # 0 disables caching (coalescing stays on)
+QUOTE_CACHE_SIZE      = int(os.getenv("QUOTE_CACHE_SIZE", "256"))
+BALANCE_CACHE_SEC     = float(os.getenv("BALANCE_CACHE_SEC", "2"))
 
 JITO_URL          = os.getenv("JITO_URL")  # e.g., https://ny.mainnet.block-engine.jito.wtf
 JITO_AUTH         = os.getenv("JITO_AUTH")
+JITO_TIP_LAMPORTS = int(os.getenv("JITO_TIP_LAMPORTS", "10000"))   # bundles only; 0 sends bundles without a tip
+JITO_TIP_ACCOUNT  = os.getenv("JITO_TIP_ACCOUNT", "96gYZGLnJYVFmbjzopPSU6QiEV5fGqZNyN9nmNhvrZU5")
+CONFIRM_POLL_SEC    = float(os.getenv("CONFIRM_POLL_SEC", "0.4"))    # ~1 slot
+REBROADCAST_SEC     = float(os.getenv("REBROADCAST_SEC", "2"))
+CONFIRM_TIMEOUT_SEC = float(os.getenv("CONFIRM_TIMEOUT_SEC", "90")) # blockhash expiry (~60-90s) normally ends it first
+
+FEE_PERCENTILE      = float(os.getenv("FEE_PERCENTILE", "75"))      # of recent non-zero slot priority fees
+FEE_CACHE_SEC       = float(os.getenv("FEE_CACHE_SEC", "10"))
+FEE_MIN_MICROLAMPORTS = int(os.getenv("FEE_MIN_MICROLAMPORTS", "5000"))
+FEE_MAX_MICROLAMPORTS = int(os.getenv("FEE_MAX_MICROLAMPORTS", "2000000"))
+STANDBY             = os.getenv("STANDBY", "1") == "1"              # pre-build the next likely order near a band edge
+STANDBY_NEAR_BPS    = int(os.getenv("STANDBY_NEAR_BPS", "100"))     # "near": within this of an edge (or past it)
+STANDBY_REFRESH_SEC = float(os.getenv("STANDBY_REFRESH_SEC", "3"))
+STANDBY_MAX_AGE_SEC = float(os.getenv("STANDBY_MAX_AGE_SEC", "30")) # rebuild with a fresh blockhash after this
+STANDBY_REPRICE_BPS = int(os.getenv("STANDBY_REPRICE_BPS", "30"))   # rebuild / refuse if price moved more than this
+
+SLICE_MODE          = os.getenv("SLICE_MODE", "impact").lower()     # off | impact (only trades the pool can't take at once) | twap
+SLICE_CHILDREN      = int(os.getenv("SLICE_CHILDREN", "8"))         # twap: children per parent; impact: at most this many
+SLICE_INTERVAL_SEC  = float(os.getenv("SLICE_INTERVAL_SEC", "60"))  # between children: lets arbitrage refill the pool
+SLICE_MAX_FAILURES  = int(os.getenv("SLICE_MAX_FAILURES", "3"))
+SLICE_MAX_AGE_SEC   = float(os.getenv("SLICE_MAX_AGE_SEC", str(6*60*60)))
+
+ROUTE_SELECT        = os.getenv("ROUTE_SELECT", "1") == "1"         # quote GC↔USDC / GC↔USDT / via SOL and take the best
+ROUTE_SPLITS        = tuple(float(x) for x in os.getenv("ROUTE_SPLITS", "0.25,0.5,0.75").split(",") if x.strip())  # "" disables splits
+ROUTE_SPLIT_MIN_BPS = float(os.getenv("ROUTE_SPLIT_MIN_BPS", "5"))  # a split must beat the best single route by this
+ROUTE_CU_PER_SWAP   = int(os.getenv("ROUTE_CU_PER_SWAP", "250000")) # compute units priced per swap tx when comparing routes
+
+# Telegram notifications (sent off the trading path by a background worker)
+TG_QUEUE_MAX        = int(os.getenv("TG_QUEUE_MAX", "100"))         # beyond this the oldest are dropped (and counted)
+TG_BATCH_SEC        = float(os.getenv("TG_BATCH_SEC", "2"))         # messages this close together go out as one digest
+TG_MIN_INTERVAL_SEC = float(os.getenv("TG_MIN_INTERVAL_SEC", "1"))  # pacing between sends to one chat
+TG_FLUSH_SEC        = float(os.getenv("TG_FLUSH_SEC", "10"))        # shutdown waits this long for the queue to drain
+
+EVENT_MODE          = os.getenv("EVENT_MODE", "0") == "1"           # websocket-triggered cycles instead of CHECK_INTERVAL
+WS_URL              = os.getenv("WS_URL")                           # default: RPC_URL with http(s) → ws(s)
+EVENT_MOVE_BPS      = float(os.getenv("EVENT_MOVE_BPS", "50"))      # re-run when GC/USD moved this much since the last run
+EVENT_DEBOUNCE_SEC  = float(os.getenv("EVENT_DEBOUNCE_SEC", "2"))
+SAFETY_POLL_SEC     = float(os.getenv("SAFETY_POLL_SEC", "900"))    # run anyway if nothing fired for this long
 
 METRICS_PORT      = int(os.getenv("METRICS_PORT", "9108"))
+STATE_DB          = os.getenv("STATE_DB", "treasury_state.sqlite")
+
+TOKEN_META_PATH    = os.getenv("TOKEN_META_PATH", "token_meta.json")
+TOKEN_META_TTL_SEC = int(os.getenv("TOKEN_META_TTL_SEC", str(24*60*60)))
+
+HTTP_POOL_MAXSIZE  = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))
+HTTP_BACKOFF_SEC   = float(os.getenv("HTTP_BACKOFF_SEC", "0.2"))
+BREAKER_FAILURES   = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET_SEC  = float(os.getenv("BREAKER_RESET_SEC", "30"))
+RAY_QUOTE_TIMEOUT_SEC = float(os.getenv("RAY_QUOTE_TIMEOUT_SEC", "4"))  # ×3 attempts stays inside QUOTE_DEADLINE_SEC
+
+# ────────────────────────────────────────────────────────────────────────────
+# Application context: shared clients and caches, built on first use
+# ────────────────────────────────────────────────────────────────────────────
+class lazy:
+    """cached_property that builds at most once even when first touched from several threads."""
+    def __init__(self, fn):
+        self.fn = fn
+        self.__doc__ = fn.__doc__
+    def __set_name__(self, owner, name):
+        self.name = name
+    def __get__(self, obj, owner=None):
+        if obj is None: return self
+        with obj._init_lock:
+            if self.name not in obj.__dict__:
+                obj.__dict__[self.name] = self.fn(obj)
+        return obj.__dict__[self.name]   # later reads hit the instance dict, no lock
+
+class AppContext:
+    """Importing the module builds nothing: no RPC client, wallet, metrics server, SQLite or token list.
+    Each piece below is created the first time a cycle (or tool) needs it and then reused."""
+
+    def __init__(self):
+        self._init_lock = threading.RLock()
+        self._metrics_port: Optional[int] = None
+
+    @lazy
+    def profiles(self) -> list[Profile]:
+        profiles = load_profiles(MARKETS_CONFIG, {
+            "name": MARKET_NAME_DEFAULT, "gc_mint": GC_MINT, "usdc_mint": USDC_MINT, "usdt_mint": USDT_MINT,
+            "wallet_env": "WALLET_SECRET", "band_usd_lower": BAND_USD_LOWER, "band_usd_upper": BAND_USD_UPPER,
+            "cap_bps": CAP_BPS, "daily_max_bps": DAILY_MAX_BPS, "treasury_gc_min": TREASURY_GC_MIN,
+            "vault_stable_min": VAULT_STABLE_MIN, "preferred_stable": PREFERRED_STABLE, "check_interval_sec": CHECK_INTERVAL,
+            "slippage_bps": SLIPPAGE_BPS, "max_price_impact_bps": MAX_PRICE_IMPACT_BPS,
+            "max_spot_vs_twap_bps": MAX_SPOT_VS_TWAP_BPS, "state_db": STATE_DB, "snapshot_dir": TWAP_SNAPSHOT_DIR,
+            "series_dir": SERIES_DIR,
+        })
+        assert all([RPC_URL, SOL_MINT]), "Missing required env"
+        assert all(p.gc_mint and p.usdc_mint and p.usdt_mint for p in profiles), "Missing mint for a market"
+        return profiles
+
+    @lazy
+    def markets(self) -> list["Market"]:
+        return [Market(p) for p in self.profiles]
+
+    @lazy
+    def client(self):
+        assert RPC_URL, "Missing required env"
+        return InstrumentedClient(Client(RPC_URL), RPC_URL)   # per-method RPC latency / error metrics
+
+    @lazy
+    def http(self) -> HttpTransport:
+        # Pooled keep-alive HTTP for Raydium / Jito / Telegram. Retries only where the call is idempotent
+        # (quotes, fee reads, tx building, re-sending an already-signed tx); Telegram posts are not retried.
+        http = HttpTransport(pool_maxsize=HTTP_POOL_MAXSIZE, backoff_base_sec=HTTP_BACKOFF_SEC,
+                             breaker_failures=BREAKER_FAILURES, breaker_reset_sec=BREAKER_RESET_SEC,
+                             observer=http_observer)
+        ray = RateLimiter(RAY_RATE_PER_SEC, RAY_BURST)   # one budget for every market's Raydium traffic
+        http.register("ray_quote", timeout=RAY_QUOTE_TIMEOUT_SEC, retries=2, limiter=ray)
+        http.register("ray_fee",   timeout=5,  retries=1, limiter=ray)
+        http.register("ray_build", timeout=20, retries=1, limiter=ray)
+        http.register("ray_pools", timeout=5,  retries=2, limiter=ray)
+        http.register("jito_send", timeout=10, retries=2)
+        http.register("rpc_send",  timeout=10, retries=2)
+        http.register("rpc_status", timeout=5, retries=1)
+        http.register("rpc_fee",   timeout=5,  retries=1)
+        http.register("telegram",  timeout=5,  retries=0)
+        return http
+
+    @lazy
+    def token_meta(self) -> TokenMetaCache:
+        # warm-starts from the TOKEN_META_PATH snapshot: known mints never wait on the token list
+        return TokenMetaCache(TOKENS_URL, TOKEN_META_PATH, TOKEN_META_TTL_SEC, rpc_decimals=_rpc_mint_decimals, http=self.http)
+
+    @lazy
+    def quotes(self) -> QuoteCache:
+        return QuoteCache(QUOTE_CACHE_MS / 1000, QUOTE_CACHE_SIZE, on_event=lambda kind: C_QUOTE_CACHE[kind].inc())
 
-assert all([RPC_URL, GC_MINT, USDC_MINT, USDT_MINT, SOL_MINT]), "Missing required env"
-client = Client(RPC_URL)
+    @lazy
+    def fees(self) -> FeeOracle:
+        return FeeOracle(_recent_priority_fees, _raydium_fee_high, pct=FEE_PERCENTILE, ttl_sec=FEE_CACHE_SEC,
+                         floor=FEE_MIN_MICROLAMPORTS, ceiling=FEE_MAX_MICROLAMPORTS)
 
-def _load_wallet():
-    raw = os.getenv("WALLET_SECRET")
-    assert raw, "WALLET_SECRET missing"
+    @lazy
+    def pools(self) -> PoolBook:
+        return PoolBook(self.http, API_V3, ttl_sec=POOL_CACHE_SEC)
+
+    @lazy
+    def notifier(self) -> Notifier:
+        n = Notifier(_tg_post, max_queue=TG_QUEUE_MAX, batch_sec=TG_BATCH_SEC, min_interval_sec=TG_MIN_INTERVAL_SEC,
+                     on_event=lambda kind: C_NOTIFY.labels(kind).inc())
+        n.start()
+        return n
+
+    @lazy
+    def pool(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=DISCOVERY_WORKERS * len(self.profiles), thread_name_prefix="discovery")
+
+    def start_metrics(self, port: int = METRICS_PORT):
+        with self._init_lock:
+            if self._metrics_port is None:
+                start_http_server(port)   # scrape with Prometheus; chart in Grafana. (client_python)
+                self._metrics_port = port
+
+    def close(self):
+        """Flush queued notifications; only touches what was actually built."""
+        n = self.__dict__.get("notifier")
+        if n is not None: n.stop(TG_FLUSH_SEC)
+
+APP = AppContext()
+
+def _load_wallet(env: str = "WALLET_SECRET"):
+    raw = os.getenv(env)
+    assert raw, f"{env} missing"
     if raw.strip().startswith("["):
         arr = ast.literal_eval(raw); return Keypair.from_bytes(bytes(arr))
     return Keypair.from_bytes(b58decode(raw))
-OWNER = _load_wallet()
-OWNER_PUB = OWNER.pubkey()
+
+# The market a cycle / worker runs for. Pipeline functions read their mints, wallet, band and
+# governor from cur(); Market.run() sets it, and callers that never set one get the first market.
+CURRENT = contextvars.ContextVar("market", default=None)
+
+def cur() -> "Market":
+    return CURRENT.get() or APP.markets[0]
 
 # ────────────────────────────────────────────────────────────────────────────
 # Prometheus metrics
 # ────────────────────────────────────────────────────────────────────────────
-G_PRICE_SOL_PER_GC = Gauge("price_sol_per_gc", "SOL per GC (spot)")
-G_SOL_PER_USDC     = Gauge("sol_usdc", "USDC per SOL (spot)")
-G_BAND_LOWER_SOL   = Gauge("band_lower_sol", "Lower band in SOL per GC")
-G_BAND_UPPER_SOL   = Gauge("band_upper_sol", "Upper band in SOL per GC")
-G_TREASURY_GC      = Gauge("treasury_gc", "Treasury GC balance")
-G_VAULT_USDC       = Gauge("vault_usdc", "Vault USDC balance")
-G_VAULT_USDT       = Gauge("vault_usdt", "Vault USDT balance")
-C_EXEC_BUY         = Counter("exec_buy_count", "Number of BUY executions")
-C_EXEC_SELL        = Counter("exec_sell_count", "Number of SELL executions")
-
-start_http_server(METRICS_PORT)  # scrape with Prometheus; chart in Grafana. (client_python) 
+# Per-market series carry a `market` label; caches, fees and transport metrics are process-wide.
+G_PRICE_SOL_PER_GC = Gauge("price_sol_per_gc", "SOL per GC (spot)", ["market"])
+G_SOL_PER_USDC     = Gauge("sol_usdc", "USDC per SOL (spot)", ["market"])
+G_TWAP_SOL_PER_GC  = Gauge("twap_sol_per_gc", "SOL per GC (TWAP over TWAP_WINDOW_SEC)", ["market"])
+G_VOL_SOL_PER_GC   = Gauge("vol_sol_per_gc", "Stdev of per-sample log returns of SOL/GC over TWAP_WINDOW_SEC", ["market"])
+G_BAND_LOWER_SOL   = Gauge("band_lower_sol", "Lower band in SOL per GC", ["market"])
+G_BAND_WIDEN_BPS   = Gauge("band_widen_bps", "How far each band edge is pushed out for GC/USD volatility (BAND_VOL_K)", ["market"])
+G_BAND_UPPER_SOL   = Gauge("band_upper_sol", "Upper band in SOL per GC", ["market"])
+G_TREASURY_GC      = Gauge("treasury_gc", "Treasury GC balance", ["market"])
+G_VAULT_USDC       = Gauge("vault_usdc", "Vault USDC balance", ["market"])
+G_VAULT_USDT       = Gauge("vault_usdt", "Vault USDT balance", ["market"])
+G_TREASURY_SOL     = Gauge("treasury_sol", "Treasury SOL balance (fees / wrap)", ["market"])
+G_BALANCE_SLOT     = Gauge("balance_slot", "Context slot of the last balance snapshot", ["market"])
+C_EXEC_BUY         = Counter("exec_buy_count", "Number of BUY executions", ["market"])
+C_EXEC_SELL        = Counter("exec_sell_count", "Number of SELL executions", ["market"])
+C_QUOTE_CACHE      = {
+    "hit":       Counter("quote_cache_hit_count", "Raydium quotes served from the cache"),
+    "miss":      Counter("quote_cache_miss_count", "Raydium quotes fetched from the API"),
+    "coalesced": Counter("quote_cache_coalesced_count", "Raydium quotes that joined an identical in-flight request"),
+}
+C_STANDBY          = {
+    "built": Counter("standby_built_count", "Orders pre-built by the standby worker", ["market"]),
+    "hit":   Counter("standby_hit_count", "Executions that used the pre-built order", ["market"]),
+    "miss":  Counter("standby_miss_count", "Executions whose pre-built order no longer matched", ["market"]),
+    "empty": Counter("standby_empty_count", "Executions with no pre-built order ready", ["market"]),
+}
+G_PRIORITY_FEE     = Gauge("priority_fee_microlamports", "Compute unit price used for swaps")
+C_ROUTE            = Counter("route_chosen_count", "Trades by chosen route (splits as route:share+route:share)", ["market", "route"])
+G_ROUTE_ADVANTAGE  = Gauge("route_advantage_out", "Net output (UI units) the chosen route beat the best alternative by", ["market"])
+G_ROUTE_ADVANTAGE_BPS = Gauge("route_advantage_bps", "Net output advantage of the chosen route over the best alternative", ["market"])
+C_SLICE            = Counter("slice_event_count", "Sliced executions: parents opened, children landed / failed, parent outcomes",
+                             ["market", "event"])
+C_NOTIFY           = Counter("telegram_notify_count", "Telegram notifications: queued, sent, dropped, rate_limited, retry, failed",
+                             ["event"])
 
 # ────────────────────────────────────────────────────────────────────────────
 # Telegram (push debug)
 # ────────────────────────────────────────────────────────────────────────────
 TG_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TG_CHAT  = os.getenv("TELEGRAM_CHAT_ID")
+def _tg_post(text: str):
+    r = APP.http.post(
+        f"https://api.telegram.org/bot{TG_TOKEN}/sendMessage",
+        json={"chat_id": TG_CHAT, "text": text},
+        endpoint="telegram"
+    )
+    if r.status_code == 429:
+        try: retry_after = float(r.json().get("parameters", {}).get("retry_after", 1))
+        except ValueError: retry_after = 1.0
+        raise RateLimited(retry_after)
+    r.raise_for_status()
+
 def tg_send(text: str):
+    """Queue a notification; never waits on Telegram (APP.notifier sends it)."""
     if not (TG_TOKEN and TG_CHAT): return
+    if len(APP.markets) > 1: text = text.replace("[TreasuryBot]", f"[TreasuryBot:{cur().name}]", 1)
+    APP.notifier.notify(text)
+
+# ────────────────────────────────────────────────────────────────────────────
+# History: append-only time-series store (timeseries.py), one per market
+# ────────────────────────────────────────────────────────────────────────────
+def record_series(series: str, *fields, ts: Optional[float] = None):
+    """Append one record for the current market; a disk problem is logged, never raised into a cycle."""
+    s = cur().series
+    if s is None: return
     try:
-        requests.post(
-            f"https://api.telegram.org/bot{TG_TOKEN}/sendMessage",
-            json={"chat_id": TG_CHAT, "text": text},
-            timeout=5
-        )
+        s.append(series, time.time() if ts is None else ts, *fields)
     except Exception as e:
-        warn("telegram_send_failed", error=str(e))
+        warn("series_append_failed", series=series, error=str(e))
+
+def _gc_usd_closes(span: float, step: float) -> tuple:
+    """(bin ts, GC/USD) from the recorded SOL/GC and SOL/USDC samples, step-second closes present in both."""
+    s, now = cur().series, time.time()
+    a, b = s.last("sol_per_gc", span, now), s.last("sol_usdc", span, now)
+    ta, va = resample(a["ts"], a["value"], step)
+    tb, vb = resample(b["ts"], b["value"], step)
+    t, ia, ib = np.intersect1d(ta, tb, return_indices=True)
+    return t, va[ia] / vb[ib]
+
+def band_usd() -> tuple[Decimal, Decimal]:
+    """The market's USD band; with BAND_VOL_K each edge moves out by K·σ of GC/USD over BAND_VOL_WINDOW_SEC
+    (σ per BAND_VOL_STEP_SEC close, scaled to the check interval), capped at BAND_VOL_MAX_BPS."""
+    m = cur()
+    p = m.p
+    if BAND_VOL_K <= 0 or m.series is None: return p.band_usd_lower, p.band_usd_upper
+    c = m.band_cache
+    if c and c[0] is p and time.monotonic() - c[1] < BAND_VOL_CACHE_SEC: return c[2]
+    widen = 0.0
+    try:
+        t, px = _gc_usd_closes(BAND_VOL_WINDOW_SEC, BAND_VOL_STEP_SEC)
+        sigma = realized_vol(t, px, BAND_VOL_STEP_SEC, min_points=BAND_VOL_MIN_POINTS)
+        if sigma is not None:
+            horizon = max(p.check_interval_sec, BAND_VOL_STEP_SEC) / BAND_VOL_STEP_SEC
+            widen = min(BAND_VOL_MAX_BPS / 10_000, BAND_VOL_K * sigma * math.sqrt(horizon))
+    except Exception as e:
+        warn("band_vol_failed", error=str(e))
+    w = Decimal(str(round(widen, 6)))
+    band = (p.band_usd_lower * (1 - w), p.band_usd_upper * (1 + w))
+    G_BAND_WIDEN_BPS.labels(m.name).set(widen * 10_000)
+    m.band_cache = (p, time.monotonic(), band)
+    return band
 
 # ────────────────────────────────────────────────────────────────────────────
 # Token metadata
 # ────────────────────────────────────────────────────────────────────────────
-def get_token_decimals(mint: str) -> int:
-    try:
-        j = requests.get(TOKENS_URL, timeout=10).json()
-        all_tokens = (j.get("official", []) or []) + (j.get("unOfficial", []) or [])
-        for t in all_tokens:
-            if t.get("mint") == mint:
-                return int(t.get("decimals"))
-    except Exception:
-        pass
+def _rpc_mint_decimals(mint: str) -> int:
+    acc = APP.client.get_account_info(Pubkey.from_string(mint)).value
+    if acc is None: raise ValueError(f"mint account not found: {mint}")
+    return acc.data[44]  # SPL mint layout: authority option(36) + supply u64(8) → decimals u8
+
+def _default_decimals(mint: str) -> int:
     return 9 if mint == SOL_MINT else 6
 
-DECIMALS = {
-    "GC":  get_token_decimals(GC_MINT),
-    "USDC":get_token_decimals(USDC_MINT),
-    "USDT":get_token_decimals(USDT_MINT),
-    "SOL": get_token_decimals(SOL_MINT),
-}
+def get_token_decimals(mint: str) -> int:
+    d = APP.token_meta.decimals(mint)  # memory → disk snapshot → streamed token list → mint account
+    if d is not None: return d
+    return _default_decimals(mint)
+
 def to_base(amount: Decimal, decimals: int) -> int:
     return int((amount * (10 ** decimals)).quantize(Decimal(1)))
 def from_base(ui: int, decimals: int) -> Decimal:
@@ -132,46 +416,82 @@ def from_base(ui: int, decimals: int) -> Decimal:
 # ────────────────────────────────────────────────────────────────────────────
 # Raydium Trade API (quote & build)
 # ────────────────────────────────────────────────────────────────────────────
-def ray_compute_swap_base_in(input_mint: str, output_mint: str, ui_amount: Decimal):
+@dataclass(frozen=True)
+class Quote:
+    resp: dict        # raw compute/swap-base-in response (fed back to transaction/swap-base-in)
+    out_amount: int   # parsed once, base units of the output mint
+    in_amount: int = 0
+    fetched_at: float = 0.0   # time.monotonic() when the API answered
+
+@stage("quote")
+def ray_quote(input_mint: str, output_mint: str, ui_amount: Decimal, fresh: bool = False) -> Quote:
     amt = to_base(ui_amount, get_token_decimals(input_mint))
-    url = f"{SWAP_HOST}/compute/swap-base-in"
     params = {
         "inputMint": input_mint,
         "outputMint": output_mint,
         "amount": str(amt),
-        "slippageBps": str(SLIPPAGE_BPS),
+        "slippageBps": str(cur().p.slippage_bps),
         "txVersion": "V0",
     }
-    r = requests.get(url, params=params, timeout=15); r.raise_for_status()
-    return r.json()
+    def fetch():
+        t0 = time.monotonic()
+        r = APP.http.get(f"{SWAP_HOST}/compute/swap-base-in", params=params, endpoint="ray_quote"); r.raise_for_status()
+        j = r.json()
+        q = Quote(resp=j, out_amount=_extract_out_amount(j), in_amount=amt, fetched_at=time.monotonic())
+        m = cur()
+        m.store.record("quote", cycle=TRACE_ID.get(), input_mint=input_mint, output_mint=output_mint,
+                       in_amount=amt, out_amount=q.out_amount, latency_ms=int((q.fetched_at - t0) * 1000))
+        record_series("quote", m.labels.get(input_mint, input_mint[:4]), m.labels.get(output_mint, output_mint[:4]),
+                      amt, q.out_amount, int((q.fetched_at - t0) * 1000))
+        return q
+    # shared by every market: the same pair / size / slippage is one fetch whoever asks first
+    return APP.quotes.get_or_fetch((input_mint, output_mint, amt, params["slippageBps"]), fetch, fresh=fresh)
 
-def priority_fee_high() -> int:
+def ray_compute_swap_base_in(input_mint: str, output_mint: str, ui_amount: Decimal):
+    return ray_quote(input_mint, output_mint, ui_amount).resp
+
+def _recent_priority_fees() -> list[int]:
+    # solana-py has no getRecentPrioritizationFees; one raw JSON-RPC call (last ~150 slots)
+    r = APP.http.post(RPC_URL, json={"jsonrpc": "2.0", "id": 1, "method": "getRecentPrioritizationFees", "params": []},
+                  endpoint="rpc_fee")
+    r.raise_for_status()
+    return [int(x["prioritizationFee"]) for x in r.json()["result"]]
+
+def _raydium_fee_high() -> int:
     try:
-        r = requests.get(f"{API_V3}/fee/prioritization", timeout=5).json()
+        r = APP.http.get(f"{API_V3}/fee/prioritization", endpoint="ray_fee").json()
         return int(r["data"]["default"]["h"])
     except Exception:
         return 5_000  # micro-lamports per CU fallback
 
+@stage("priority_fee")
+def priority_fee_high() -> int:
+    fee = APP.fees.get()   # cached for FEE_CACHE_SEC; the standby worker keeps it warm
+    G_PRIORITY_FEE.set(fee)
+    return fee
+
+@stage("build")
 def ray_build_transactions(swap_resp, input_is_sol: bool, output_is_sol: bool,
                            input_account: Optional[str]=None, output_account: Optional[str]=None):
     payload = {
         "computeUnitPriceMicroLamports": str(priority_fee_high()),
         "swapResponse": swap_resp,
         "txVersion": "V0",
-        "wallet": str(OWNER_PUB),
+        "wallet": str(cur().owner_pub),
         "wrapSol": bool(input_is_sol),
         "unwrapSol": bool(output_is_sol),
     }
     if input_account:  payload["inputAccount"]  = input_account
     if output_account: payload["outputAccount"] = output_account
-    r = requests.post(f"{SWAP_HOST}/transaction/swap-base-in", json=payload, timeout=20)
+    r = APP.http.post(f"{SWAP_HOST}/transaction/swap-base-in", json=payload, endpoint="ray_build")
     r.raise_for_status()
     data = r.json()["data"]
     return [d["transaction"] for d in data]  # base64 strings  (Raydium Trade API)
 
 def _extract_out_amount(swap_resp) -> int:
+    if isinstance(swap_resp, Quote): return swap_resp.out_amount
     # Try common fields; otherwise scan for a big int
-    for path in [("data","outAmount"), ("outAmount",), ("otherAmountThreshold",), ("data","amountOut")]:
+    for path in [("data","outputAmount"), ("data","outAmount"), ("outAmount",), ("otherAmountThreshold",), ("data","amountOut")]:
         cur = swap_resp
         ok = True
         for k in path:
@@ -194,169 +514,277 @@ def _extract_out_amount(swap_resp) -> int:
 # Prices (Raydium quotes) + micro-TWAP
 # ────────────────────────────────────────────────────────────────────────────
 def sol_per_usdc() -> Decimal:
-    swap = ray_compute_swap_base_in(SOL_MINT, USDC_MINT, Decimal("1"))
-    out = _extract_out_amount(swap)
-    return from_base(out, DECIMALS["USDC"])  # USDC per SOL
+    m = cur()
+    out = ray_quote(SOL_MINT, m.usdc, Decimal("1")).out_amount
+    return from_base(out, m.decimals["USDC"])  # USDC per SOL
 
-def gc_per_sol_once() -> Decimal:
-    swap = ray_compute_swap_base_in(SOL_MINT, GC_MINT, Decimal("1"))
-    out = _extract_out_amount(swap)
-    return from_base(out, DECIMALS["GC"])    # GC per SOL
+def gc_per_sol_once(fresh: bool = False) -> Decimal:
+    m = cur()
+    out = ray_quote(SOL_MINT, m.gc, Decimal("1"), fresh=fresh).out_amount
+    return from_base(out, m.decimals["GC"])    # GC per SOL
 
-def sol_per_gc_spot() -> Decimal:
-    g_per_sol = gc_per_sol_once()
+def sol_per_gc_spot(fresh: bool = False) -> Decimal:
+    g_per_sol = gc_per_sol_once(fresh)
     return Decimal("0") if g_per_sol == 0 else (Decimal(1) / g_per_sol)
 
+@stage("twap")
+def _series_twap(series: str, span: float) -> Optional[float]:
+    s = cur().series
+    if s is None: return None
+    try:
+        r = s.last(series, span)
+        if len(r) < TWAP_MIN_SAMPLES or time.time() - r["ts"][-1] > 3 * TWAP_SAMPLE_SEC: return None   # stale
+        return time_weighted(r["ts"], r["value"], until=time.time())
+    except Exception as e:
+        warn("series_twap_failed", series=series, error=str(e)); return None
+
 def sol_per_gc_twap(samples=TWAP_SAMPLES, pause=TWAP_PAUSE_SEC) -> Decimal:
+    # Instant read from the background sampler's window; burst-sample only until it has warmed up
+    m = cur()
+    if m.sampler.running and TWAP_WINDOW_SEC <= TWAP_RING_CAPACITY * TWAP_SAMPLE_SEC:
+        tw = m.sampler.twap("sol_per_gc", TWAP_WINDOW_SEC, min_samples=TWAP_MIN_SAMPLES)
+        if tw is not None:
+            vol = m.sampler.rings["sol_per_gc"].volatility(TWAP_WINDOW_SEC)
+            if vol is not None: G_VOL_SOL_PER_GC.labels(m.name).set(vol)
+            return Decimal(str(tw))
+    # windows longer than the ring, or a sampler still warming up: the recorded history
+    tw = _series_twap("sol_per_gc", TWAP_WINDOW_SEC)
+    if tw is not None: return Decimal(str(tw))
     vals = []
-    for _ in range(max(1, samples)):
-        vals.append(sol_per_gc_spot())
-        time.sleep(pause)
+    for i in range(max(1, samples)):
+        if i: time.sleep(pause)
+        vals.append(sol_per_gc_spot(fresh=bool(i)))   # past the cache: a cached repeat is not a new sample
     # median as robust TWAP approximation (upgradeable to on-chain oracle later)
     return Decimal(str(statistics.median([float(v) for v in vals])))
 
 # ────────────────────────────────────────────────────────────────────────────
 # Balances
 # ────────────────────────────────────────────────────────────────────────────
-def get_spl_balance(owner: Pubkey, mint: str) -> Decimal:
-    from solana.rpc.types import TokenAccountOpts
-    res = client.get_token_accounts_by_owner(owner, TokenAccountOpts(mint=Pubkey.from_string(mint)))
-    value = res.value
-    if not value: return Decimal(0)
-    tot = Decimal(0)
-    for acc in value:
-        ui = acc.account.data.parsed["info"]["tokenAmount"]["uiAmountString"]
-        tot += Decimal(ui)
-    return tot
-
 @dataclass
 class Balances:
     treasury_gc: Decimal
     vault_usdc: Decimal
     vault_usdt: Decimal
+    sol: Decimal = Decimal(0)
+    slot: int = 0
+    units: dict = field(default_factory=dict)  # raw base units per label, incl. "SOL" lamports
 
-def get_balances() -> Balances:
-    b = Balances(
-        treasury_gc=get_spl_balance(OWNER_PUB, GC_MINT),
-        vault_usdc =get_spl_balance(OWNER_PUB, USDC_MINT),
-        vault_usdt =get_spl_balance(OWNER_PUB, USDT_MINT),
-    )
-    G_TREASURY_GC.set(float(b.treasury_gc)); G_VAULT_USDC.set(float(b.vault_usdc)); G_VAULT_USDT.set(float(b.vault_usdt))
+def _publish_balances(b: Balances) -> Balances:
+    mk = cur().name
+    G_TREASURY_GC.labels(mk).set(float(b.treasury_gc)); G_VAULT_USDC.labels(mk).set(float(b.vault_usdc))
+    G_VAULT_USDT.labels(mk).set(float(b.vault_usdt)); G_TREASURY_SOL.labels(mk).set(float(b.sol))
+    G_BALANCE_SLOT.labels(mk).set(b.slot)
+    m = cur()
+    if b.slot != m.balance_slot:   # a cached snapshot is the same observation: record it once
+        m.balance_slot = b.slot
+        record_series("balance", b.slot, float(b.treasury_gc), float(b.vault_usdc), float(b.vault_usdt), float(b.sol))
     return b
 
+@stage("balances")
+def get_balances(max_age_sec: Optional[float] = None) -> Balances:
+    # one getMultipleAccounts at a single slot; reused for BALANCE_CACHE_SEC unless invalidated
+    m = cur()
+    snap = m.balances.snapshot(max_age_sec)
+    u, dec = snap.units, m.decimals
+    return _publish_balances(Balances(
+        treasury_gc=from_base(u["GC"],   dec["GC"]),
+        vault_usdc =from_base(u["USDC"], dec["USDC"]),
+        vault_usdt =from_base(u["USDT"], dec["USDT"]),
+        sol        =from_base(snap.lamports, dec["SOL"]),
+        slot       =snap.slot,
+        units      ={**u, "SOL": snap.lamports},
+    ))
+
 # ────────────────────────────────────────────────────────────────────────────
-# Governor: per-check caps + daily flow cap
+# Price discovery: fan out independent RPC/quote calls, gather one snapshot
 # ────────────────────────────────────────────────────────────────────────────
-STATE_DB = "treasury_state.sqlite"
-def _db():
-    con = sqlite3.connect(STATE_DB)
-    con.execute("""CREATE TABLE IF NOT EXISTS daily (
-        day TEXT PRIMARY KEY,
-        base_treasury_gc REAL,
-        base_vault_usdc  REAL,
-        base_vault_usdt  REAL,
-        sold_gc REAL DEFAULT 0,
-        spent_usdc REAL DEFAULT 0,
-        spent_usdt REAL DEFAULT 0
-    )""")
-    return con
-
-def today():
-    return time.strftime("%Y-%m-%d", time.gmtime())
+def gather(tasks: dict, deadlines: dict, partial: bool = False) -> tuple[dict, dict]:
+    """Run {name: fn} concurrently; each result must arrive within deadlines[name] seconds of the start.
+    With partial, late tasks are left out of the result instead of failing the whole gather."""
+    t0 = time.monotonic()
+    done_at = {}
+    def timed(name, fn):
+        def run():
+            try: return fn()
+            finally: done_at[name] = time.monotonic()
+        return run
+    # each task runs in a copy of the caller's context so TRACE_ID, the current market (and friends) follow it
+    futs = {k: APP.pool.submit(contextvars.copy_context().run, timed(k, fn)) for k, fn in tasks.items()}
+    out, late = {}, []
+    for k, f in futs.items():
+        try:
+            out[k] = f.result(timeout=max(0.0, deadlines[k] - (time.monotonic() - t0)))
+        except FutureTimeout:
+            f.cancel(); late.append(k)
+    if late and not partial:
+        raise TimeoutError(f"deadline exceeded: {','.join(map(str, late))}")
+    if late: warn("gather_late", tasks=[str(k) for k in late])
+    return out, {k: int((done_at[k] - t0) * 1000) for k in futs if k in done_at}
 
+@dataclass
+class MarketSnapshot:
+    bals: Balances
+    spot_sol_per_gc: Decimal
+    twap_sol_per_gc: Decimal
+    sol_usdc: Decimal
+    taken_at: float
+    latency_ms: dict = field(default_factory=dict)
+
+@stage("discover")
+def discover() -> MarketSnapshot:
+    twap_deadline = max(1, TWAP_SAMPLES - 1) * TWAP_PAUSE_SEC + QUOTE_DEADLINE_SEC
+    res, ms = gather(
+        {
+            "bals": get_balances,
+            "spot": sol_per_gc_spot,
+            "sol_usdc": sol_per_usdc,
+            "twap": sol_per_gc_twap,
+        },
+        {"bals": BALANCES_DEADLINE_SEC, "spot": QUOTE_DEADLINE_SEC, "sol_usdc": QUOTE_DEADLINE_SEC, "twap": twap_deadline},
+    )
+    snap = MarketSnapshot(bals=res["bals"], spot_sol_per_gc=res["spot"], twap_sol_per_gc=res["twap"],
+                          sol_usdc=res["sol_usdc"], taken_at=time.time(), latency_ms=ms)
+    for series, v in (("sol_per_gc", snap.spot_sol_per_gc), ("sol_usdc", snap.sol_usdc), ("twap_sol_per_gc", snap.twap_sol_per_gc)):
+        record_series(series, float(v), ts=snap.taken_at)
+    return snap
+
+# ────────────────────────────────────────────────────────────────────────────
+# Governor: per-check caps + daily flow cap
+# ────────────────────────────────────────────────────────────────────────────
 def load_day_state(bals: Balances):
-    d = today()
-    con = _db()
-    row = con.execute("SELECT * FROM daily WHERE day=?", (d,)).fetchone()
-    if not row:
-        con.execute("INSERT INTO daily(day, base_treasury_gc, base_vault_usdc, base_vault_usdt) VALUES (?,?,?,?)",
-                    (d, float(bals.treasury_gc), float(bals.vault_usdc), float(bals.vault_usdt)))
-        con.commit()
-        row = con.execute("SELECT * FROM daily WHERE day=?", (d,)).fetchone()
-    con.close()
-    return {
-        "day": row[0],
-        "base_treasury_gc": Decimal(str(row[1])),
-        "base_vault_usdc":  Decimal(str(row[2])),
-        "base_vault_usdt":  Decimal(str(row[3])),
-        "sold_gc":          Decimal(str(row[4])),
-        "spent_usdc":       Decimal(str(row[5])),
-        "spent_usdt":       Decimal(str(row[6])),
-    }
+    # cached in memory for the day; only the first call of a day touches SQLite
+    return cur().store.load_day(bals.treasury_gc, bals.vault_usdc, bals.vault_usdt)
 
 def bump_day_counters(side: str, gc_in: Decimal, usdc_in: Decimal, usdt_in: Decimal):
-    con = _db()
-    d = today()
     if side == "SELL":
-        con.execute("UPDATE daily SET sold_gc = sold_gc + ? WHERE day=?", (float(gc_in), d))
+        cur().store.bump_day(gc_in, Decimal(0), Decimal(0))
     elif side == "BUY":
-        if usdc_in > 0: con.execute("UPDATE daily SET spent_usdc = spent_usdc + ? WHERE day=?", (float(usdc_in), d))
-        if usdt_in > 0: con.execute("UPDATE daily SET spent_usdt = spent_usdt + ? WHERE day=?", (float(usdt_in), d))
-    con.commit(); con.close()
+        cur().store.bump_day(Decimal(0), max(usdc_in, Decimal(0)), max(usdt_in, Decimal(0)))
 
 # ────────────────────────────────────────────────────────────────────────────
 # Sizing, health checks, and decisioning
 # ────────────────────────────────────────────────────────────────────────────
 def cap_amounts(bals: Balances):
-    cap_gc   = (bals.treasury_gc * Decimal(CAP_BPS)) / Decimal(10_000)
-    cap_usdc = (bals.vault_usdc  * Decimal(CAP_BPS)) / Decimal(10_000)
-    cap_usdt = (bals.vault_usdt  * Decimal(CAP_BPS)) / Decimal(10_000)
+    cap_bps = Decimal(cur().p.cap_bps)
+    cap_gc   = (bals.treasury_gc * cap_bps) / Decimal(10_000)
+    cap_usdc = (bals.vault_usdc  * cap_bps) / Decimal(10_000)
+    cap_usdt = (bals.vault_usdt  * cap_bps) / Decimal(10_000)
     return cap_gc, cap_usdc, cap_usdt
 
 def choose_stable(bals: Balances) -> tuple[str, Decimal, int]:
-    if PREFERRED_STABLE == "USDT" and bals.vault_usdt > VAULT_STABLE_MIN:
-        return USDT_MINT, bals.vault_usdt, DECIMALS["USDT"]
-    if bals.vault_usdc > VAULT_STABLE_MIN:
-        return USDC_MINT, bals.vault_usdc, DECIMALS["USDC"]
+    m = cur()
+    if m.p.preferred_stable == "USDT" and bals.vault_usdt > m.p.vault_stable_min:
+        return m.usdt, bals.vault_usdt, m.decimals["USDT"]
+    if bals.vault_usdc > m.p.vault_stable_min:
+        return m.usdc, bals.vault_usdc, m.decimals["USDC"]
     if bals.vault_usdt > 0:
-        return USDT_MINT, bals.vault_usdt, DECIMALS["USDT"]
-    return USDC_MINT, Decimal(0), DECIMALS["USDC"]
+        return m.usdt, bals.vault_usdt, m.decimals["USDT"]
+    return m.usdc, Decimal(0), m.decimals["USDC"]
+
+def order_size(side: str, bals: Balances):
+    """(size_gc, usdc_in, usdt_in, stable_mint) for a SELL/BUY at the per-check cap."""
+    m = cur()
+    if side == "SELL":
+        cap_gc, _, _ = cap_amounts(bals)
+        return max(Decimal(0), min(cap_gc, bals.treasury_gc - m.p.treasury_gc_min)), Decimal(0), Decimal(0), None
+    stable_mint, stable_bal, _ = choose_stable(bals)
+    per_check_cap = (stable_bal * Decimal(m.p.cap_bps)) / Decimal(10_000)
+    size_stable = max(Decimal(0), min(per_check_cap, stable_bal - m.p.vault_stable_min))
+    return Decimal(0), (size_stable if stable_mint==m.usdc else Decimal(0)), (size_stable if stable_mint==m.usdt else Decimal(0)), stable_mint
 
 def decide(price_sol_per_gc: Decimal, sol_usdc: Decimal, bals: Balances):
-    lower_sol = BAND_USD_LOWER / sol_usdc
-    upper_sol = BAND_USD_UPPER / sol_usdc
-    cap_gc, cap_usdc, cap_usdt = cap_amounts(bals)
+    band_lo, band_hi = band_usd()
+    lower_sol = band_lo / sol_usdc
+    upper_sol = band_hi / sol_usdc
 
     if price_sol_per_gc > upper_sol:
-        size_gc = max(Decimal(0), min(cap_gc, bals.treasury_gc - TREASURY_GC_MIN))
-        return "SELL", size_gc, Decimal(0), Decimal(0), lower_sol, upper_sol, None
+        return ("SELL", *order_size("SELL", bals)[:3], lower_sol, upper_sol, None)
     elif price_sol_per_gc < lower_sol:
-        stable_mint, stable_bal, _ = choose_stable(bals)
-        per_check_cap = (stable_bal * Decimal(CAP_BPS)) / Decimal(10_000)
-        size_stable = max(Decimal(0), min(per_check_cap, stable_bal - VAULT_STABLE_MIN))
-        return "BUY", Decimal(0), (size_stable if stable_mint==USDC_MINT else Decimal(0)), (size_stable if stable_mint==USDT_MINT else Decimal(0)), lower_sol, upper_sol, stable_mint
+        size_gc, usdc_in, usdt_in, stable_mint = order_size("BUY", bals)
+        return "BUY", size_gc, usdc_in, usdt_in, lower_sol, upper_sol, stable_mint
     else:
         return "HOLD", Decimal(0), Decimal(0), Decimal(0), lower_sol, upper_sol, None
 
 def est_price_impact_bps(input_mint: str, output_mint: str, ui_amount: Decimal) -> int:
     if ui_amount <= 0: return 0
+    imp = _est_price_impact_bps(input_mint, output_mint, ui_amount)
+    m = cur()
+    record_series("impact", m.labels.get(input_mint, input_mint[:4]), m.labels.get(output_mint, output_mint[:4]),
+                  float(ui_amount), imp)
+    return imp
+
+def _est_price_impact_bps(input_mint: str, output_mint: str, ui_amount: Decimal) -> int:
+    if IMPACT_MODEL == "local":
+        try:
+            return APP.pools.impact_bps(input_mint, output_mint, float(ui_amount))
+        except Exception as e:
+            warn("pool_model_unavailable", error=str(e), fallback="quotes")
     # Compare per-unit out at size vs half-size; infer impact
     half = max(ui_amount/2, Decimal("0.000001"))
-    q1 = ray_compute_swap_base_in(input_mint, output_mint, half);  o1 = _extract_out_amount(q1)
-    q2 = ray_compute_swap_base_in(input_mint, output_mint, ui_amount); o2 = _extract_out_amount(q2)
+    q, _ = gather({"half": lambda: ray_quote(input_mint, output_mint, half),
+                   "full": lambda: ray_quote(input_mint, output_mint, ui_amount)},
+                  {"half": QUOTE_DEADLINE_SEC, "full": QUOTE_DEADLINE_SEC})
+    o1 = q["half"].out_amount; o2 = q["full"].out_amount
     if o1<=0 or o2<=0: return 100_000
     per1 = Decimal(o1)/half; per2 = Decimal(o2)/ui_amount
     impact = max(0, (1 - (per2/per1)) * 10_000)  # bps
     return int(impact)
 
+def impact_safe_size(mint_in: str, mint_out: str, amt: Decimal, dec: int) -> Optional[Decimal]:
+    """Largest size ≤ amt the local pool model keeps under the market's impact limit; None if the model is unavailable."""
+    try:
+        safe = Decimal(str(APP.pools.max_size(mint_in, mint_out, float(amt), cur().p.max_price_impact_bps)))
+    except Exception as e:
+        warn("pool_model_unavailable", error=str(e)); return None
+    return min(amt, safe.quantize(Decimal(1).scaleb(-dec), rounding=ROUND_DOWN))
+
+@stage("fit_size")
+def fit_size_to_impact(decision: str, size_gc: Decimal, usdc_in: Decimal, usdt_in: Decimal):
+    # Shrink to the largest size the local pool model keeps under max_price_impact_bps instead of skipping
+    if IMPACT_MODEL != "local": return size_gc, usdc_in, usdt_in
+    m = cur()
+    max_impact = m.p.max_price_impact_bps
+    if decision == "SELL" and size_gc > 0:
+        mint_in, mint_out, amt, dec = m.gc, m.usdc, size_gc, m.decimals["GC"]
+    elif decision == "BUY" and (usdc_in>0 or usdt_in>0):
+        mint_in = m.usdc if usdc_in>0 else m.usdt
+        mint_out, amt = m.gc, (usdc_in if usdc_in>0 else usdt_in)
+        dec = m.decimals["USDC" if usdc_in>0 else "USDT"]
+    else:
+        return size_gc, usdc_in, usdt_in
+    safe = impact_safe_size(mint_in, mint_out, amt, dec)
+    if safe is None or safe >= amt or safe < amt * MIN_TRADE_FRACTION:
+        return size_gc, usdc_in, usdt_in   # fits already, or too small to be worth it (health check skips)
+    info("size_reduced_for_impact", decision=decision, intended=str(amt), size=str(safe), max_impact_bps=max_impact)
+    if decision == "SELL": return safe, usdc_in, usdt_in
+    return size_gc, (safe if usdc_in>0 else usdc_in), (safe if usdt_in>0 else usdt_in)
+
+@stage("health")
 def health_checks(decision: str, size_gc: Decimal, usdc_in: Decimal, usdt_in: Decimal,
-                  spot_sol_per_gc: Decimal, twap_sol_per_gc: Decimal) -> tuple[bool,str]:
+                  spot_sol_per_gc: Decimal, twap_sol_per_gc: Decimal, plan: Optional[Plan] = None) -> tuple[bool,str]:
+    m = cur()
     # 1) Spot vs TWAP divergence
     if twap_sol_per_gc > 0:
         dev = abs(spot_sol_per_gc - twap_sol_per_gc) / twap_sol_per_gc * Decimal(10_000)
-        if dev > MAX_SPOT_VS_TWAP_BPS:
+        if dev > m.p.max_spot_vs_twap_bps:
             return False, f"spot_vs_twap_divergence_bps={int(dev)}"
 
-    # 2) Price impact at intended size (Raydium compute)
-    if decision == "SELL" and size_gc > 0:
-        imp = est_price_impact_bps(GC_MINT, USDC_MINT, size_gc)
-        if imp > MAX_PRICE_IMPACT_BPS:
+    # 2) Price impact at intended size (local pool model; Raydium compute as fallback), every leg of a chosen route
+    if plan is not None:
+        for f in plan.fills:
+            for (a, b), amt in zip(f.route.legs, f.leg_in):
+                imp = est_price_impact_bps(a, b, amt)
+                if imp > m.p.max_price_impact_bps:
+                    return False, f"price_impact_bps={imp} route={f.route.name}"
+    elif decision == "SELL" and size_gc > 0:
+        imp = est_price_impact_bps(m.gc, m.usdc, size_gc)
+        if imp > m.p.max_price_impact_bps:
             return False, f"price_impact_bps={imp}"
     elif decision == "BUY" and (usdc_in>0 or usdt_in>0):
-        mint_in = USDC_MINT if usdc_in>0 else USDT_MINT
+        mint_in = m.usdc if usdc_in>0 else m.usdt
         amt_in  = usdc_in if usdc_in>0 else usdt_in
-        imp = est_price_impact_bps(mint_in, GC_MINT, amt_in)
-        if imp > MAX_PRICE_IMPACT_BPS:
+        imp = est_price_impact_bps(mint_in, m.gc, amt_in)
+        if imp > m.p.max_price_impact_bps:
             return False, f"price_impact_bps={imp}"
 
     return True, "ok"
@@ -366,96 +794,548 @@ def check_daily_governor(decision: str, size_gc: Decimal, usdc_in: Decimal, usdt
     if decision == "SELL":
         base = day_state["base_treasury_gc"]
         used = day_state["sold_gc"]
-        cap  = (base * Decimal(DAILY_MAX_BPS)) / Decimal(10_000)
+        cap  = (base * Decimal(cur().p.daily_max_bps)) / Decimal(10_000)
         if used + size_gc > cap:
             return False, f"daily_gc_cap_exceeded used={str(used)} add={str(size_gc)} cap={str(cap)}"
     elif decision == "BUY":
         base = (day_state["base_vault_usdc"] if usdc_in>0 else day_state["base_vault_usdt"])
         used = (day_state["spent_usdc"] if usdc_in>0 else day_state["spent_usdt"])
         add  = (usdc_in if usdc_in>0 else usdt_in)
-        cap  = (base * Decimal(DAILY_MAX_BPS)) / Decimal(10_000)
+        cap  = (base * Decimal(cur().p.daily_max_bps)) / Decimal(10_000)
         if used + add > cap:
             return False, f"daily_stable_cap_exceeded used={str(used)} add={str(add)} cap={str(cap)}"
     return True, "ok"
 
+def check_parent_room(decision: str, size_gc: Decimal, usdc_in: Decimal, usdt_in: Decimal, day_state: dict):
+    """A parent only needs room for its smallest child today (next_child's floor); the governor sizes the rest."""
+    spec = _spec(decision, size_gc, usdc_in, usdt_in, Decimal(0))
+    room = daily_room(decision, spec.input_mint, day_state)
+    floor = spec.amount * MIN_TRADE_FRACTION / SLICE_CHILDREN
+    if room < floor:
+        return False, f"daily_room_below_child room={room} floor={floor}"
+    return True, "ok"
+
+def governor_skip(cycle: str, decision: str, why: str) -> dict:
+    m = cur()
+    info("governor_skip", reason=why, decision=decision)
+    m.store.record("decision", cycle=cycle, side=decision, status="SKIP_GOV", detail={"reason": why})
+    tg_send(f"[TreasuryBot] SKIP (Gov): {why}")
+    return {"status":"SKIP", "reason": why}
+
+def daily_room(side: str, input_mint: str, day_state: dict) -> Decimal:
+    """What the daily governor still allows today on the input side of a trade."""
+    m = cur()
+    if side == "SELL":
+        base, used = day_state["base_treasury_gc"], day_state["sold_gc"]
+    elif input_mint == m.usdc:
+        base, used = day_state["base_vault_usdc"], day_state["spent_usdc"]
+    else:
+        base, used = day_state["base_vault_usdt"], day_state["spent_usdt"]
+    return max(Decimal(0), base * Decimal(m.p.daily_max_bps) / Decimal(10_000) - used)
+
 # ────────────────────────────────────────────────────────────────────────────
-# Execution: Raydium swap → sign → send (Jito if configured)
+# Execution: Raydium swap → sign → broadcast (RPC + Jito) → confirm
 # ────────────────────────────────────────────────────────────────────────────
-def send_tx_base64_via_rpc(tx_b64: str) -> str:
-    tx_bytes = base64.b64decode(tx_b64)
-    vtx = VersionedTransaction.from_bytes(tx_bytes)
-    vtx_signed = vtx.sign([OWNER])
-    sig = client.send_raw_transaction(bytes(vtx_signed)).value
-    return str(sig)
+@stage("sign")
+def sign_tx_base64(tx_b64: str) -> VersionedTransaction:
+    vtx = VersionedTransaction.from_bytes(base64.b64decode(tx_b64))
+    return VersionedTransaction(vtx.message, [cur().owner])
 
-def send_tx_base64_via_jito(tx_b64: str) -> str:
-    # Jito JSON-RPC sendTransaction (single txn path)
-    # Docs: /api/v1/transactions method sendTransaction, base64 param
-    hdrs = {"Content-Type":"application/json"}
-    if JITO_AUTH: hdrs["x-jito-auth"] = JITO_AUTH
-    payload = {
-        "jsonrpc":"2.0",
-        "id":1,
-        "method":"sendTransaction",
-        "params":[tx_b64, {"encoding":"base64"}]
-    }
-    r = requests.post(f"{JITO_URL}/api/v1/transactions", json=payload, headers=hdrs, timeout=10)
-    r.raise_for_status()
-    return r.json().get("result","")
+@dataclass(frozen=True)
+class Order:
+    quote: Quote
+    sub: Submission
+
+def build_order(spec: OrderSpec) -> Order:
+    # quote → build → sign everything up front; what's left is a single broadcast
+    q = ray_quote(spec.input_mint, spec.output_mint, spec.amount)
+    txs = ray_build_transactions(q.resp, input_is_sol=spec.input_mint == SOL_MINT, output_is_sol=spec.output_mint == SOL_MINT)
+    return Order(q, cur().exec.prepare([sign_tx_base64(tx) for tx in txs]))
+
+def submit_order(sub: Submission) -> ExecResult:
+    # broadcast on every channel at once (one Jito bundle for multi-tx swaps), then poll statuses
+    # in one batched call per slot, re-broadcasting until landed or the blockhash expires
+    m = cur()
+    try:
+        with stage("submit"):
+            m.exec.broadcast(sub)
+        with stage("confirm"):
+            res = m.exec.confirm(sub)
+    except Exception as e:
+        err("send_tx_failed", error=str(e))
+        raise
+    finally:
+        m.balances.invalidate()  # balances changed (or may have); next read goes to the network
+    if res.status != "confirmed":
+        warn("tx_not_confirmed", status=res.status, sigs=res.sigs, landed=res.landed, errors=res.errors, broadcasts=res.broadcasts)
+    return res
+
+def _record_fills(side: str, input_mint: str, output_mint: str, q: Quote, res: ExecResult):
+    sub_lat = res.submitted_at - q.fetched_at
+    H_QUOTE_LAND.labels(side, "submitted").observe(sub_lat)
+    if res.confirmed_at: H_QUOTE_LAND.labels(side, "confirmed").observe(res.confirmed_at - q.fetched_at)
+    store = cur().store
+    for sig in res.sigs:
+        row = dict(cycle=TRACE_ID.get(), side=side, input_mint=input_mint, output_mint=output_mint,
+                   in_amount=q.in_amount, out_amount=q.out_amount, signature=sig)
+        store.record("fill", **row, latency_ms=int(sub_lat * 1000), status="submitted")
+        if sig in res.landed:
+            lat = int((res.confirmed_at - q.fetched_at) * 1000)
+            store.record("fill", **row, slot=res.slot, latency_ms=lat, status="confirmed")
+            status = "confirmed"
+        else:
+            lat, status = int(sub_lat * 1000), ("failed" if sig in res.errors else res.status)
+            store.record("fill", **row, status=status, detail={"err": res.errors.get(sig), "broadcasts": res.broadcasts})
+        m = cur()
+        record_series("fill", side, m.labels.get(input_mint, input_mint[:4]), m.labels.get(output_mint, output_mint[:4]),
+                      q.in_amount, q.out_amount, status, lat)
+
+def _spec(side: str, size_gc: Decimal, usdc_in: Decimal, usdt_in: Decimal, ref_price: Decimal) -> OrderSpec:
+    m = cur()
+    if side == "SELL":
+        return OrderSpec("SELL", m.gc, m.usdc, size_gc, ref_price)
+    stable = m.usdc if usdc_in > 0 else m.usdt
+    return OrderSpec("BUY", stable, m.gc, (usdc_in if usdc_in > 0 else usdt_in), ref_price)
+
+def execute(spec: OrderSpec, on_signed=None, standby: bool = False) -> dict:
+    # standby: the decision's one single-pool swap may use the pre-built order (taken once, so the
+    # standby hit/miss counters measure decisions, not route or child legs); it is used only if it
+    # still matches side, size, price and blockhash age. on_signed(order) runs before the first broadcast.
+    m = cur()
+    pre = m.standby.take(spec) if standby and m.standby.running else None
+    order, amount = (pre.order, pre.spec.amount) if pre else (build_order(spec), spec.amount)
+    if on_signed: on_signed(order)
+    res = submit_order(order.sub)
+    _record_fills(spec.side, spec.input_mint, spec.output_mint, order.quote, res)
+    lab_out = m.labels[spec.output_mint]
+    return {"sigs": res.sigs, "landing": res.status, "input": m.labels[spec.input_mint], "output": lab_out,
+            "ui_in": str(amount), "ui_out": str(from_base(order.quote.out_amount, m.decimals[lab_out])),
+            "prebuilt": pre is not None}
+
+def _day_spend(side: str, input_mint: str, spent: Decimal) -> tuple[Decimal, Decimal, Decimal]:
+    """(gc, usdc, usdt) a landed swap counts against the daily governor."""
+    m, zero = cur(), Decimal(0)
+    if side == "SELL": return spent, zero, zero
+    return zero, (spent if input_mint == m.usdc else zero), (spent if input_mint == m.usdt else zero)
+
+def _book_fill(side: str, input_mint: str, spent: Decimal):
+    # the governor only counts swaps that landed ("partial" too: a partly landed multi-tx swap may have moved funds)
+    (C_EXEC_SELL if side == "SELL" else C_EXEC_BUY).labels(cur().name).inc()
+    bump_day_counters(side, *_day_spend(side, input_mint, spent))
+
+def exec_sell_gc_for_stable(gc_amount_ui: Decimal, ref_price: Decimal = Decimal(0)):
+    return execute(OrderSpec("SELL", cur().gc, cur().usdc, gc_amount_ui, ref_price), standby=True)
+
+def exec_buy_gc_with_stable(stable_mint: str, stable_ui: Decimal, ref_price: Decimal = Decimal(0)):
+    return execute(OrderSpec("BUY", stable_mint, cur().gc, stable_ui, ref_price), standby=True)
+
+# ────────────────────────────────────────────────────────────────────────────
+# Routing: price the trade over every pool path, execute the best (or a split)
+# ────────────────────────────────────────────────────────────────────────────
+def _swap_cost_sol() -> Decimal:
+    """SOL one swap transaction costs: priority fee at ROUTE_CU_PER_SWAP, base fee, Jito tip."""
+    lamports = Decimal(priority_fee_high()) * ROUTE_CU_PER_SWAP / 10**6 + 5_000 + (JITO_TIP_LAMPORTS if JITO_URL else 0)
+    return lamports / Decimal(10**9)
+
+def _price_route(route: Route, amount: Decimal, tx_cost: Decimal) -> Optional[Fill]:
+    m = cur()
+    try:
+        leg_in, quotes, amt = [], [], amount
+        for a, b in route.legs:   # a later leg is quoted at what the earlier one returns
+            amt = amt.quantize(Decimal(1).scaleb(-m.decimals[m.labels[a]]), rounding=ROUND_DOWN)
+            q = ray_quote(a, b, amt)
+            leg_in.append(amt); quotes.append(q)
+            amt = from_base(q.out_amount, m.decimals[m.labels[b]])
+        return Fill(route, amount, amt, tx_cost * len(route.legs), tuple(leg_in), tuple(quotes))
+    except Exception as e:
+        warn("route_quote_failed", route=route.name, error=str(e))
+        return None
+
+@stage("route")
+def select_route(decision: str, size_gc: Decimal, usdc_in: Decimal, usdt_in: Decimal,
+                 sol_per_gc: Decimal, sol_usdc: Decimal, bals: Balances) -> Optional[Plan]:
+    """Best path for the trade by quoted output net of fees; None keeps the default pool (routing off / nothing priced).
+    SELL compares USDC and USDT out at par; BUY only considers stables whose cap and floor allow the same size."""
+    if not ROUTE_SELECT or decision not in ("SELL", "BUY"): return None
+    if sol_per_gc <= 0 or sol_usdc <= 0: return None   # unpriced: fees can't be valued, keep the default pool
+    m = cur()
+    if decision == "SELL":
+        amount, per_sol = size_gc, sol_usdc                # fees valued in stable per SOL
+        cands = routes(m.gc, [m.usdc, m.usdt], SOL_MINT, m.labels)
+    else:
+        amount, per_sol = usdc_in + usdt_in, 1 / sol_per_gc  # fees valued in GC per SOL
+        srcs = [s for s, bal in ((m.usdc, bals.vault_usdc), (m.usdt, bals.vault_usdt))
+                if min(bal * m.p.cap_bps / Decimal(10_000), bal - m.p.vault_stable_min) >= amount]
+        cands = [r for s in srcs for r in routes(s, [m.gc], SOL_MINT, m.labels)]
+    if amount <= 0 or not cands: return None
+    tx_cost = _swap_cost_sol() * per_sol
+    run_all = lambda tasks: gather(tasks, {k: 2 * QUOTE_DEADLINE_SEC for k in tasks}, partial=True)[0]
+    plan = choose_route(lambda r, amt: _price_route(r, amt, tx_cost), cands, amount, run_all,
+                        ROUTE_SPLITS, ROUTE_SPLIT_MIN_BPS)
+    if plan is None:
+        warn("route_unpriced", decision=decision, fallback="default pool")
+        return None
+    C_ROUTE.labels(m.name, plan.name).inc()
+    G_ROUTE_ADVANTAGE.labels(m.name).set(float(plan.advantage)); G_ROUTE_ADVANTAGE_BPS.labels(m.name).set(plan.advantage_bps)
+    info("route", decision=decision, route=plan.name, net=f"{plan.net:.6f}", advantage=f"{plan.advantage:.6f}",
+         advantage_bps=plan.advantage_bps, candidates={k: f"{v:.6f}" for k, v in plan.candidates.items()})
+    return plan
+
+def _run_fill(side: str, f: Fill, ref_price: Decimal, standby: bool = False) -> dict:
+    """One fill's legs in order. A later leg spends what the earlier one returned less slippage (no balance read
+    in between); the governor is booked as soon as the first leg lands. standby: see execute()."""
+    m = cur()
+    out = {"sigs": [], "first": None, "ui_in": Decimal(0), "ui_out": Decimal(0), "confirmed": 0, "prebuilt": False}
+    amt = f.amount
+    for i, (a, b) in enumerate(f.route.legs):
+        res = execute(OrderSpec(side, a, b, amt, ref_price), standby=standby and len(f.route.legs) == 1)
+        out["sigs"] += res["sigs"]; out["first"] = out["first"] or res["landing"]; out["prebuilt"] |= res["prebuilt"]
+        if res["landing"] not in ("confirmed", "partial"):
+            if i: warn("route_leg_failed", route=f.route.name, leg=i + 1, holding=m.labels[a], amount=str(amt))
+            break
+        out["confirmed"] += res["landing"] == "confirmed"
+        if i == 0:
+            _book_fill(side, a, Decimal(res["ui_in"])); out["ui_in"] = Decimal(res["ui_in"])
+        if i == len(f.route.legs) - 1:
+            out["ui_out"] = Decimal(res["ui_out"])
+        else:
+            amt = (Decimal(res["ui_out"]) * (10_000 - m.p.slippage_bps) / 10_000).quantize(
+                Decimal(1).scaleb(-m.decimals[m.labels[b]]), rounding=ROUND_DOWN)
+    return out
+
+def execute_plan(side: str, plan: Plan, ref_price: Decimal) -> dict:
+    # the fills of a split go through different pools: send them side by side
+    m = cur()
+    if len(plan.fills) == 1:
+        parts = [_run_fill(side, plan.fills[0], ref_price, standby=True)]   # a direct route is the pool standby pre-builds for
+    else:
+        with ThreadPoolExecutor(max_workers=len(plan.fills), thread_name_prefix="route") as ex:
+            futs = [ex.submit(contextvars.copy_context().run, _run_fill, side, f, ref_price) for f in plan.fills]
+            parts = [fut.result() for fut in futs]
+    ui_in = sum((x["ui_in"] for x in parts), Decimal(0))
+    ok = sum(x["confirmed"] for x in parts) == sum(len(f.route.legs) for f in plan.fills)
+    outs = dict.fromkeys(m.labels[f.route.output] for f in plan.fills)
+    return {"sigs": [s for x in parts for s in x["sigs"]],
+            "landing": "confirmed" if ok else "partial" if ui_in > 0 else parts[0]["first"],
+            "input": m.labels[plan.input], "output": "+".join(outs), "ui_in": str(ui_in),
+            "ui_out": str(sum((x["ui_out"] for x in parts), Decimal(0))),
+            "prebuilt": any(x["prebuilt"] for x in parts), "route": plan.name}
+
+# ────────────────────────────────────────────────────────────────────────────
+# Hot standby: keep the next likely order pre-built while price is near a band edge
+# ────────────────────────────────────────────────────────────────────────────
+def _latest(series: str, fallback) -> Decimal:
+    sampler = cur().sampler
+    last = sampler.rings[series].last() if sampler.running else None
+    if last and time.time() - last[0] <= 2 * TWAP_SAMPLE_SEC: return Decimal(str(last[1]))
+    return fallback()
+
+@stage("standby_plan")
+def standby_plan() -> Optional[OrderSpec]:
+    APP.fees.get()   # keep the priority-fee estimate warm
+    band_lo, band_hi = band_usd()
+    sol_usdc = _latest("sol_usdc", sol_per_usdc)
+    lo, hi = band_lo / sol_usdc, band_hi / sol_usdc
+    near = Decimal(STANDBY_NEAR_BPS) / Decimal(10_000)
+    # cheap gate on the sampler's last price, then a live spot for the order's reference price
+    if lo * (1 + near) < _latest("sol_per_gc", sol_per_gc_spot) < hi * (1 - near):
+        return None
+    price = sol_per_gc_spot()
+    side = "SELL" if price >= hi * (1 - near) else "BUY" if price <= lo * (1 + near) else None
+    if side is None: return None
+    bals = get_balances()
+    size_gc, usdc_in, usdt_in, _ = order_size(side, bals)
+    size_gc, usdc_in, usdt_in = fit_size_to_impact(side, size_gc, usdc_in, usdt_in)
+    if max(size_gc, usdc_in, usdt_in) <= 0: return None
+    ok, _ = check_daily_governor(side, size_gc, usdc_in, usdt_in, load_day_state(bals))
+    return _spec(side, size_gc, usdc_in, usdt_in, price) if ok else None
+
+# ────────────────────────────────────────────────────────────────────────────
+# Sliced execution: a parent order worked down as re-priced child swaps
+# ────────────────────────────────────────────────────────────────────────────
+STOP = threading.Event()   # set on shutdown; a parent waiting between children stops there and resumes next start
+
+def slice_mode(decision: str, size_gc: Decimal, usdc_in: Decimal, usdt_in: Decimal) -> Optional[str]:
+    """"impact" / "twap" when the trade should go out as a parent order; None for a single swap."""
+    if SLICE_MODE not in SLICE_MODES or SLICE_CHILDREN < 2 or decision not in ("SELL", "BUY"): return None
+    spec = _spec(decision, size_gc, usdc_in, usdt_in, Decimal(0))
+    if spec.amount <= 0: return None
+    if SLICE_MODE == "twap": return "twap"
+    if IMPACT_MODEL != "local": return None
+    m = cur()
+    safe = impact_safe_size(spec.input_mint, spec.output_mint, spec.amount, m.decimals[m.labels[spec.input_mint]])
+    return "impact" if safe is not None and safe < spec.amount else None
+
+@stage("slice_plan")
+def next_child(parent: ParentOrder) -> Union[ChildPlan, str]:
+    """Re-price, then size the next child: impact-safe (or an even share of the rest), never past the
+    remaining balance or what the daily governor still allows. A string stops the parent."""
+    m = cur()
+    dec = m.decimals[m.labels[parent.input_mint]]
+    snap = discover()   # the same spot / TWAP sources as a single-swap cycle
+    spot, tw, bals = snap.spot_sol_per_gc, snap.twap_sol_per_gc, snap.bals
+    if tw <= 0: return "no_twap"
+    side = decide(spot, snap.sol_usdc, bals)[0]
+    if side != parent.side:
+        return "inside_band" if side == "HOLD" else "band_flipped"
+    remaining = from_base(parent.remaining, dec)
+    even = remaining / max(1, parent.slices - parent.children)
+    if parent.mode == "impact":
+        if parent.children >= parent.slices: return "max_children"
+        size = impact_safe_size(parent.input_mint, parent.output_mint, remaining, dec)
+        if size is None: size = even   # no pool model; 0 (nothing is safe) falls through to the "impact" stop
+    else:
+        size = even
+    if parent.side == "SELL":
+        avail = bals.treasury_gc - m.p.treasury_gc_min
+    else:
+        avail = (bals.vault_usdc if parent.input_mint == m.usdc else bals.vault_usdt) - m.p.vault_stable_min
+    room = daily_room(parent.side, parent.input_mint, load_day_state(bals))
+    size = min(size, remaining, avail, room).quantize(Decimal(1).scaleb(-dec), rounding=ROUND_DOWN)
+    floor = min(remaining, from_base(parent.total, dec) * MIN_TRADE_FRACTION / parent.slices)
+    if size <= 0 or size < floor:
+        return "governor" if room < floor else "balance" if avail < floor else "impact"
+    sell = parent.side == "SELL"
+    ok, why = health_checks(parent.side, (size if sell else Decimal(0)),
+                            (size if not sell and parent.input_mint == m.usdc else Decimal(0)),
+                            (size if not sell and parent.input_mint == m.usdt else Decimal(0)),
+                            spot, tw)
+    if not ok: return f"health:{why}"
+    return ChildPlan(to_base(size, dec), spot)
+
+def fill_child(parent: ParentOrder, plan: ChildPlan, sent) -> ChildFill:
+    # the governor is booked by the slicer, in the same transaction that settles the child
+    m = cur()
+    dec_in, dec_out = m.decimals[m.labels[parent.input_mint]], m.decimals[m.labels[parent.output_mint]]
+    res = execute(OrderSpec(parent.side, parent.input_mint, parent.output_mint, from_base(plan.amount, dec_in), plan.ref_price),
+                  on_signed=lambda o: sent(o.quote.in_amount, o.quote.out_amount, o.sub.sigs))
+    landed = res["landing"] in ("confirmed", "partial")
+    if landed: (C_EXEC_SELL if parent.side == "SELL" else C_EXEC_BUY).labels(m.name).inc()
+    info("child_filled", parent=parent.id, seq=parent.children + 1, **res)
+    return ChildFill(landed, to_base(Decimal(res["ui_in"]), dec_in), to_base(Decimal(res["ui_out"]), dec_out),
+                     res["sigs"], res["landing"], _day_spend(parent.side, parent.input_mint, Decimal(res["ui_in"])))
 
-def submit_signed_txs(txs_b64: list[str]) -> list[str]:
-    sigs = []
-    for tx in txs_b64:
+def resolve_child(parent: ParentOrder, child: dict) -> Optional[ChildFill]:
+    """What became of a child an earlier process sent but never settled; None while it may still land."""
+    m = cur()
+    sigs = child["signatures"]
+    sts = m.exec.statuses(sigs) if sigs else []
+    landed = [s for s, st in zip(sigs, sts) if st and st.get("err") is None and st.get("confirmationStatus") in LANDED]
+    failed = any(st and st.get("err") is not None for st in sts)
+    if not landed and not failed and time.time() - child["ts"] < m.exec.timeout_sec:
+        return None   # blockhash may still be valid: the slicer asks again shortly rather than send another child
+    status = "confirmed" if landed and len(landed) == len(sigs) else "partial" if landed else "failed" if failed else "expired"
+    info("child_filled", parent=parent.id, seq=child["seq"], sigs=sigs, landing=status, resumed=True)
+    if not landed:
+        return ChildFill(False, child["in_amount"], child["out_amount"], sigs, status)
+    load_day_state(get_balances())   # today's governor row exists before the child is booked to it
+    (C_EXEC_SELL if parent.side == "SELL" else C_EXEC_BUY).labels(m.name).inc()
+    spent = from_base(child["in_amount"], m.decimals[m.labels[parent.input_mint]])
+    return ChildFill(True, child["in_amount"], child["out_amount"], sigs, status, _day_spend(parent.side, parent.input_mint, spent))
+
+def work_parent(parent: ParentOrder) -> dict:
+    m = cur()
+    p = m.slicer.run(parent, STOP)
+    dec = m.decimals[m.labels[p.input_mint]]
+    out = {"status": "PARENT", "action": p.side, "parent": p.id, "mode": p.mode, "state": p.status, "reason": p.reason,
+           "children": p.children, "filled": str(from_base(p.filled, dec)), "total": str(from_base(p.total, dec))}
+    if p.status != "active":
+        tg_send(f"[TreasuryBot] {p.side} parent #{p.id} {p.status}{f' ({p.reason})' if p.reason else ''}: "
+                f"{out['filled']}/{out['total']} {m.labels[p.input_mint]} in {p.children} children")
+    return out
+
+def start_parent(cycle: str, decision: str, mode: str, size_gc: Decimal, usdc_in: Decimal, usdt_in: Decimal,
+                 spot: Decimal, twap: Decimal) -> dict:
+    m = cur()
+    # spot vs TWAP gates the parent; impact and the governor are checked per child
+    ok, why = health_checks(decision, Decimal(0), Decimal(0), Decimal(0), spot, twap)
+    if not ok:
+        warn("health_skip", reason=why, decision=decision)
+        m.store.record("decision", cycle=cycle, side=decision, status="SKIP_HEALTH", detail={"reason": why})
+        tg_send(f"[TreasuryBot] SKIP (Health): {why}")
+        return {"status": "SKIP", "reason": why}
+    spec = _spec(decision, size_gc, usdc_in, usdt_in, spot)
+    lab = m.labels[spec.input_mint]
+    parent = m.slicer.open(spec.side, spec.input_mint, spec.output_mint, to_base(spec.amount, m.decimals[lab]),
+                           mode, SLICE_CHILDREN, cycle=cycle)
+    m.store.record("decision", cycle=cycle, side=decision, status="PARENT",
+                   detail={"parent": parent.id, "mode": mode, "amount": str(spec.amount), "input": lab, "spot_sol_per_gc": str(spot)})
+    tg_send(f"[TreasuryBot] {decision} parent #{parent.id} ({mode}): {spec.amount} {lab} over up to {SLICE_CHILDREN} children")
+    return work_parent(parent)
+
+# ────────────────────────────────────────────────────────────────────────────
+# Markets: per-profile wallet, balances, governor, executor, sampler, standby
+# ────────────────────────────────────────────────────────────────────────────
+class Market:
+    """Everything one profile owns. The HTTP transport, RPC client, quote / pool / metadata
+    caches, fee oracle and discovery pool underneath are shared by every market. Wallet,
+    decimals, state DB and workers are built on first use, not when the market is listed."""
+
+    def __init__(self, p: Profile):
+        self._init_lock = threading.RLock()
+        self.p = p
+        self.name = p.name
+        self.gc, self.usdc, self.usdt = p.gc_mint, p.usdc_mint, p.usdt_mint
+        self.labels = {self.gc: "GC", self.usdc: "USDC", self.usdt: "USDT", SOL_MINT: "SOL"}
+        self.band_cache = None      # (profile, monotonic, band) from band_usd()
+        self.balance_slot = None    # last balance snapshot recorded to the series store
+        self._dec: dict = {}        # label → decimals; one dict for the life of the market (the store shares it)
+        self._dec_guessed: set = set()
+
+    @lazy
+    def owner(self) -> Keypair:
+        return _load_wallet(self.p.wallet_env)
+
+    @lazy
+    def owner_pub(self) -> Pubkey:
+        return self.owner.pubkey()
+
+    @property
+    def decimals(self) -> dict:
+        """Label → decimals. A label whose lookup failed holds the 9/6 default only until a later read
+        resolves it (token_meta paces the retries), instead of for the life of the process."""
+        if len(self._dec) < 4 or self._dec_guessed:
+            mints = {"GC": self.gc, "USDC": self.usdc, "USDT": self.usdt, "SOL": SOL_MINT}
+            with self._init_lock:
+                for k, mint in mints.items():
+                    if k in self._dec and k not in self._dec_guessed: continue
+                    d = APP.token_meta.decimals(mint)
+                    if d is None:
+                        if k not in self._dec_guessed: warn("token_decimals_fallback", market=self.name, token=k)
+                        self._dec_guessed.add(k)
+                        d = _default_decimals(mint)
+                    elif k in self._dec_guessed:
+                        self._dec_guessed.discard(k)
+                        info("token_decimals_resolved", market=self.name, token=k, decimals=d)
+                    self._dec[k] = d
+        return self._dec
+
+    @lazy
+    def balances(self) -> BalanceReader:
+        return BalanceReader(APP.client, self.owner_pub, {"GC": self.gc, "USDC": self.usdc, "USDT": self.usdt},
+                             max_age_sec=BALANCE_CACHE_SEC)
+
+    @lazy
+    def store(self) -> StateStore:
+        return StateStore(self.p.state_db, self.decimals)   # the same dict: a corrected guess reaches the governor too
+
+    @lazy
+    def series(self) -> Optional[SeriesStore]:
+        if not SERIES_STORE: return None
         try:
-            if JITO_URL:
-                sigs.append(send_tx_base64_via_jito(tx))
-            else:
-                sigs.append(send_tx_base64_via_rpc(tx))
-        except Exception as e:
-            err("send_tx_failed", error=str(e))
-            raise
-    return sigs
+            return SeriesStore(self.p.series_dir, SERIES, retention_days=SERIES_RETENTION_DAYS)
+        except Exception as e:   # e.g. unwritable dir / layout mismatch: trade on without history
+            self.run(err, "series_store_unavailable", dir=self.p.series_dir, error=str(e))
+            return None
+
+    @lazy
+    def exec(self) -> TxExecutor:
+        return TxExecutor(APP.http, RPC_URL, self.owner, APP.pool, jito_url=JITO_URL, jito_auth=JITO_AUTH,
+                          jito_tip_lamports=JITO_TIP_LAMPORTS, jito_tip_account=JITO_TIP_ACCOUNT,
+                          poll_sec=CONFIRM_POLL_SEC, rebroadcast_sec=REBROADCAST_SEC, timeout_sec=CONFIRM_TIMEOUT_SEC)
+
+    @lazy
+    def sampler(self) -> PriceSampler:
+        return PriceSampler(
+            {"sol_per_gc": self.bind(sol_per_gc_spot), "sol_usdc": self.bind(sol_per_usdc)},
+            interval_sec=TWAP_SAMPLE_SEC, capacity=TWAP_RING_CAPACITY,
+            windows=(TWAP_WINDOW_SEC,), snapshot_dir=self.p.snapshot_dir,
+            on_sample=self.bind(lambda series, ts, price: record_series(series, price, ts=ts)),
+        )
+
+    @lazy
+    def standby(self) -> Standby:
+        return Standby(self.bind(standby_plan), self.bind(build_order), interval_sec=STANDBY_REFRESH_SEC,
+                       max_age_sec=STANDBY_MAX_AGE_SEC, reprice_bps=STANDBY_REPRICE_BPS,
+                       on_event=lambda kind: C_STANDBY[kind].labels(self.name).inc())
+
+    @lazy
+    def slicer(self) -> Slicer:
+        return Slicer(self.store, self.bind(next_child), self.bind(fill_child), self.bind(resolve_child),
+                      interval_sec=SLICE_INTERVAL_SEC,
+                      max_failures=SLICE_MAX_FAILURES, max_age_sec=SLICE_MAX_AGE_SEC,
+                      on_event=lambda kind: C_SLICE.labels(self.name, kind).inc())
+
+    def run(self, fn, *a, **kw):
+        """fn(*a, **kw) with this market current (and stamped on log lines)."""
+        tok, tok_name = CURRENT.set(self), MARKET_NAME.set(self.name if len(APP.markets) > 1 else None)
+        try:
+            return fn(*a, **kw)
+        finally:
+            MARKET_NAME.reset(tok_name); CURRENT.reset(tok)
 
-def exec_sell_gc_for_stable(gc_amount_ui: Decimal):
-    swap = ray_compute_swap_base_in(GC_MINT, USDC_MINT, gc_amount_ui)
-    txs = ray_build_transactions(swap, input_is_sol=False, output_is_sol=False)
-    sigs = submit_signed_txs(txs)
-    return {"sigs": sigs, "input": "GC", "output": "USDC", "ui_in": str(gc_amount_ui)}
+    def bind(self, fn):
+        """fn wrapped to run for this market (background workers start outside any market)."""
+        return lambda *a, **kw: self.run(fn, *a, **kw)
 
-def exec_buy_gc_with_stable(stable_mint: str, stable_ui: Decimal):
-    swap = ray_compute_swap_base_in(stable_mint, GC_MINT, stable_ui)
-    txs = ray_build_transactions(swap, input_is_sol=False, output_is_sol=False)
-    sigs = submit_signed_txs(txs)
-    return {"sigs": sigs, "input": ("USDC" if stable_mint==USDC_MINT else "USDT"), "output": "GC", "ui_in": str(stable_ui)}
+    def start_workers(self):
+        if TWAP_SAMPLER: self.sampler.start()
+        if STANDBY: self.standby.start()
+
+    def stop_workers(self):
+        for w in ("standby", "sampler"):   # never build a worker just to stop it
+            worker = self.__dict__.get(w)
+            if worker is not None and worker.running: worker.stop()
+        if self.__dict__.get("series") is not None: self.series.close()
 
 # ────────────────────────────────────────────────────────────────────────────
 # One cycle
 # ────────────────────────────────────────────────────────────────────────────
+@stage("cycle")
 def run_once():
-    bals = get_balances()
+    # serve's _cycle opens the trace (so its summary line carries it); a direct call gets its own
+    t = TRACE_ID.get()
+    if t: return _run_once(t)
+    with new_trace() as t:
+        return _run_once(t)
+
+def _run_once(cycle: str):
+    m = cur()
 
-    # Price discovery (spot + micro-TWAP)
-    sol_per_gc_sp = sol_per_gc_spot()
-    sol_usdc      = sol_per_usdc()
-    sol_per_gc_tw = sol_per_gc_twap()
+    # A parent order interrupted by a restart (or shutdown) is finished before anything new is decided
+    parent = m.slicer.active()
+    if parent:
+        info("parent_resumed", parent=parent.id, side=parent.side, filled=parent.filled, total=parent.total, children=parent.children)
+        return work_parent(parent)
 
-    G_PRICE_SOL_PER_GC.set(float(sol_per_gc_sp)); G_SOL_PER_USDC.set(float(sol_usdc))
+    # Price discovery (balances + spot + micro-TWAP, concurrently)
+    snap = discover()
+    bals, sol_per_gc_sp, sol_usdc, sol_per_gc_tw = snap.bals, snap.spot_sol_per_gc, snap.sol_usdc, snap.twap_sol_per_gc
+    dbg("discovery", latency_ms=snap.latency_ms)
+
+    G_PRICE_SOL_PER_GC.labels(m.name).set(float(sol_per_gc_sp)); G_SOL_PER_USDC.labels(m.name).set(float(sol_usdc))
+    G_TWAP_SOL_PER_GC.labels(m.name).set(float(sol_per_gc_tw))
 
     decision, size_gc, usdc_in, usdt_in, lo, hi, stable_choice = decide(sol_per_gc_sp, sol_usdc, bals)
-    G_BAND_LOWER_SOL.set(float(lo)); G_BAND_UPPER_SOL.set(float(hi))
+    G_BAND_LOWER_SOL.labels(m.name).set(float(lo)); G_BAND_UPPER_SOL.labels(m.name).set(float(hi))
+    mode = slice_mode(decision, size_gc, usdc_in, usdt_in)
+    if mode:   # too big for one swap (or twap slicing on): work it as child orders instead of shrinking / skipping
+        # the governor sizes every child; a day without room for even the smallest one opens no parent
+        with stage("governor"):
+            ok_day, why_day = check_parent_room(decision, size_gc, usdc_in, usdt_in, load_day_state(bals))
+        if not ok_day: return governor_skip(cycle, decision, why_day)
+        return start_parent(cycle, decision, mode, size_gc, usdc_in, usdt_in, sol_per_gc_sp, sol_per_gc_tw)
+    size_gc, usdc_in, usdt_in = fit_size_to_impact(decision, size_gc, usdc_in, usdt_in)
+
+    # Daily governor: ahead of routing, so a day without room spends no quotes
+    with stage("governor"):
+        day_state = load_day_state(bals)
+        ok_day, why_day = check_daily_governor(decision, size_gc, usdc_in, usdt_in, day_state)
+    if not ok_day: return governor_skip(cycle, decision, why_day)
 
-    # Daily governor
-    day_state = load_day_state(bals)
-    ok_day, why_day = check_daily_governor(decision, size_gc, usdc_in, usdt_in, day_state)
-    if not ok_day:
-        info("governor_skip", reason=why_day, decision=decision)
-        tg_send(f"[TreasuryBot] SKIP (Gov): {why_day}")
-        return {"status":"SKIP", "reason": why_day}
+    # Route: which pools (and, buying, which stable) the trade goes through
+    plan = select_route(decision, size_gc, usdc_in, usdt_in, sol_per_gc_sp, sol_usdc, bals)
+    if plan and decision == "BUY" and plan.input != stable_choice:
+        stable_choice, amt = plan.input, usdc_in + usdt_in
+        usdc_in, usdt_in = (amt, Decimal(0)) if stable_choice == m.usdc else (Decimal(0), amt)
+        ok_day, why_day = check_daily_governor(decision, size_gc, usdc_in, usdt_in, day_state)   # the other stable's cap
+        if not ok_day: return governor_skip(cycle, decision, why_day)
 
     # Pool health checks
-    ok, why = health_checks(decision, size_gc, usdc_in, usdt_in, sol_per_gc_sp, sol_per_gc_tw)
+    ok, why = health_checks(decision, size_gc, usdc_in, usdt_in, sol_per_gc_sp, sol_per_gc_tw, plan)
     if not ok:
         warn("health_skip", reason=why, decision=decision)
+        m.store.record("decision", cycle=cycle, side=decision, status="SKIP_HEALTH", detail={"reason": why})
         tg_send(f"[TreasuryBot] SKIP (Health): {why}")
         return {"status":"SKIP", "reason": why}
 
@@ -465,40 +1345,153 @@ def run_once():
         "sizes": {"gc": str(size_gc), "usdc": str(usdc_in), "usdt": str(usdt_in)},
         "price": {"spot_sol_per_gc": str(sol_per_gc_sp), "twap_sol_per_gc": str(sol_per_gc_tw), "sol_usdc": str(sol_usdc)},
         "band_sol": {"lower": str(lo), "upper": str(hi)},
-        "balances": {"gc": str(bals.treasury_gc), "usdc": str(bals.vault_usdc), "usdt": str(bals.vault_usdt)},
-        "limits": {"cap_bps": CAP_BPS, "slippage_bps": SLIPPAGE_BPS, "max_price_impact_bps": MAX_PRICE_IMPACT_BPS}
+        "balances": {"gc": str(bals.treasury_gc), "usdc": str(bals.vault_usdc), "usdt": str(bals.vault_usdt), "sol": str(bals.sol), "slot": bals.slot},
+        "limits": {"cap_bps": m.p.cap_bps, "slippage_bps": m.p.slippage_bps, "max_price_impact_bps": m.p.max_price_impact_bps},
+        "route": ({"name": plan.name, "net_out": f"{plan.net:.6f}", "advantage": f"{plan.advantage:.6f}",
+                   "advantage_bps": plan.advantage_bps, "candidates": {k: f"{v:.6f}" for k, v in plan.candidates.items()}}
+                  if plan else None),
     }
     info("decision", **snapshot)
+    m.store.record("decision", cycle=cycle, side=decision, slot=bals.slot, status="OK", detail=snapshot)
     tg_send(f"[TreasuryBot] {decision} | sizes GC:{size_gc} USDC:{usdc_in} USDT:{usdt_in}\n"
             f"spot {sol_per_gc_sp:.10f} SOL/GC | twap {sol_per_gc_tw:.10f} | band [{lo:.10f},{hi:.10f}]")
 
     if decision == "HOLD":
         return {"status":"HOLD"}
 
-    # Execute
+    # Execute. The governor only counts swaps that landed (see _book_fill).
+    if plan and decision in ("SELL", "BUY"):
+        res = execute_plan(decision, plan, sol_per_gc_sp)
+        if res["landing"] not in ("confirmed", "partial"):
+            tg_send(f"[TreasuryBot] {decision} not landed via {plan.name} ({res['landing']}) → {res['sigs'][:1]} ...")
+            return {"status":"FAILED", "action":decision, **res}
+        info(f"executed_{decision.lower()}", **res); tg_send(f"[TreasuryBot] {decision} ok via {plan.name} → {res['sigs'][:1]} ...")
+        return {"status":"EXEC", "action":decision, **res}
+
     if decision == "SELL" and size_gc > 0:
-        res = exec_sell_gc_for_stable(size_gc)
-        C_EXEC_SELL.inc()
-        bump_day_counters("SELL", size_gc, Decimal(0), Decimal(0))
+        res = exec_sell_gc_for_stable(size_gc, sol_per_gc_sp)
+        if res["landing"] not in ("confirmed", "partial"):
+            tg_send(f"[TreasuryBot] SELL not landed ({res['landing']}) → {res['sigs'][:1]} ...")
+            return {"status":"FAILED", "action":"SELL", **res}
+        _book_fill("SELL", m.gc, Decimal(res["ui_in"]))
         info("executed_sell", **res); tg_send(f"[TreasuryBot] SELL ok → {res['sigs'][:1]} ...")
         return {"status":"EXEC", "action":"SELL", **res}
 
     if decision == "BUY" and (usdc_in > 0 or usdt_in > 0) and stable_choice:
-        res = exec_buy_gc_with_stable(stable_choice, (usdc_in if usdc_in>0 else usdt_in))
-        C_EXEC_BUY.inc()
-        bump_day_counters("BUY", Decimal(0), (usdc_in if usdc_in>0 else Decimal(0)), (usdt_in if usdt_in>0 else Decimal(0)))
+        res = exec_buy_gc_with_stable(stable_choice, (usdc_in if usdc_in>0 else usdt_in), sol_per_gc_sp)
+        if res["landing"] not in ("confirmed", "partial"):
+            tg_send(f"[TreasuryBot] BUY not landed ({res['landing']}) → {res['sigs'][:1]} ...")
+            return {"status":"FAILED", "action":"BUY", **res}
+        _book_fill("BUY", stable_choice, Decimal(res["ui_in"]))   # ui_in: the standby order may be a little smaller
         info("executed_buy", **res); tg_send(f"[TreasuryBot] BUY ok → {res['sigs'][:1]} ...")
         return {"status":"EXEC", "action":"BUY", **res}
 
     warn("skip_no_size_or_balance")
     return {"status":"SKIP", "reason":"no size or insufficient balance"}
 
-if __name__ == "__main__":
-    info("startup", version="1.1", jito=bool(JITO_URL), slippage_bps=SLIPPAGE_BPS)
-    while True:
+# ────────────────────────────────────────────────────────────────────────────
+# Event mode: websocket account updates → local price → debounced trigger
+# ────────────────────────────────────────────────────────────────────────────
+def _ws_url() -> str:
+    return WS_URL or RPC_URL.replace("https://", "wss://", 1).replace("http://", "ws://", 1)
+
+def build_event_watch():
+    """(stream, trigger) over the current market's GC/SOL and SOL/USDC pool accounts plus its token accounts."""
+    m = cur()
+    feeds = {}
+    for name, (m1, m2) in {"gc_sol": (m.gc, SOL_MINT), "sol_usdc": (SOL_MINT, m.usdc)}.items():
+        pool = APP.pools.pool(m1, m2)
+        feeds[name] = PoolPrice(pool, APP.pools.keys(pool.id) if pool.kind != "Concentrated" else {})
+    owned = {str(a) for a in m.balances.accounts()}
+    # the scheduler runs the safety poll (SAFETY_POLL_SEC cadence), so the trigger only reacts to events
+    trigger = Trigger(band=lambda: tuple(float(x) for x in m.run(band_usd)), move_bps=EVENT_MOVE_BPS,
+                      debounce_sec=EVENT_DEBOUNCE_SEC, safety_sec=math.inf)
+
+    def gc_usd() -> float:
+        return feeds["gc_sol"].price_of(m.gc) * feeds["sol_usdc"].price_of(SOL_MINT)
+
+    def on_update(account: str, data: bytes, slot: int):
+        if account in owned:
+            m.balances.invalidate()   # deposits / fills: next cycle re-reads
+            return
+        if any(f.apply(account, data, slot) for f in feeds.values()):
+            trigger.update(gc_usd())
+
+    def resync():
+        keys = [a for f in feeds.values() for a in f.watch]
+        res = APP.client.get_multiple_accounts([Pubkey.from_string(a) for a in keys])
+        for a, acc in zip(keys, res.value):
+            if acc is not None:
+                for f in feeds.values(): f.apply(a, bytes(acc.data), res.context.slot)
+        m.balances.invalidate()
+        trigger.update(gc_usd())
+
+    accounts = [a for f in feeds.values() for a in f.watch] + sorted(owned)
+    return AccountStream(_ws_url(), accounts, on_update, on_connect=resync), trigger
+
+# ────────────────────────────────────────────────────────────────────────────
+# Scheduler: every market in one process, each on its own cadence
+# ────────────────────────────────────────────────────────────────────────────
+def _cycle(why: str):
+    with new_trace():
         try:
             res = run_once()
-            info("cycle_summary", **res)
+            info("cycle_summary", trigger=why, **res)
         except Exception as e:
-            err("cycle_failed", error=str(e)); tg_send(f"[TreasuryBot] ERROR: {e}")
-        time.sleep(CHECK_INTERVAL)
+            err("cycle_failed", trigger=why, error=str(e)); tg_send(f"[TreasuryBot] ERROR: {e}")
+
+def serve(stop: Optional[threading.Event] = None, events: bool = EVENT_MODE):
+    """Run all markets until stop is set. A market's cycle runs every check_interval_sec, or in event
+    mode when its trigger fires (SAFETY_POLL_SEC being the cadence); markets whose stream can't be
+    set up (pool keys / websocket unavailable) stay on their poll cadence."""
+    global STOP
+    STOP = stop = stop or threading.Event()
+    sched = Scheduler(MARKET_WORKERS or len(APP.markets))
+    streams, watchers = [], []
+    try:
+        for m in APP.markets:
+            interval = m.p.check_interval_sec
+            if events:
+                try:
+                    stream, trigger = m.run(build_event_watch)
+                    stream.start(); streams.append(stream)
+                    def watch(m=m, trigger=trigger):
+                        while not stop.is_set():
+                            why = trigger.wait(stop)
+                            if why: sched.poke(m.name, why)
+                    watchers.append(threading.Thread(target=watch, name=f"trigger-{m.name}", daemon=True))
+                    interval = SAFETY_POLL_SEC
+                    m.run(info, "event_mode", ws=_ws_url(), accounts=len(stream.accounts), move_bps=EVENT_MOVE_BPS,
+                          safety_sec=SAFETY_POLL_SEC)
+                except Exception as e:
+                    m.run(err, "event_mode_failed", error=str(e))
+                    m.run(tg_send, f"[TreasuryBot] event mode failed, polling: {e}")
+            sched.add(m.name, m.bind(_cycle), interval)
+        for t in watchers: t.start()
+        sched.run(stop)
+    finally:
+        stop.set()
+        for s in streams: s.stop()
+
+def main(argv=None) -> int:
+    setup_logging()
+    for m in APP.markets: m.owner_pub   # a bad / missing wallet fails here, before anything starts
+    APP.start_metrics()
+    info("startup", version="1.2", markets=[m.name for m in APP.markets], jito=bool(JITO_URL), event_mode=EVENT_MODE,
+         ray_rate_per_sec=RAY_RATE_PER_SEC)
+    for m in APP.markets: m.start_workers()
+    # systemd / docker stop send SIGTERM: stop like Ctrl-C does, so queued alerts and samples are flushed
+    stop = threading.Event()
+    def on_term(signum, frame):
+        info("shutdown", signal=signal.Signals(signum).name); stop.set()
+    prev = signal.signal(signal.SIGTERM, on_term)
+    try:
+        serve(stop)
+    finally:
+        signal.signal(signal.SIGTERM, prev)
+        for m in APP.markets: m.stop_workers()
+        APP.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())